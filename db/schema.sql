@@ -63,9 +63,24 @@ CREATE TABLE IF NOT EXISTS supervisors (
   department VARCHAR NOT NULL,
   email VARCHAR NOT NULL,
   profile_data JSONB NOT NULL,
+  content_hash VARCHAR,
   last_updated TIMESTAMP NOT NULL DEFAULT NOW()
 );
 
+-- Hash of the profile last loaded by src/store/pg_sync.py (for databases
+-- created before the column existed)
+ALTER TABLE supervisors ADD COLUMN IF NOT EXISTS content_hash VARCHAR;
+
+-- Term weights of the corpus-fitted (hashing) embedder used by
+-- src/store/pg_sync.py, kept so that later syncs embed with the weights the
+-- stored vectors were made with
+CREATE TABLE IF NOT EXISTS embedder_fits (
+  embedder VARCHAR PRIMARY KEY,
+  documents INT NOT NULL,
+  document_frequencies BYTEA NOT NULL,
+  fitted_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
 -- Table for storing field-specific embeddings (research_interests, expertise, publications)
 CREATE TABLE IF NOT EXISTS supervisor_embeddings (
   id SERIAL PRIMARY KEY,
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the matching indexes on synthetic profiles.
+
+The real data set is far smaller than a university's worth of supervisors, so
+these benchmarks generate reproducible synthetic profiles with the same shape
+(research interests, expertise, publications, projects) from a fixed topic
+vocabulary.
+
+Usage:
+    python scripts/benchmark_matching.py bm25 [--profiles 10000] [--queries 1000]
+    python scripts/benchmark_matching.py hnsw [--items 20000] [--dim 384] [--M 16]
+    python scripts/benchmark_matching.py quantize [--items 20000] [--dim 384]
+    python scripts/benchmark_matching.py batch [--profiles 10000] [--queries 1000]
+    python scripts/benchmark_matching.py pgsync [--profiles 3000] [--dsn postgresql://...]
+    python scripts/benchmark_matching.py coauthors [--profiles 10000]
+"""
+
+import sys
+import time
+import argparse
+import logging
+import statistics
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.matching.ann_index import HNSWIndex
+from src.matching.batch import match_batch
+from src.matching.coauthor_graph import CoauthorGraph
+from src.matching.embedder import HashingEmbedder, normalize_rows
+from src.matching.engine import Match, MatchingEngine
+from src.matching.keyword_index import KeywordIndex
+from src.matching.quantization import make_storage
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+TOPICS = [
+    "natural language processing",
+    "machine learning",
+    "deep learning",
+    "computer vision",
+    "software testing",
+    "software quality",
+    "requirements engineering",
+    "aspect-oriented programming",
+    "cloud computing",
+    "internet of things",
+    "cyber security",
+    "blockchain",
+    "human computer interaction",
+    "information retrieval",
+    "data mining",
+    "big data analytics",
+    "distributed systems",
+    "fault tolerance",
+    "mobile computing",
+    "affective computing",
+    "bioinformatics",
+    "medical imaging",
+    "speech recognition",
+    "recommender systems",
+    "quantum software",
+    "energy efficiency",
+    "wireless sensor networks",
+    "fuzzy logic",
+    "evolutionary algorithms",
+    "knowledge graphs",
+]
+QUALIFIERS = [
+    "applications of",
+    "advances in",
+    "scalable",
+    "explainable",
+    "federated",
+    "secure",
+    "adaptive",
+    "empirical study of",
+    "a survey of",
+    "towards",
+]
+DEPARTMENTS = [
+    "Software Engineering",
+    "Artificial Intelligence",
+    "Computer System and Technology",
+    "Information Systems",
+]
+
+
+def synthetic_profiles(n, seed=0):
+    """n reproducible synthetic profiles keyed by user id."""
+    rng = np.random.default_rng(seed)
+
+    def topics(count):
+        return [TOPICS[i] for i in rng.choice(len(TOPICS), count, replace=False)]
+
+    def title():
+        a, b = topics(2)
+        return f"{QUALIFIERS[rng.integers(len(QUALIFIERS))]} {a} for {b}"
+
+    profiles = {}
+    for i in range(n):
+        profiles[f"user{i:06d}"] = {
+            "name": f"Dr. Synthetic {i}",
+            "department": DEPARTMENTS[rng.integers(len(DEPARTMENTS))],
+            "research_interests": topics(int(rng.integers(3, 8))),
+            "expertise": topics(int(rng.integers(2, 5))),
+            "publications": [
+                {"title": title(), "year": int(rng.integers(2005, 2026))}
+                for _ in range(int(rng.integers(5, 40)))
+            ],
+            "projects": [
+                {"title": title(), "funding": f"Grant FP{i % 5000:04d}-{j}"}
+                for j in range(int(rng.integers(0, 4)))
+            ],
+        }
+    return profiles
+
+
+def synthetic_queries(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return [
+        " ".join(TOPICS[i] for i in rng.choice(len(TOPICS), int(rng.integers(1, 3))))
+        for _ in range(n)
+    ]
+
+
+def clustered_vectors(n, dim, clusters=500, spread=1.0, seed=0):
+    """n normalized vectors around random cluster centers, like topic embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(clusters, size=n)]
+    vectors += spread * rng.standard_normal((n, dim)).astype(np.float32)
+    return normalize_rows(vectors)
+
+
+def exact_top_k(vectors, query, k):
+    scores = vectors @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def latencies_us(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p99": samples[int(len(samples) * 0.99) - 1],
+    }
+
+
+def benchmark_bm25(args):
+    profiles = synthetic_profiles(args.profiles)
+    queries = synthetic_queries(args.queries)
+
+    index, build_time = timed(KeywordIndex().build, profiles)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "keyword_index.npz"
+        index.save(path)
+        file_size = path.stat().st_size
+        index, load_time = timed(KeywordIndex.load, path)
+
+    # Rare exact terms (grant codes) versus common multi-word topic queries
+    rng = np.random.default_rng(2)
+    grants = [f"fp{i:04d}-0" for i in rng.integers(0, 5000, args.queries)]
+    exact = latencies_us(lambda q: index.search(q, 10), grants)
+    latency = latencies_us(lambda q: index.search(q, 10), queries)
+
+    logger.info(
+        f"BM25: {args.profiles} profiles, {len(index.vocab)} terms, "
+        f"{len(index.doc_ids)} postings"
+    )
+    logger.info(
+        f"  build {build_time:.2f} s, load {load_time * 1000:.0f} ms, "
+        f"{index.memory_bytes() / 2**20:.1f} MiB in memory, "
+        f"{file_size / 2**20:.1f} MiB on disk"
+    )
+    logger.info(f"  exact term p50 {exact['p50']:.0f} µs, p99 {exact['p99']:.0f} µs")
+    logger.info(
+        f"  topic query p50 {latency['p50']:.0f} µs, p99 {latency['p99']:.0f} µs"
+    )
+
+
+def benchmark_hnsw(args):
+    k = 10
+    vectors = clustered_vectors(args.items + args.queries, args.dim)
+    vectors, queries = vectors[: args.items], vectors[args.items :]
+
+    index = HNSWIndex(args.dim, M=args.M, ef_construction=args.ef_construction)
+    _, build_time = timed(index.add, vectors)
+    logger.info(
+        f"HNSW: {args.items} vectors of {args.dim} dims, M={args.M}, "
+        f"ef_construction={args.ef_construction}, built in {build_time:.1f} s"
+    )
+
+    truth = [set(exact_top_k(vectors, q, k).tolist()) for q in queries]
+    exact = latencies_us(
+        lambda i: exact_top_k(vectors, queries[i], k), range(len(queries))
+    )
+    logger.info(f"  exact scan      p50 {exact['p50']:>7.0f} µs   recall@10 1.000")
+    for ef in (16, 32, 64, 128, 256):
+        found = [set(index.search(q, k, ef)[0].tolist()) for q in queries]
+        recall = np.mean([len(f & t) / k for f, t in zip(found, truth)])
+        latency = latencies_us(
+            lambda i, ef=ef: index.search(queries[i], k, ef), range(len(queries))
+        )
+        logger.info(
+            f"  hnsw ef={ef:<4}    p50 {latency['p50']:>7.0f} µs   recall@10 {recall:.3f}"
+        )
+
+
+def benchmark_quantize(args):
+    k = 10
+    vectors = clustered_vectors(args.items + args.queries, args.dim)
+    vectors, queries = vectors[: args.items], vectors[args.items :]
+    truth = [set(exact_top_k(vectors, q, k).tolist()) for q in queries]
+    logger.info(f"Quantization: {args.items} vectors of {args.dim} dims, exact scan")
+
+    encodings = [
+        ("float32", {}),
+        ("float16", {}),
+        ("int8", {}),
+        ("pq", {"m": args.dim // 4}),
+        ("pq", {"m": args.dim // 8}),
+        ("pq", {"m": args.dim // 16}),
+    ]
+    for kind, params in encodings:
+        storage = make_storage(kind, args.dim, **params)
+        _, build_time = timed(storage.add, vectors)
+
+        def search(query, storage=storage):
+            scores = storage.scores(query)[0]
+            top = np.argpartition(-scores, k - 1)[:k]
+            return top[np.argsort(-scores[top])]
+
+        # Recall of the true top 10 among the top 10, and among the top 100
+        # (what a re-ranking pass over a shortlist would recover)
+        scores = storage.scores(queries)
+        shortlist = np.argpartition(-scores, 100, axis=1)[:, :100]
+        found = [set(search(q).tolist()) for q in queries]
+        recall = np.mean([len(f & t) / k for f, t in zip(found, truth)])
+        recall_100 = np.mean([len(set(s) & t) / k for s, t in zip(shortlist, truth)])
+        latency = latencies_us(search, queries)
+        label = f"{kind} m={params['m']}" if params else kind
+        logger.info(
+            f"  {label:<10} {storage.memory_bytes() / 2**20:>6.2f} MiB "
+            f"({storage.memory_bytes() / args.items:>6.1f} B/vector)   "
+            f"recall@10 {recall:.3f}   10@100 {recall_100:.3f}   "
+            f"p50 {latency['p50']:>6.0f} µs   encoded in {build_time:.1f} s"
+        )
+
+
+def benchmark_batch(args):
+    profiles = synthetic_profiles(args.profiles)
+    queries = [(str(i), q) for i, q in enumerate(synthetic_queries(args.queries))]
+    engine, build_time = timed(MatchingEngine(HashingEmbedder()).build, profiles)
+    logger.info(
+        f"Batch: {args.queries} queries against {args.profiles} supervisors "
+        f"(index built in {build_time:.1f} s)"
+    )
+
+    one_by_one = latencies_us(lambda q: engine.match(q[1], 5), queries[:100])
+    logger.info(
+        f"  one query at a time   ~{one_by_one['p50'] * args.queries / 1e6:.2f} s"
+    )
+    for chunk_size in (64, 256, 1024):
+        _, elapsed = timed(
+            lambda chunk_size=chunk_size: list(
+                match_batch(engine, queries, 5, chunk_size)
+            )
+        )
+        logger.info(
+            f"  chunks of {chunk_size:<5}      {elapsed:.2f} s "
+            f"({args.queries / elapsed:.0f} queries/s)"
+        )
+
+
+def benchmark_pgsync(args):
+    """Loads into a scratch schema, dropped afterwards."""
+    # Only this benchmark needs a database driver
+    import psycopg
+
+    from src.store.pg_sync import DATABASE_URL, PgSync, libpq_dsn
+
+    profiles = synthetic_profiles(args.profiles)
+    conn = psycopg.connect(
+        libpq_dsn(args.dsn or DATABASE_URL),
+        autocommit=True,
+        options="-c search_path=sync_benchmark,public",
+    )
+    conn.execute("DROP SCHEMA IF EXISTS sync_benchmark CASCADE")
+    conn.execute("CREATE SCHEMA sync_benchmark")
+    try:
+        sync = PgSync(conn, HashingEmbedder(dim=768))
+        sync.apply_schema()
+        logger.info(f"PostgreSQL sync of {args.profiles} supervisors")
+        rng = np.random.default_rng(2)
+        for label, share in (
+            ("full load", 1.0),
+            ("no change", 0),
+            ("1% edited", 0.01),
+            ("20% edited", 0.2),
+        ):
+            if label != "full load":
+                for user_id in rng.choice(
+                    sorted(profiles), int(share * len(profiles)), replace=False
+                ):
+                    profiles[user_id]["research_interests"].append(f"edit {label}")
+            counts, elapsed = timed(sync.sync, profiles)
+            reindexed = len(counts["reindexed"])
+            logger.info(
+                f"  {label:<11} {elapsed:6.2f} s  "
+                f"{counts['added'] + counts['updated']:>6} written, {reindexed} indexes rebuilt"
+            )
+    finally:
+        conn.execute("DROP SCHEMA IF EXISTS sync_benchmark CASCADE")
+        conn.close()
+
+
+def coauthored_profiles(n, group=20, seed=3):
+    """
+    Synthetic profiles whose publications have authors: up to three
+    co-authors, mostly from the same research group of `group` supervisors.
+    """
+    profiles = synthetic_profiles(n)
+    rng = np.random.default_rng(seed)
+    for i, (user_id, profile) in enumerate(profiles.items()):
+        profile["name"] = f"Dr. Given{i} Family{i % 997}"
+        start = i - i % group
+        for j, publication in enumerate(profile["publications"]):
+            others = [
+                int(rng.integers(start, min(start + group, n)))
+                if rng.random() < 0.9
+                else int(rng.integers(n))
+                for _ in range(int(rng.integers(0, 4)))
+            ]
+            publication["doi"] = f"10.5555/{user_id}.{j}"
+            publication["authors"] = "; ".join(
+                f"Family{k % 997}, Given{k}" for k in [i, *others]
+            )
+    return profiles
+
+
+def benchmark_coauthors(args):
+    profiles = coauthored_profiles(args.profiles)
+    graph, build_time = timed(CoauthorGraph().build, profiles)
+    edges = len(graph.csr[2]) // 2
+    logger.info(
+        f"Co-author graph: {args.profiles} supervisors, {edges} links, built in "
+        f"{build_time:.2f} s, CSR {graph.memory_bytes() / 2**20:.1f} MiB"
+    )
+    rng = np.random.default_rng(4)
+    user_ids = [graph.user_ids[i] for i in rng.integers(len(graph.user_ids), size=200)]
+    for hops in (1, 2, 3):
+        latency = latencies_us(
+            lambda u, hops=hops: graph.related(u, hops, 10), user_ids
+        )
+        logger.info(
+            f"  related, {hops} hops   p50 {latency['p50']:8.0f} µs  "
+            f"p99 {latency['p99']:8.0f} µs"
+        )
+
+    candidates = [
+        [
+            Match(u, u, "", float(s))
+            for u, s in zip(rng.choice(user_ids, 50), rng.random(50))
+        ]
+        for _ in range(200)
+    ]
+    latency = latencies_us(lambda c: graph.rerank(c, 10), candidates)
+    logger.info(f"  rerank 50 matches  p50 {latency['p50']:8.0f} µs")
+
+    def edit(user_id):
+        profile = profiles[user_id]
+        profile["publications"] = profile["publications"][1:]
+        graph.upsert(user_id, profile)
+        graph.neighbors(user_id)
+
+    latency = latencies_us(edit, user_ids[:100])
+    logger.info(
+        f"  upsert + query     p50 {latency['p50'] / 1000:8.1f} ms  "
+        f"(full build {build_time * 1000:.0f} ms)"
+    )
+
+
+BENCHMARKS = {
+    "bm25": benchmark_bm25,
+    "hnsw": benchmark_hnsw,
+    "quantize": benchmark_quantize,
+    "batch": benchmark_batch,
+    "pgsync": benchmark_pgsync,
+    "coauthors": benchmark_coauthors,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the matching indexes")
+    parser.add_argument("benchmark", choices=BENCHMARKS)
+    parser.add_argument("--profiles", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument(
+        "--items", type=int, default=20000, help="Vectors (hnsw, quantize)"
+    )
+    parser.add_argument(
+        "--dim", type=int, default=384, help="Dimensions (hnsw, quantize)"
+    )
+    parser.add_argument("--M", type=int, default=16, help="Links per node (hnsw)")
+    parser.add_argument("--ef-construction", type=int, default=100)
+    parser.add_argument("--dsn", help="PostgreSQL (pgsync, default: DATABASE_URL)")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
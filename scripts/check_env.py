@@ -5,9 +5,33 @@ Simple script to check environment variables
 
 import os
 import sys
+import time
 from pathlib import Path
 
 
+def load_profile_set():
+    """Time loading every profile through the shared profile I/O layer."""
+    try:
+        sys.path.insert(0, str(Path(__file__).parent.parent))
+        from src.utils.profile_io import default_cache, load_profiles
+    except ImportError as e:
+        print(f"Could not load profiles: {e}")
+        return
+
+    start = time.perf_counter()
+    try:
+        profiles = load_profiles()
+    except Exception as e:
+        print(f"❌ Error loading profiles: {e}")
+        return
+    elapsed = (time.perf_counter() - start) * 1000
+    cache = default_cache()
+    print(
+        f"Loaded {len(profiles)} profiles in {elapsed:.1f} ms "
+        f"({cache.hits} from cache, {cache.misses} parsed)"
+    )
+
+
 def main():
     print("Python version:", sys.version)
     print("\nEnvironment variables:")
@@ -49,6 +73,7 @@ def main():
             print(f"  - {file.name}")
         if len(profile_files) > 5:
             print(f"  ... and {len(profile_files) - 5} more")
+        load_profile_set()
     else:
         print(f"\nThe '{profiles_path}' directory does not exist.")
 
@@ -73,6 +98,10 @@ def main():
         import yaml
 
         print("✅ PyYAML is installed")
+        if yaml.__with_libyaml__:
+            print("✅ PyYAML has libyaml support (fast C loader)")
+        else:
+            print("❌ PyYAML has no libyaml support; profiles load more slowly")
     except ImportError:
         print("❌ PyYAML is not installed")
 
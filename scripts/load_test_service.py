@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Load test for the search service (src/service/app.py).
+
+Sends requests from `concurrency` concurrent clients until `requests` have
+completed, then reports throughput and latency percentiles. Queries are the
+research interests found in the profiles, cycled; --cold makes every query
+unique so none is served from the result cache.
+
+Either point it at a running service with --url, or let it start one
+in-process with --serve (uvicorn on a background thread).
+
+Usage:
+    python scripts/load_test_service.py --serve [--concurrency 32] [--requests 2000]
+    python scripts/load_test_service.py --url http://127.0.0.1:8000 --endpoint batch
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+import uvicorn
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.service.app import create_app
+from src.utils.profile_io import PROFILES_DIR, load_profiles
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+# One log line per request would dominate the measurement
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+FALLBACK_QUERIES = [
+    "natural language processing",
+    "machine learning",
+    "software testing",
+    "computer vision",
+    "cyber security",
+]
+
+
+def profile_queries(profiles_dir=PROFILES_DIR):
+    """Distinct research interests of the local profiles, as queries."""
+    queries = {
+        str(interest).strip()
+        for profile in load_profiles(profiles_dir).values()
+        for interest in profile.get("research_interests") or []
+        if str(interest).strip()
+    }
+    return sorted(queries) or FALLBACK_QUERIES
+
+
+def request_factory(endpoint, queries, k, batch_size, cold):
+    """A function from request number to (method, path, params, json)."""
+
+    def text(n):
+        query = queries[n % len(queries)]
+        return f"{query} q{n}" if cold else query
+
+    def search(n):
+        return "GET", "/search", {"q": text(n), "k": k}, None
+
+    def batch(n):
+        body = {
+            "queries": [text(n * batch_size + i) for i in range(batch_size)],
+            "k": k,
+        }
+        return "POST", "/batch-match", None, body
+
+    if endpoint == "search":
+        return search
+    if endpoint == "batch":
+        return batch
+    # Mixed: one batch request per 20
+    return lambda n: batch(n) if n % 20 == 19 else search(n)
+
+
+async def run_load(url, make_request, total, concurrency):
+    """(latencies in seconds, error count, elapsed seconds)."""
+    counter = itertools.count()
+    latencies = []
+    errors = 0
+
+    async def client(http):
+        nonlocal errors
+        while (n := next(counter)) < total:
+            method, path, params, body = make_request(n)
+            start = time.perf_counter()
+            try:
+                response = await http.request(method, path, params=params, json=body)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return np.array(latencies), errors, elapsed
+
+
+def report(latencies, errors, elapsed, concurrency):
+    ms = latencies * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    logger.info(
+        f"{len(ms)} requests, {concurrency} concurrent, {errors} errors in "
+        f"{elapsed:.2f} s: {len(ms) / elapsed:.0f} req/s"
+    )
+    logger.info(
+        f"Latency ms: p50 {p50:.2f}  p90 {p90:.2f}  p99 {p99:.2f}  max {ms.max():.2f}"
+    )
+
+
+def start_server(port):
+    """Serve the app on a background thread; returns the uvicorn server."""
+    config = uvicorn.Config(create_app(), port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the search service")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://127.0.0.1:8000")
+    target.add_argument(
+        "--serve", action="store_true", help="Start the service in this process"
+    )
+    parser.add_argument("--port", type=int, default=8765, help="Port for --serve")
+    parser.add_argument(
+        "--endpoint", choices=["search", "batch", "mixed"], default="search"
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument(
+        "--cold", action="store_true", help="Unique queries (no result cache hits)"
+    )
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if args.serve:
+        start = time.perf_counter()
+        server = start_server(args.port)
+        url = f"http://127.0.0.1:{args.port}"
+        logger.info(f"Service started in {time.perf_counter() - start:.2f} s")
+
+    queries = profile_queries()
+    make_request = request_factory(
+        args.endpoint, queries, args.top_k, args.batch_size, args.cold
+    )
+    try:
+        # Warm up connections and the thread pool
+        asyncio.run(run_load(url, make_request, args.concurrency, args.concurrency))
+        latencies, errors, elapsed = asyncio.run(
+            run_load(url, make_request, args.requests, args.concurrency)
+        )
+    finally:
+        if server:
+            server.should_exit = True
+
+    report(latencies, errors, elapsed, args.concurrency)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
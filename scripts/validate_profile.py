@@ -3,15 +3,20 @@
 import os
 import sys
 import json
+import time
 import yaml
 import jsonschema
 import argparse
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 # Add project root to Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.utils.profile_io import read_yaml
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -19,60 +24,115 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+SCHEMA_PATH = Path(__file__).parent.parent / "docs" / "schema" / "profile_schema.json"
+PROFILES_DIR = Path(__file__).parent.parent / "data" / "profiles"
+
+
+@lru_cache(maxsize=None)
+def compiled_validator(schema_path=SCHEMA_PATH):
+    """Load the schema, check it once and return a reusable validator for it."""
+    with open(schema_path, "r") as f:
+        schema = json.load(f)
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
+def _error_entry(error):
+    return {
+        "path": "/".join(str(p) for p in error.absolute_path),
+        "message": error.message,
+        "validator": error.validator,
+    }
+
+
+def check_file(file_path, schema_path=SCHEMA_PATH):
+    """Validate one file and return a result dict listing every error found."""
+    result = {"file": str(file_path), "valid": False, "errors": []}
+    try:
+        data = read_yaml(file_path)
+    except yaml.YAMLError as e:
+        result["errors"].append({"path": "", "message": str(e), "validator": "yaml"})
+        return result
+    except OSError as e:
+        result["errors"].append({"path": "", "message": str(e), "validator": "io"})
+        return result
+
+    result["errors"] = profile_errors(data, schema_path)
+    result["valid"] = not result["errors"]
+    return result
+
+
+def profile_errors(data, schema_path=SCHEMA_PATH):
+    """Every schema error for already-loaded profile data, in document order."""
+    validator = compiled_validator(schema_path)
+    errors = sorted(validator.iter_errors(data), key=lambda e: list(e.absolute_path))
+    return [_error_entry(e) for e in errors]
+
 
 class ProfileValidator:
     """Validates YAML profiles against the JSON schema"""
 
-    def __init__(self):
+    def __init__(self, schema_path=SCHEMA_PATH, profiles_dir=PROFILES_DIR):
         """Initialize the validator with schema"""
-        # Load schema from file
-        schema_path = (
-            Path(__file__).parent.parent / "docs" / "schema" / "profile_schema.json"
-        )
-        with open(schema_path, "r") as f:
-            self.schema = json.load(f)
+        self.schema_path = Path(schema_path)
+        # Compiled once and shared by every file validated in this process
+        self.validator = compiled_validator(self.schema_path)
+        self.schema = self.validator.schema
 
         # Set up profiles directory
-        self.profiles_dir = Path(__file__).parent.parent / "data" / "profiles"
+        self.profiles_dir = Path(profiles_dir)
 
     def validate_file(self, file_path):
         """Validate a single YAML file against the schema"""
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
-
-            jsonschema.validate(instance=data, schema=self.schema)
-            logger.info(f"✅ {os.path.basename(file_path)} is valid")
-            return True
-        except yaml.YAMLError as e:
-            logger.error(
-                f"❌ YAML parsing error in {os.path.basename(file_path)}: {str(e)}"
-            )
-            return False
-        except jsonschema.exceptions.ValidationError as e:
-            logger.error(
-                f"❌ Schema validation error in {os.path.basename(file_path)}: {str(e)}"
+        result = check_file(file_path, self.schema_path)
+        self._log_result(result)
+        return result["valid"]
+
+    @staticmethod
+    def _log_result(result):
+        name = os.path.basename(result["file"])
+        if result["valid"]:
+            logger.info(f"✅ {name} is valid")
+            return
+        for error in result["errors"]:
+            location = f" at {error['path']}" if error["path"] else ""
+            logger.error(f"❌ {name}{location}: {error['message']}")
+
+    def profile_files(self):
+        """All profile files in the profiles directory, skipping extracted data"""
+        return sorted(
+            file_path
+            for file_path in self.profiles_dir.glob("*.yaml")
+            if "_extracted" not in file_path.name
+        )
+
+    def check_all(self, workers=1):
+        """Return a result for every profile, validating in parallel if asked"""
+        files = self.profile_files()
+        if workers <= 1 or len(files) < 2:
+            return [check_file(f, self.schema_path) for f in files]
+
+        # Each worker compiles the schema once; files are sent in batches
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(
+                executor.map(
+                    check_file,
+                    files,
+                    [self.schema_path] * len(files),
+                    chunksize=chunksize,
+                )
             )
-            return False
-        except Exception as e:
-            logger.error(f"❌ Error validating {os.path.basename(file_path)}: {str(e)}")
-            return False
 
-    def validate_all(self):
+    def validate_all(self, workers=1):
         """Validate all YAML files in the profiles directory"""
-        success_count = 0
-        failure_count = 0
-
-        for file_path in self.profiles_dir.glob("*.yaml"):
-            # Skip files with _extracted suffix
-            if "_extracted" in file_path.name:
-                continue
-
-            if self.validate_file(file_path):
-                success_count += 1
-            else:
-                failure_count += 1
+        results = self.check_all(workers)
+        for result in results:
+            self._log_result(result)
 
+        success_count = sum(1 for r in results if r["valid"])
+        failure_count = len(results) - success_count
         logger.info(
             f"\nValidation complete. {success_count} valid, {failure_count} invalid."
         )
@@ -85,6 +145,17 @@ def main():
     )
     parser.add_argument("--file", help="Validate a specific YAML file")
     parser.add_argument("--all", action="store_true", help="Validate all profiles")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes to validate with when using --all",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print every error per file as JSON instead of log messages",
+    )
 
     args = parser.parse_args()
     validator = ProfileValidator()
@@ -94,9 +165,26 @@ def main():
         if not file_path.exists():
             logger.error(f"File not found: {file_path}")
             return 1
-        validator.validate_file(file_path)
+        if args.json:
+            result = check_file(file_path, validator.schema_path)
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+            return 0 if result["valid"] else 1
+        if not validator.validate_file(file_path):
+            return 1
     elif args.all:
-        success_count, failure_count = validator.validate_all()
+        if args.json:
+            start = time.perf_counter()
+            results = validator.check_all(args.workers)
+            valid = sum(1 for r in results if r["valid"])
+            report = {
+                "valid": valid,
+                "invalid": len(results) - valid,
+                "seconds": round(time.perf_counter() - start, 3),
+                "results": results,
+            }
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+            return 0 if valid == len(results) else 1
+        success_count, failure_count = validator.validate_all(args.workers)
         if failure_count > 0:
             return 1
     else:
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Watch data/profiles and reprocess each profile as soon as it changes.
+
+Editors and the Gemini merge scripts write profiles continuously. Instead of
+rerunning `validate_profile.py --all` by hand, this keeps a watcher running and,
+for every changed profile only:
+
+- revalidates it against the schema and logs every error
+- refreshes its Gemini prompts, if extracted data is waiting to be merged
+- updates its completeness score in data/cache/completeness.json
+- re-indexes it in the SQLite profile store (src/store/profile_store.py)
+- updates its postings in the saved BM25 keyword index, if there is one
+  (src/matching/keyword_index.py)
+- records hand edits as a new revision in its history (src/store/version_store.py)
+
+Bursts of writes (e.g. an editor's save-and-rename, or a merge run touching
+many files) are debounced into one batch, and each profile is processed once
+per batch. More handlers can be added to ProfileWatcher.handlers.
+
+Usage:
+    python scripts/watch_profiles.py [--debounce 200]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.validate_profile import PROFILES_DIR, SCHEMA_PATH, profile_errors
+from src.matching.keyword_index import DEFAULT_INDEX_PATH, KeywordIndex
+from src.matching.live_index import LiveIndexes
+from src.processor.gemini_integration import write_gemini_prompts
+from src.processor.merge_engine import merge_profile
+from src.store.profile_store import ProfileStore
+from src.store.version_store import VersionStore
+from src.utils.completeness import load_schema, update_score
+from src.utils.profile_io import read_yaml
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+EXTRACTED_DIR = PROFILES_DIR.parent / "extracted"
+PROMPT_DIR = PROFILES_DIR.parent / "prompts"
+
+
+def is_profile_file(path):
+    path = Path(path)
+    return path.suffix == ".yaml" and "_extracted" not in path.name
+
+
+def validate(user_id, path, profile):
+    """Revalidate the profile, logging every schema error."""
+    if profile is None:
+        return "removed"
+    errors = profile_errors(profile, SCHEMA_PATH)
+    for error in errors:
+        location = f" at {error['path']}" if error["path"] else ""
+        logger.error(f"❌ {path.name}{location}: {error['message']}")
+    return "valid" if not errors else f"{len(errors)} schema errors"
+
+
+def refresh_prompts(user_id, path, profile):
+    """Rebuild the Gemini prompts from the edited profile and extracted data."""
+    extracted_path = EXTRACTED_DIR / f"{user_id}_extracted.yaml"
+    if profile is None or not extracted_path.exists():
+        return None
+    extracted = read_yaml(extracted_path) or {}
+    # Only prompts are rewritten here; writing the merged profile back would
+    # trigger the watcher again
+    prompts = write_gemini_prompts(
+        user_id, merge_profile(profile, extracted), PROMPT_DIR
+    )
+    return f"{len(prompts)} prompt(s)"
+
+
+class ProfileWatcher:
+    """Runs per-profile handlers for every changed profile file."""
+
+    def __init__(self, profiles_dir=PROFILES_DIR, handlers=None, debounce_ms=200):
+        self.profiles_dir = Path(profiles_dir)
+        self.debounce_ms = debounce_ms
+        self.schema = load_schema(SCHEMA_PATH)
+        self.store = None
+        self.versions = None
+        self.live = None
+        if handlers is None:
+            self.store = ProfileStore(profiles_dir=self.profiles_dir)
+            self.versions = VersionStore(profiles_dir=self.profiles_dir)
+            handlers = [
+                validate,
+                refresh_prompts,
+                self.score,
+                self.index,
+                self.update_keyword_index,
+                self.record_version,
+            ]
+        self.handlers = list(handlers)
+
+    def score(self, user_id, path, profile):
+        """Recompute the completeness score."""
+        score = update_score(user_id, profile, self.schema)
+        return None if score is None else f"{score:.0%} complete"
+
+    def index(self, user_id, path, profile):
+        """Update the profile's rows in the profile store."""
+        status = self.store.sync_file(path, profile)
+        return None if status == "unchanged" else f"store {status}"
+
+    def update_keyword_index(self, user_id, path, profile):
+        """Upsert the profile's postings into the saved keyword index."""
+        if not DEFAULT_INDEX_PATH.exists():
+            return None
+        if self.live is None:
+            self.live = LiveIndexes(keyword=KeywordIndex.load(DEFAULT_INDEX_PATH))
+        if not self.live.apply(user_id, profile):
+            return None
+        self.live.indexes["keyword"].save(DEFAULT_INDEX_PATH)
+        return "keyword index updated"
+
+    def record_version(self, user_id, path, profile):
+        """Keep the edited file as a revision (a no-op for scripted saves)."""
+        if profile is None:
+            return None
+        head = self.versions.head(user_id)
+        revision = self.versions.record(user_id, path.read_bytes(), "edited")
+        return None if revision == head else f"revision {revision[:12]}"
+
+    def process(self, path):
+        """Run every handler for one profile. Returns the handler summaries."""
+        path = Path(path)
+        user_id = path.stem
+        start = time.perf_counter()
+
+        profile = None
+        if path.exists():
+            try:
+                profile = read_yaml(path) or {}
+            except yaml.YAMLError as e:
+                logger.error(f"❌ YAML parsing error in {path.name}: {str(e)}")
+                return []
+
+        summaries = []
+        for handler in self.handlers:
+            try:
+                summary = handler(user_id, path, profile)
+            except Exception as e:
+                logger.error(f"❌ {handler.__name__} failed for {path.name}: {str(e)}")
+                continue
+            if summary:
+                summaries.append(summary)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"{path.name}: {', '.join(summaries)} ({elapsed:.0f} ms)")
+        return summaries
+
+    def handle_changes(self, changes):
+        """Process a debounced batch of (change, path) pairs, once per profile."""
+        paths = sorted({Path(p) for _, p in changes if is_profile_file(p)})
+        for path in paths:
+            self.process(path)
+        return paths
+
+    def run(self):
+        """Block, processing changes until interrupted."""
+        from watchfiles import watch
+
+        if self.store:
+            # Catch up on anything that changed while the watcher was not running
+            counts = self.store.sync()
+            logger.info(f"Profile store synced: {counts}")
+        logger.info(f"Watching {self.profiles_dir} for profile changes...")
+        for changes in watch(
+            self.profiles_dir,
+            debounce=self.debounce_ms,
+            watch_filter=lambda change, path: is_profile_file(path),
+        ):
+            self.handle_changes(changes)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Revalidate and reprocess profiles whenever they change"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=int,
+        default=200,
+        help="Milliseconds to wait for a burst of writes to settle",
+    )
+    args = parser.parse_args()
+
+    try:
+        ProfileWatcher(debounce_ms=args.debounce).run()
+    except KeyboardInterrupt:
+        logger.info("Stopped watching.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
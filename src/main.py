@@ -9,10 +9,6 @@ from pathlib import Path
 # Add project root to Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.scraper.scraper import Scraper
-from src.processor.processor import Processor
-from src.processor.parse_results import ParseResults
-
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -35,27 +31,78 @@ def main():
         help="Parse processed data into structured format",
     )
     parser.add_argument("--all", action="store_true", help="Run all steps")
+    parser.add_argument(
+        "--match", metavar="QUERY", help="Match a research query to supervisors"
+    )
+    parser.add_argument(
+        "--match-file",
+        metavar="FILE",
+        help="Match a CSV/JSONL file of student queries (see src/matching/batch.py)",
+    )
+    parser.add_argument(
+        "--output",
+        default="data/matches.csv",
+        help="Results file for --match-file (.csv or .jsonl)",
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=5, help="Number of matches per query"
+    )
 
     args = parser.parse_args()
 
+    # Each step imports its own dependencies, so matching works without the
+    # scraping stack installed
     if args.scrape or args.all:
+        from src.scraper.scraper import Scraper
+
         logger.info("Starting scraping process")
         scraper = Scraper()
         scraper.run()
 
     if args.process or args.all:
+        from src.processor.processor import Processor
+
         logger.info("Starting processing of scraped data")
         processor = Processor()
         processor.run()
 
     if args.parse or args.all:
+        from src.processor.parse_results import ParseResults
+
         logger.info("Starting parsing of processed data")
         parser = ParseResults()
         parser.run()
 
-    if not (args.scrape or args.process or args.parse or args.all):
+    if args.match:
+        from src.matching.engine import print_matches
+        from src.matching.result_cache import CachedMatcher
+
+        matcher = CachedMatcher.from_profiles_dir()
+        print_matches(args.match, matcher.match(args.match, args.top_k))
+
+    if args.match_file:
+        from src.matching.batch import match_batch, read_queries, write_results
+        from src.matching.engine import MatchingEngine
+
+        try:
+            queries = read_queries(args.match_file)
+        except (OSError, ValueError) as e:
+            print(f"❌ Error: {e}")
+            return 1
+        engine = MatchingEngine.from_profiles_dir()
+        count = write_results(args.output, match_batch(engine, queries, args.top_k))
+        logger.info(f"Wrote matches for {count} students to {args.output}")
+
+    if not (
+        args.scrape
+        or args.process
+        or args.parse
+        or args.all
+        or args.match
+        or args.match_file
+    ):
         parser.print_help()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,381 @@
+"""
+Approximate nearest-neighbor search over interest- and publication-level
+vectors.
+
+docs/vector_strategy.md embeds every research interest, expertise area and
+publication title separately. That is hundreds of thousands of vectors at
+university scale, too many to scan exhaustively per query. HNSWIndex is a
+Hierarchical Navigable Small World graph (Malkov & Yashunin): each vector is
+linked to its M nearest diverse neighbors on a random number of layers, and a
+query greedily descends the sparse upper layers before a best-first search
+with a candidate list of size ef on the dense bottom layer. Larger M and ef
+raise recall at the cost of build time and latency.
+
+The graph is built and searched in pure Python, so it is slower than
+MatchingEngine's exact scan (one matrix product) until an index holds about
+10,000 vectors; see docs/guides/data_access.md for the measurements.
+
+ItemIndex indexes the individual items of each profile and maps the nearest
+items back to their supervisors, scoring each supervisor by its best item.
+
+The vectors themselves live in a store from src.matching.quantization, so the
+graph can be built over float16, int8 or product-quantized vectors; the
+distances to a query are then computed on the compressed rows.
+
+Vectors are removed by marking them deleted: they stay in the graph, so it
+remains navigable, but are never returned. ItemIndex.upsert() deletes a
+supervisor's old items and inserts the new ones, and compact() rebuilds the
+graph from the live vectors once enough have been deleted.
+
+Usage:
+    python -m src.matching.ann_index "speech recognition" [--top-k 5] [--ef 64]
+"""
+
+import argparse
+import heapq
+import math
+import sys
+import time
+
+import numpy as np
+
+from src.matching.embedder import get_embedder
+from src.matching.engine import FIELD_WEIGHTS, Match, collect_items, print_matches
+from src.matching.quantization import STORAGES, make_storage
+from src.utils.profile_io import PROFILES_DIR, load_profiles
+
+
+class HNSWIndex:
+    """HNSW graph over L2-normalized vectors, using cosine distance."""
+
+    def __init__(
+        self,
+        dim,
+        M=16,
+        ef_construction=100,
+        ef_search=64,
+        expand_width=4,
+        seed=0,
+        storage="float32",
+    ):
+        self.dim = dim
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.expand_width = expand_width
+        self.level_scale = 1 / math.log(M)
+        self.rng = np.random.default_rng(seed)
+        # A storage kind, or a ready (e.g. pre-trained PQ) store
+        self.vectors = (
+            make_storage(storage, dim) if isinstance(storage, str) else storage
+        )
+        self.links = []  # links[node][layer] -> list of neighbor nodes
+        self.entry_point = None
+        self.max_level = -1
+        self.deleted = set()
+        self.params = {
+            "M": M,
+            "ef_construction": ef_construction,
+            "ef_search": ef_search,
+            "expand_width": expand_width,
+            "seed": seed,
+        }
+
+    def __len__(self):
+        return len(self.links)
+
+    def _max_links(self, layer):
+        # The bottom layer holds every node and is twice as dense
+        return 2 * self.M if layer == 0 else self.M
+
+    def _distances(self, query, nodes):
+        return 1 - self.vectors.dot(nodes, query)
+
+    def _search_layer(self, query, entries, ef, layer):
+        """
+        Best-first search of one layer; returns [(distance, node)] ascending.
+        query is prepared by the vector store (see VectorStorage.prepare).
+        """
+        visited = set(entries)
+        distances = self._distances(query, entries).tolist()
+        candidates = list(zip(distances, entries))
+        heapq.heapify(candidates)
+        results = [(-d, n) for d, n in candidates]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            # Expand the few closest candidates together, so their neighbors'
+            # distances come from one matrix product instead of one per node
+            bound = -results[0][0]
+            neighbors = []
+            for _ in range(self.expand_width):
+                if not candidates or candidates[0][0] > bound:
+                    break
+                node = heapq.heappop(candidates)[1]
+                neighbors.extend(self.links[node][layer])
+            if not neighbors:
+                break
+            neighbors = [n for n in dict.fromkeys(neighbors) if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            distances = self._distances(query, neighbors)
+            if len(results) >= ef:
+                # Most neighbors of a converged search are farther than the
+                # current results; drop them before the Python loop
+                close = np.flatnonzero(distances < bound)
+                neighbors = [neighbors[i] for i in close.tolist()]
+                distances = distances[close]
+            for n, d in zip(neighbors, distances.tolist()):
+                if d < bound or len(results) < ef:
+                    heapq.heappush(candidates, (d, n))
+                    heapq.heappush(results, (-d, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+                    bound = -results[0][0]
+        return sorted((-d, n) for d, n in results)
+
+    def _select_neighbors(self, candidates, m):
+        """
+        Pick up to m of [(distance, node)] (ascending), preferring candidates
+        closer to the base than to any already selected one, so links spread
+        across clusters instead of all pointing into the nearest one.
+        """
+        if len(candidates) <= m:
+            return [n for _, n in candidates]
+        nodes = [n for _, n in candidates]
+        vectors = self.vectors.vectors(nodes)
+        pairwise = 1 - vectors @ vectors.T
+        selected, skipped = [], []
+        for i, (distance, _) in enumerate(candidates):
+            if all(pairwise[i, j] > distance for j in selected):
+                selected.append(i)
+                if len(selected) == m:
+                    break
+            else:
+                skipped.append(i)
+        # Fill up with the nearest skipped candidates
+        selected.extend(skipped[: m - len(selected)])
+        return [nodes[i] for i in selected]
+
+    def add(self, vectors):
+        """Insert vectors (rows); returns the ids assigned to them."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        ids = self.vectors.add(vectors)
+        for vector in vectors:
+            self._insert(self.vectors.prepare(vector))
+        return ids
+
+    def _insert(self, vector):
+        # vector is the new node's own prepared query; it is already stored
+        node = len(self.links)
+        level = int(-math.log(1 - self.rng.random()) * self.level_scale)
+        self.links.append([[] for _ in range(level + 1)])
+
+        if self.entry_point is None:
+            self.entry_point, self.max_level = node, level
+            return
+
+        entries = [self.entry_point]
+        for layer in range(self.max_level, level, -1):
+            entries = [self._search_layer(vector, entries, 1, layer)[0][1]]
+
+        for layer in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(vector, entries, self.ef_construction, layer)
+            neighbors = self._select_neighbors(found, self.M)
+            self.links[node][layer] = neighbors
+            for neighbor in neighbors:
+                links = self.links[neighbor][layer]
+                links.append(node)
+                if len(links) > self._max_links(layer):
+                    # Drop the farthest link; cheaper than re-running the
+                    # diversity heuristic on every overflow
+                    own = self.vectors.prepare(self.vectors.vectors([neighbor])[0])
+                    distances = self._distances(own, links)
+                    links.pop(int(np.argmax(distances)))
+            entries = [n for _, n in found]
+
+        if level > self.max_level:
+            self.entry_point, self.max_level = node, level
+
+    def search(self, query, k=10, ef=None):
+        """(ids, cosine similarities) of the approximate k nearest vectors."""
+        if self.entry_point is None:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32)
+        query = self.vectors.prepare(query)
+        entries = [self.entry_point]
+        for layer in range(self.max_level, 0, -1):
+            entries = [self._search_layer(query, entries, 1, layer)[0][1]]
+        ef = max(ef or self.ef_search, k)
+        if self.deleted:
+            # Deleted nodes still take up places in the candidate list
+            ef += min(len(self.deleted), ef)
+        found = self._search_layer(query, entries, ef, 0)
+        found = [(d, n) for d, n in found if n not in self.deleted][:k]
+        ids = np.asarray([n for _, n in found], dtype=np.intp)
+        return ids, 1 - np.asarray([d for d, _ in found], dtype=np.float32)
+
+    def delete(self, ids):
+        """Mark vectors deleted; they are skipped by search from now on."""
+        self.deleted.update(ids)
+
+    def compacted(self):
+        """
+        (index, ids): a new index built from the vectors that are not deleted,
+        and their ids in this one (new id i was ids[i]).
+        """
+        ids = np.asarray(
+            [n for n in range(len(self.links)) if n not in self.deleted], np.intp
+        )
+        # An empty store of the same kind, with any trained codebooks
+        index = HNSWIndex(self.dim, storage=self.vectors.compacted([]), **self.params)
+        if len(ids):
+            index.add(self.vectors.vectors(ids))
+        return index, ids
+
+
+class ItemIndex:
+    """Per-item vectors of every profile, searched with HNSW."""
+
+    def __init__(self, embedder=None, fields=None, **hnsw_params):
+        self.embedder = embedder or get_embedder()
+        self.fields = list(fields or FIELD_WEIGHTS)
+        self.hnsw_params = hnsw_params
+        self.hnsw = None
+        self.user_ids = []
+        self.names = []
+        self.departments = []
+        self.owners = np.zeros(0, dtype=np.intp)
+        self.texts = []
+        self.items = {}  # user_id -> ids of its live items
+        self._rows = {}  # user_id -> index into user_ids
+
+    @classmethod
+    def from_profiles_dir(cls, profiles_dir=PROFILES_DIR, **kwargs):
+        return cls(**kwargs).build(load_profiles(profiles_dir))
+
+    def build(self, profiles):
+        self.user_ids = sorted(profiles)
+        self.names = [profiles[u].get("name") or u for u in self.user_ids]
+        self.departments = [profiles[u].get("department") or "" for u in self.user_ids]
+
+        texts, self.owners, _ = collect_items(profiles, self.user_ids, self.fields)
+        self.texts = texts
+        self._rows = {user_id: row for row, user_id in enumerate(self.user_ids)}
+        self.items = {user_id: [] for user_id in self.user_ids}
+        for item, row in enumerate(self.owners.tolist()):
+            self.items[self.user_ids[row]].append(item)
+
+        self.embedder.fit(texts)
+        vectors = self.embedder.embed(texts) if texts else None
+        # Model embedders only know their dimension after the first call
+        self.hnsw = HNSWIndex(self.embedder.dim, **self.hnsw_params)
+        if texts:
+            self.hnsw.add(vectors)
+        return self
+
+    def upsert(self, user_id, profile):
+        """Replace a supervisor's items with those of a new profile version."""
+        self.delete(user_id)
+        row = self._rows.get(user_id)
+        if row is None:
+            row = self._rows[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+            self.names.append(None)
+            self.departments.append(None)
+        self.names[row] = profile.get("name") or user_id
+        self.departments[row] = profile.get("department") or ""
+
+        texts, _, _ = collect_items({user_id: profile}, [user_id], self.fields)
+        if not texts:
+            return
+        ids = self.hnsw.add(self.embedder.embed(texts))
+        self.owners = np.append(self.owners, np.full(len(ids), row, dtype=np.intp))
+        self.texts.extend(texts)
+        self.items[user_id] = ids
+
+    def delete(self, user_id):
+        """Delete a supervisor's items from the graph."""
+        self.hnsw.delete(self.items.pop(user_id, []))
+
+    @property
+    def tombstones(self):
+        return len(self.hnsw.deleted)
+
+    @property
+    def tombstone_ratio(self):
+        total = len(self.hnsw)
+        return self.tombstones / total if total else 0.0
+
+    def compact(self):
+        """Rebuild the graph without deleted items."""
+        if not self.tombstones:
+            return
+        hnsw, ids = self.hnsw.compacted()
+        new_ids = np.full(len(self.texts), -1, dtype=np.intp)
+        new_ids[ids] = np.arange(len(ids))
+        owners = self.owners[ids]
+        texts = [self.texts[i] for i in ids.tolist()]
+        items = {user_id: new_ids[old].tolist() for user_id, old in self.items.items()}
+        self.hnsw, self.owners, self.texts, self.items = hnsw, owners, texts, items
+
+    def search(self, query, k=10, ef=None, items_per_match=4):
+        """
+        The k supervisors owning the items nearest to a query, scored by their
+        best item, which is returned as the match's evidence.
+
+        Starts from k * items_per_match items and widens the search until they
+        belong to k supervisors, since one supervisor can own many of them.
+        """
+        vector = self.embedder.embed([query])[0]
+        live = len(self.hnsw) - self.tombstones
+        count = k * items_per_match
+        while True:
+            ids, similarities = self.hnsw.search(vector, count, ef)
+            matches = {}
+            for item, similarity in zip(ids.tolist(), similarities.tolist()):
+                row = int(self.owners[item])
+                if row not in matches and similarity > 0:
+                    matches[row] = Match(
+                        self.user_ids[row],
+                        self.names[row],
+                        self.departments[row],
+                        similarity,
+                        evidence=self.texts[item],
+                    )
+            # Done once there are k, or nothing further could be a match
+            exhausted = count >= live or len(ids) < count
+            if len(matches) >= k or exhausted or similarities[-1] <= 0:
+                return list(matches.values())[:k]
+            count *= 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Approximate item-level matching")
+    parser.add_argument("query", help="Research interests to match")
+    parser.add_argument("--top-k", type=int, default=5, help="Number of matches")
+    parser.add_argument("--ef", type=int, default=64, help="Search candidate list size")
+    parser.add_argument("--M", type=int, default=16, help="Links per node")
+    parser.add_argument(
+        "--storage", default="float32", choices=STORAGES, help="Vector encoding"
+    )
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = ItemIndex.from_profiles_dir(M=args.M, storage=args.storage)
+    built = time.perf_counter()
+    matches = index.search(args.query, args.top_k, args.ef)
+    done = time.perf_counter()
+
+    print_matches(args.query, matches)
+    print(
+        f"Indexed {len(index.texts)} items in {(built - start) * 1000:.0f} ms, "
+        f"searched in {(done - built) * 1000:.2f} ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
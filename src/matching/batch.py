@@ -0,0 +1,153 @@
+"""
+Batch matching of many student queries against every supervisor.
+
+Each intake brings hundreds of research statements to match. Queries are read
+from a CSV file (with a header) or from JSON Lines, each with an id column
+(ID_KEYS) and a text column (QUERY_KEYS). They are processed in chunks: each
+chunk's texts are embedded in one batched call and scored against the
+supervisor matrix with a single matrix product (MatchingEngine.match_many),
+and the top k per student are written out as each chunk finishes.
+
+The output format follows the file extension: CSV gets one row per
+(student, rank), JSON Lines one object per student with its matches.
+
+Usage:
+    python -m src.matching.batch applicants.csv -o matches.csv [--top-k 5]
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+from src.matching.embedder import get_embedder
+from src.matching.engine import MatchingEngine
+
+# Accepted column names, in order of preference
+ID_KEYS = ("student_id", "id", "name", "email")
+QUERY_KEYS = ("query", "research_statement", "research_interests", "interests", "text")
+
+CHUNK_SIZE = 1024
+
+CSV_FIELDS = ["student_id", "rank", "user_id", "name", "department", "score"]
+
+
+def _pick(record, keys):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def read_queries(path):
+    """[(student id, query text)] from a CSV or JSON Lines file."""
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = list(csv.DictReader(f))
+
+    queries = []
+    for number, record in enumerate(records, 1):
+        text = _pick(record, QUERY_KEYS)
+        if isinstance(text, list):
+            text = ", ".join(str(item) for item in text)
+        if not text or not str(text).strip():
+            raise ValueError(
+                f"{path}: record {number} has none of the query fields "
+                f"{', '.join(QUERY_KEYS)}"
+            )
+        student_id = _pick(record, ID_KEYS)
+        queries.append((str(student_id or number), str(text).strip()))
+    return queries
+
+
+def match_batch(engine, queries, k=5, chunk_size=CHUNK_SIZE):
+    """Yield (student id, matches) for [(student id, query)], chunk by chunk."""
+    for start in range(0, len(queries), chunk_size):
+        chunk = queries[start : start + chunk_size]
+        results = engine.match_many([text for _, text in chunk], k)
+        for (student_id, _), matches in zip(chunk, results):
+            yield student_id, matches
+
+
+def write_results(path, results):
+    """Write (student id, matches) pairs; returns the number of students."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for student_id, matches in results:
+                record = {
+                    "student_id": student_id,
+                    "matches": [
+                        {
+                            "user_id": m.user_id,
+                            "name": m.name,
+                            "department": m.department,
+                            "score": round(m.score, 4),
+                        }
+                        for m in matches
+                    ],
+                }
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        else:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for student_id, matches in results:
+                writer.writerows(
+                    {
+                        "student_id": student_id,
+                        "rank": rank,
+                        "user_id": m.user_id,
+                        "name": m.name,
+                        "department": m.department,
+                        "score": f"{m.score:.4f}",
+                    }
+                    for rank, m in enumerate(matches, 1)
+                )
+                count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match many student queries")
+    parser.add_argument("queries", help="CSV or JSONL file of student queries")
+    parser.add_argument(
+        "-o", "--output", required=True, help="Results file (.csv or .jsonl)"
+    )
+    parser.add_argument("--top-k", type=int, default=5, help="Matches per student")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--embedder", help="Embedder name (default MATCH_EMBEDDER)")
+    args = parser.parse_args(argv)
+
+    try:
+        queries = read_queries(args.queries)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+    start = time.perf_counter()
+    engine = MatchingEngine.from_profiles_dir(embedder=get_embedder(args.embedder))
+    built = time.perf_counter()
+    count = write_results(
+        args.output, match_batch(engine, queries, args.top_k, args.chunk_size)
+    )
+    done = time.perf_counter()
+
+    print(
+        f"✅ Matched {count} students against {len(engine.user_ids)} supervisors "
+        f"in {done - built:.2f} s (index built in {built - start:.2f} s) "
+        f"-> {args.output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,518 @@
+"""
+Co-authorship graph of the supervisors, built from their publication lists.
+
+Supervisors who publish together tend to share research interests, and the
+profiles show it: a paper by Hema and Siti Hafizah is listed in both of their
+profiles. A publication is identified by its DOI, or by its normalized title
+when it has none. Its authors are the supervisors who list it, plus any
+other supervisor whose full name appears in its author strings. Following
+Newman's co-authorship weighting, a publication with n supervisor authors adds
+1 / (n - 1) to the edge between each pair of them.
+
+The edges are kept in a symmetric sparse adjacency matrix in CSR form
+(indptr, indices, weights, counts). Each row is sorted by weight, so a
+supervisor's row is its precomputed neighbor list, strongest first. The first
+query after a change brings the arrays up to date: only the changed rows are
+rebuilt and spliced in, unless supervisors were added or removed.
+
+related() walks k hops from a supervisor. It propagates a random walk over
+the row-normalized matrix, one sparse product per hop, with each further hop
+damped by DECAY. rerank() boosts matcher results whose authors co-author with
+other strong candidates. upsert()/delete() update one profile without a
+rebuild, so the graph can be kept live by LiveIndexes.
+
+Usage:
+    python -m src.matching.coauthor_graph hema [--hops 2] [--top-k 10]
+    python -m src.matching.coauthor_graph --match "software testing" [--top-k 5]
+"""
+
+import argparse
+import re
+import sys
+import time
+from collections import defaultdict
+from dataclasses import replace
+from itertools import chain, combinations
+
+import numpy as np
+
+from src.matching.engine import Match, MatchingEngine, print_matches
+from src.utils.profile_io import PROFILES_DIR, load_profiles
+
+PUBLICATION_FIELDS = ("publications", "conference_publications")
+
+# Name tokens that do not identify a person
+HONORIFICS = {
+    "ap",
+    "assoc",
+    "associate",
+    "prof",
+    "professor",
+    "dr",
+    "ts",
+    "ir",
+    "mr",
+    "mrs",
+    "ms",
+    "madam",
+    "dato",
+    "datuk",
+    "datin",
+    "sri",
+    "emeritus",
+    "bin",
+    "binti",
+    "bt",
+}
+
+# Titles shorter than this are too generic to identify a publication
+MIN_TITLE_TOKENS = 3
+
+# Damping of each further hop in related()
+DECAY = 0.5
+
+# Weight of the co-author boost in rerank(), relative to the match score
+GRAPH_BOOST = 0.2
+
+
+def tokens(text):
+    return re.findall(r"[^\W_]+", str(text).lower())
+
+
+def publication_key(publication):
+    """DOI or normalized title identifying a publication, or None."""
+    doi = str(publication.get("doi") or "").strip().lower()
+    if doi:
+        return "doi:" + doi.removeprefix("https://doi.org/")
+    words = tokens(publication.get("title") or "")
+    if len(words) < MIN_TITLE_TOKENS:
+        return None
+    return "title:" + " ".join(words)
+
+
+def publication_authors(profile):
+    """{publication key: author tokens} of a profile's publications."""
+    publications = {}
+    for field in PUBLICATION_FIELDS:
+        for publication in profile.get(field) or []:
+            if not isinstance(publication, dict):
+                continue
+            key = publication_key(publication)
+            if key is None:
+                continue
+            authors = publication.get("authors") or ""
+            if isinstance(authors, list):
+                authors = " ".join(str(a) for a in authors)
+            publications.setdefault(key, set()).update(tokens(authors))
+    return {key: frozenset(words) for key, words in publications.items()}
+
+
+def name_variants(name):
+    """
+    Token sets that identify a supervisor's name in author strings: the name
+    without honorifics or initials, with any adjacent tokens run together
+    ("Ong Sim Ying" also matches "Ong, Simying").
+    """
+    words = [w for w in tokens(name) if w not in HONORIFICS and len(w) > 1]
+    if len(words) < 2:
+        return []
+    variants = set()
+    for joins in range(1 << (len(words) - 1)):
+        merged = [words[0]]
+        for i, word in enumerate(words[1:]):
+            if joins >> i & 1:
+                merged[-1] += word
+            else:
+                merged.append(word)
+        if len(merged) >= 2:
+            variants.add(frozenset(merged))
+    return sorted(variants, key=sorted)
+
+
+def anchor(variant):
+    """
+    The token a name variant is indexed under: its longest, which is usually
+    the least common, since a match needs every token anyway.
+    """
+    return max(variant, key=lambda w: (len(w), w))
+
+
+def row_entries(indptr, rows):
+    """Positions of the entries of some CSR rows, and the rows' lengths."""
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return np.arange(lengths.sum()) + offsets, lengths
+
+
+class CoauthorGraph:
+    """Weighted co-authorship graph over supervisors, stored as CSR."""
+
+    def __init__(self, decay=DECAY, boost=GRAPH_BOOST):
+        self.decay = decay
+        self.boost = boost
+        self.names = {}
+        self.departments = {}
+        self._reset()
+
+    def _reset(self):
+        self.names.clear()
+        self.departments.clear()
+        self.edges = defaultdict(dict)  # user -> {co-author: [weight, count]}
+        self._authors = defaultdict(dict)  # publication -> {owner: tokens}
+        self._tokens = {}  # publication -> union of its author tokens
+        self._publications_by_token = defaultdict(set)
+        self._owned = {}  # user -> publications it lists
+        self._variants = {}  # user -> name variants
+        self._variants_by_token = defaultdict(set)  # anchor -> {(user, variant)}
+        self._members = {}  # publication -> its supervisor authors
+        self._memberships = defaultdict(set)  # user -> its publications
+        self._csr = None
+        self._dirty = set()  # users whose CSR row is out of date
+
+    @classmethod
+    def from_profiles_dir(cls, profiles_dir=PROFILES_DIR, **kwargs):
+        return cls(**kwargs).build(load_profiles(profiles_dir))
+
+    def build(self, profiles):
+        self._reset()
+        for user_id in sorted(profiles):
+            self._register(user_id, profiles[user_id])
+        self._relink(list(self._tokens))
+        return self
+
+    # Updates
+
+    def _mentioned(self, publication):
+        """Supervisors whose name appears in a publication's author strings."""
+        words = self._tokens[publication]
+        return {
+            user_id
+            for word in words
+            for user_id, variant in self._variants_by_token.get(word, ())
+            if variant <= words
+        }
+
+    def _mentioning(self, variants):
+        """Publications whose author strings contain any of the variants."""
+        found = set()
+        for variant in variants:
+            postings = [self._publications_by_token.get(w, set()) for w in variant]
+            found |= set.intersection(*postings)
+        return found
+
+    def _link(self, publication, sign):
+        """Add (sign 1) or remove (-1) a publication's edges."""
+        members = sorted(self._members.get(publication, ()))
+        if len(members) < 2:
+            return
+        self._dirty.update(members)
+        weight = sign / (len(members) - 1)
+        for a, b in combinations(members, 2):
+            for u, v in ((a, b), (b, a)):
+                edge = self.edges[u].setdefault(v, [0.0, 0])
+                edge[0] += weight
+                edge[1] += sign
+                if edge[1] == 0:
+                    del self.edges[u][v]
+                    if not self.edges[u]:
+                        del self.edges[u]
+
+    def _set_tokens(self, publication):
+        old = self._tokens.pop(publication, frozenset())
+        owners = self._authors.get(publication)
+        new = frozenset().union(*owners.values()) if owners else frozenset()
+        for word in old - new:
+            self._publications_by_token[word].discard(publication)
+            if not self._publications_by_token[word]:
+                del self._publications_by_token[word]
+        for word in new - old:
+            self._publications_by_token[word].add(publication)
+        if owners:
+            self._tokens[publication] = new
+        else:
+            self._authors.pop(publication, None)
+
+    def _register(self, user_id, profile):
+        """Replace a supervisor's publications and name, without linking."""
+        if (user_id in self.names) != bool(profile):
+            self._csr = None  # the set of rows changes
+        for publication in self._owned.pop(user_id, ()):
+            del self._authors[publication][user_id]
+            self._set_tokens(publication)
+        for variant in self._variants.pop(user_id, ()):
+            self._variants_by_token[anchor(variant)].discard((user_id, variant))
+        if not profile:
+            self.names.pop(user_id, None)
+            self.departments.pop(user_id, None)
+            return
+        publications = publication_authors(profile)
+        for publication, words in publications.items():
+            self._authors[publication][user_id] = words
+            self._set_tokens(publication)
+        self._owned[user_id] = set(publications)
+        self._variants[user_id] = name_variants(profile.get("name") or "")
+        for variant in self._variants[user_id]:
+            self._variants_by_token[anchor(variant)].add((user_id, variant))
+        self.names[user_id] = profile.get("name") or user_id
+        self.departments[user_id] = profile.get("department") or ""
+
+    def _relink(self, publications):
+        """Recompute the authors of publications and add their edges."""
+        for publication in publications:
+            old = self._members.pop(publication, set())
+            new = set()
+            if publication in self._tokens:
+                new = set(self._authors[publication]) | self._mentioned(publication)
+                self._members[publication] = new
+            for member in old - new:
+                self._memberships[member].discard(publication)
+                if not self._memberships[member]:
+                    del self._memberships[member]
+            for member in new - old:
+                self._memberships[member].add(publication)
+            self._link(publication, 1)
+
+    def upsert(self, user_id, profile):
+        """Add or replace one supervisor's publications and name."""
+        affected = self._memberships.get(user_id, set()) | self._owned.get(
+            user_id, set()
+        )
+        if profile:
+            affected |= publication_authors(profile).keys()
+            affected |= self._mentioning(name_variants(profile.get("name") or ""))
+        for publication in affected:
+            self._link(publication, -1)
+        self._register(user_id, profile)
+        self._relink(affected)
+
+    def delete(self, user_id):
+        self.upsert(user_id, None)
+
+    # LiveIndexes protocol: updates are applied in place, nothing to compact
+    tombstones = 0
+    tombstone_ratio = 0.0
+
+    def compact(self):
+        pass
+
+    # CSR form
+
+    @property
+    def csr(self):
+        """(user_ids, indptr, indices, weights, counts), rows by weight."""
+        return self._compile()
+
+    def _entries(self, user_id):
+        """(columns, weights, counts) of a supervisor's row, by weight."""
+        edges = sorted(
+            self.edges.get(user_id, {}).items(), key=lambda e: (-e[1][0], e[0])
+        )
+        return (
+            [self._rows[v] for v, _ in edges],
+            [w for _, (w, _) in edges],
+            [c for _, (_, c) in edges],
+        )
+
+    def _compile(self):
+        """
+        Bring the CSR arrays up to date: rebuilt when supervisors were added
+        or removed, otherwise only the changed rows are replaced.
+        """
+        if self._csr is None:
+            user_ids = sorted(self.names)
+            self._rows = {user_id: i for i, user_id in enumerate(user_ids)}
+            rows = [self._entries(user_id) for user_id in user_ids]
+            indptr = np.zeros(len(user_ids) + 1, dtype=np.int64)
+            np.cumsum([len(columns) for columns, _, _ in rows], out=indptr[1:])
+            arrays = [
+                np.fromiter(
+                    chain.from_iterable(row[field] for row in rows),
+                    dtype=dtype,
+                    count=indptr[-1],
+                )
+                for field, dtype in enumerate((np.int64, np.float64, np.int64))
+            ]
+            self._set_csr(user_ids, indptr, *arrays)
+        elif self._dirty:
+            self._patch_rows(sorted(self._rows[u] for u in self._dirty))
+        self._dirty.clear()
+        return self._csr
+
+    def _patch_rows(self, changed):
+        """Splice new entries for the changed rows into the CSR arrays."""
+        user_ids, indptr, *arrays = self._csr
+        rows = {row: self._entries(user_ids[row]) for row in changed}
+        lengths = np.diff(indptr)
+        lengths[changed] = [len(rows[row][0]) for row in changed]
+        new_indptr = np.zeros_like(indptr)
+        np.cumsum(lengths, out=new_indptr[1:])
+
+        # Unchanged rows keep their entries, shifted to their new offsets
+        entry_rows = self._transitions[0]
+        kept = np.ones(len(user_ids), dtype=bool)
+        kept[changed] = False
+        kept = np.flatnonzero(kept[entry_rows])
+        moved = new_indptr[entry_rows[kept]] + kept - indptr[entry_rows[kept]]
+        patched = []
+        for field, old in enumerate(arrays):
+            new = np.empty(new_indptr[-1], dtype=old.dtype)
+            new[moved] = old[kept]
+            for row in changed:
+                new[new_indptr[row] : new_indptr[row + 1]] = rows[row][field]
+            patched.append(new)
+        self._set_csr(user_ids, new_indptr, *patched)
+
+    def _set_csr(self, user_ids, indptr, indices, weights, counts):
+        # Row of each entry, and its weight normalized by the row total
+        entry_rows = np.repeat(np.arange(len(user_ids)), np.diff(indptr))
+        totals = np.bincount(entry_rows, weights, minlength=len(user_ids))
+        self._transitions = (entry_rows, weights / totals[entry_rows])
+        self._csr = (user_ids, indptr, indices, weights, counts)
+
+    @property
+    def user_ids(self):
+        return self.csr[0]
+
+    def row(self, user_id):
+        """Row of a supervisor in the CSR arrays."""
+        self._compile()
+        return self._rows[user_id]
+
+    def neighbors(self, user_id, k=None):
+        """[(co-author, weight, shared publications)], strongest first."""
+        user_ids, indptr, indices, weights, counts = self.csr
+        row = self.row(user_id)
+        start, end = indptr[row], indptr[row + 1]
+        if k is not None:
+            end = min(end, start + k)
+        entries = slice(start, end)
+        return [
+            (user_ids[i], float(w), int(c))
+            for i, w, c in zip(indices[entries], weights[entries], counts[entries])
+        ]
+
+    def related(self, user_id, hops=2, k=10):
+        """
+        Supervisors within `hops` co-authorship steps, by random-walk
+        proximity (each further hop damped by decay), best first.
+        """
+        user_ids, indptr, indices, _, counts = self.csr
+        start = self.row(user_id)
+        probabilities = self._transitions[1]
+        score = np.zeros(len(user_ids))
+        distance = np.zeros(len(user_ids), dtype=np.int64)
+        # Only the rows the walk has reached are expanded at each hop
+        frontier, mass = np.array([start]), np.array([1.0])
+        for hop in range(1, hops + 1):
+            entries, lengths = row_entries(indptr, frontier)
+            visit = np.bincount(
+                indices[entries],
+                probabilities[entries] * np.repeat(mass, lengths),
+                minlength=len(user_ids),
+            )
+            frontier = np.flatnonzero(visit)
+            mass = visit[frontier]
+            distance[frontier[distance[frontier] == 0]] = hop
+            score[frontier] += self.decay ** (hop - 1) * mass
+        score[start] = 0
+        found = np.flatnonzero(score)
+        top = found[np.argsort(-score[found], kind="stable")][:k]
+
+        shared = dict(
+            zip(
+                indices[indptr[start] : indptr[start + 1]].tolist(),
+                counts[indptr[start] : indptr[start + 1]].tolist(),
+            )
+        )
+        return [
+            Match(
+                user_ids[i],
+                self.names[user_ids[i]],
+                self.departments[user_ids[i]],
+                float(score[i]),
+                evidence=(
+                    f"{shared[i]} shared publications"
+                    if i in shared
+                    else f"{distance[i]} hops"
+                ),
+            )
+            for i in top.tolist()
+        ]
+
+    def rerank(self, matches, k=None, boost=None):
+        """
+        Re-rank matches, adding boost * (the transition-weighted scores of
+        each supervisor's co-authors among the matches) to its score.
+        """
+        boost = self.boost if boost is None else boost
+        user_ids, indptr, indices, _, _ = self.csr
+        if not matches or not len(indices):
+            return list(matches)[:k]
+        _, probabilities = self._transitions
+        score_of = np.zeros(len(user_ids))
+        rows = [self._rows.get(match.user_id, -1) for match in matches]
+        for match, row in zip(matches, rows):
+            if row >= 0:
+                score_of[row] = match.score
+        reranked = []
+        for match, row in zip(matches, rows):
+            extra = 0.0
+            if row >= 0:
+                entries = slice(indptr[row], indptr[row + 1])
+                extra = boost * float(
+                    probabilities[entries] @ score_of[indices[entries]]
+                )
+            fields = {"match": match.score, "coauthors": extra} if extra else None
+            reranked.append(replace(match, score=match.score + extra, fields=fields))
+        reranked.sort(key=lambda m: -m.score)
+        return reranked[:k]
+
+    def memory_bytes(self):
+        _, indptr, indices, weights, counts = self.csr
+        return indptr.nbytes + indices.nbytes + weights.nbytes + counts.nbytes
+
+
+def match_with_coauthors(engine, graph, query, k=10, department=None, candidates=50):
+    """Engine matches for a query, re-ranked with the co-author boost."""
+    return graph.rerank(engine.match(query, max(k, candidates), department), k)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Co-authorship graph queries")
+    parser.add_argument("user_id", nargs="?", help="Supervisor to find relations of")
+    parser.add_argument("--hops", type=int, default=2, help="Co-authorship steps")
+    parser.add_argument("--match", help="Query to match with the co-author boost")
+    parser.add_argument("--top-k", type=int, default=10, help="Number of results")
+    args = parser.parse_args(argv)
+    if not args.user_id and not args.match:
+        parser.error("give a user id or --match QUERY")
+
+    start = time.perf_counter()
+    profiles = load_profiles(PROFILES_DIR)
+    graph = CoauthorGraph().build(profiles)
+    built = time.perf_counter()
+    edges = len(graph.csr[2]) // 2
+    print(
+        f"Graph of {len(graph.user_ids)} supervisors and {edges} co-author links "
+        f"built in {(built - start) * 1000:.1f} ms"
+    )
+
+    if args.user_id:
+        if args.user_id not in graph.names:
+            print(f"❌ Error: no supervisor {args.user_id}")
+            return 1
+        start = time.perf_counter()
+        related = graph.related(args.user_id, args.hops, args.top_k)
+        elapsed = (time.perf_counter() - start) * 1e6
+        print_matches(f"related to {args.user_id}", related)
+        print(f"Found in {elapsed:.0f} µs")
+    if args.match:
+        engine = MatchingEngine().build(profiles)
+        matches = match_with_coauthors(engine, graph, args.match, args.top_k)
+        print_matches(args.match, matches)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Text embedders for the matching engine.
+
+An embedder turns a list of texts into a float32 matrix with one L2-normalized
+row per text, so the dot product of two rows is their cosine similarity.
+Embedders are registered in EMBEDDERS and chosen with MATCH_EMBEDDER (or
+get_embedder(name)).
+
+The default "hashing" embedder needs no model or service: it hashes word
+unigrams and bigrams into a fixed number of buckets and weights them by
+TF-IDF, with the IDF fitted on the profile texts being indexed.
+
+The "local" embedder calls the OpenAI-compatible /embeddings endpoint of LM
+Studio (LM_STUDIO_API_URL, EMBEDDING_MODEL), sending texts in large batches.
+get_embedder wraps it in the on-disk vector cache (embedding_cache.py), so
+each distinct text is only ever embedded once per model version.
+"""
+
+import hashlib
+import math
+import os
+import re
+import zlib
+from itertools import pairwise
+
+import httpx
+import numpy as np
+
+from src.processor.llm_client import POOL_LIMITS, REQUEST_TIMEOUT
+
+DEFAULT_EMBEDDER = os.getenv("MATCH_EMBEDDER", "hashing")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[+#]+|(?:-[a-z0-9]+)*)")
+STOPWORDS = frozenset(
+    {
+        "a", "an", "and", "are", "as", "at", "based", "by", "for", "from",
+        "in", "into", "is", "its", "of", "on", "or", "the", "their", "that",
+        "this", "to", "toward", "towards", "using", "via", "with",
+    }
+)  # fmt: skip
+
+
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def normalize_rows(matrix):
+    """L2-normalize the rows of a matrix in place; all-zero rows stay zero."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class Embedder:
+    """Maps texts to L2-normalized float32 vectors."""
+
+    name = None
+    dim = None
+    # Identifies the model version in the vector cache; None means the
+    # vectors depend on fit() and must not be cached
+    cache_key = None
+    # Identifies what fit() learned, for embedders whose vectors depend on it
+    fit_key = None
+
+    def fit(self, texts):
+        """Adapt to the corpus being indexed; a no-op for pretrained models."""
+        return self
+
+    def embed(self, texts):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class HashingEmbedder(Embedder):
+    """Offline TF-IDF embedder over hashed word unigrams and bigrams."""
+
+    name = "hashing"
+
+    def __init__(self, dim=4096):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+        self._buckets = {}
+
+    def _features(self, text, memo=None):
+        tokens = tokenize(text)
+        features = tokens + [f"{a} {b}" for a, b in pairwise(tokens)]
+        memo = self._buckets if memo is None else memo
+        buckets = []
+        for feature in features:
+            bucket = memo.get(feature)
+            if bucket is None:
+                # crc32 rather than hash(), which is salted per process
+                bucket = zlib.crc32(feature.encode("utf-8")) % self.dim
+                if memo is not self._buckets:
+                    memo[feature] = bucket
+            buckets.append(bucket)
+        return buckets
+
+    def fit(self, texts):
+        # Only the fitted corpus's features are memoized, so the memo stays
+        # the size of the vocabulary however many distinct queries arrive
+        buckets = {}
+        df = self.document_frequencies(texts, buckets)
+        self._buckets = buckets
+        return self.set_fit(df, len(texts))
+
+    def document_frequencies(self, texts, memo=None):
+        """Number of texts each bucket occurs in, without changing the fit."""
+        df = np.zeros(self.dim, dtype=np.float32)
+        for text in texts:
+            df[list(set(self._features(text, memo)))] += 1
+        return df
+
+    def set_fit(self, df, documents):
+        """Weigh terms by document frequencies over a corpus of documents."""
+        self.idf = (np.log((1 + documents) / (1 + df)) + 1).astype(np.float32)
+        self.fit_key = hashlib.sha1(self.idf.tobytes()).hexdigest()[:16]
+        return self
+
+    def embed(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for bucket in self._features(text):
+                counts[bucket] = counts.get(bucket, 0) + 1
+            for bucket, count in counts.items():
+                # Sublinear term frequency
+                matrix[row, bucket] = 1 + math.log(count)
+        matrix *= self.idf
+        return normalize_rows(matrix)
+
+
+class OpenAIEmbedder(Embedder):
+    """Embeddings from an OpenAI-compatible /embeddings endpoint."""
+
+    name = "local"
+
+    def __init__(self, model_name=None, base_url=None, batch_size=256, version=None):
+        self.model_name = model_name or os.getenv(
+            "EMBEDDING_MODEL", "text-embedding-nomic-embed-text-v1.5@q8_0"
+        )
+        self.dim = int(os.getenv("EMBEDDING_DIM", "768"))
+        self.batch_size = batch_size
+        # Bump EMBEDDING_MODEL_VERSION when the model behind a name changes
+        version = version or os.getenv("EMBEDDING_MODEL_VERSION", "1")
+        self.cache_key = f"{self.model_name}@{version}"
+        self.requests = 0
+        self.client = httpx.Client(
+            base_url=base_url
+            or os.getenv("LM_STUDIO_API_URL", "http://localhost:1234/v1"),
+            limits=POOL_LIMITS,
+            timeout=REQUEST_TIMEOUT,
+        )
+
+    def _request(self, texts):
+        response = self.client.post(
+            "/embeddings", json={"model": self.model_name, "input": texts}
+        )
+        response.raise_for_status()
+        self.requests += 1
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        return np.asarray([item["embedding"] for item in data], dtype=np.float32)
+
+    def embed(self, texts):
+        texts = [text.strip() for text in texts]
+        # Blank texts (e.g. an empty query) embed to zero without a request
+        rows = [i for i, text in enumerate(texts) if text]
+        matrix = None
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start : start + self.batch_size]
+            vectors = self._request([texts[i] for i in batch])
+            if matrix is None:
+                self.dim = vectors.shape[1]
+                matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+            matrix[batch] = vectors
+        if matrix is None:
+            matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        return normalize_rows(matrix)
+
+    def close(self):
+        self.client.close()
+
+
+def embedder_key(embedder):
+    """
+    Identifies the vectors an embedder produces: its model version, or its
+    kind and dimension plus what it was fitted to for embedders without one.
+    """
+    if embedder.cache_key:
+        return embedder.cache_key
+    key = f"{embedder.name}:{embedder.dim}"
+    return f"{key}:{embedder.fit_key}" if embedder.fit_key else key
+
+
+EMBEDDERS = {
+    HashingEmbedder.name: HashingEmbedder,
+    OpenAIEmbedder.name: OpenAIEmbedder,
+}
+
+
+def get_embedder(name=None, cache=True, **kwargs):
+    """
+    Create the named embedder (MATCH_EMBEDDER by default). Model embedders are
+    wrapped in the on-disk vector cache unless cache is False.
+    """
+    name = name or DEFAULT_EMBEDDER
+    if name not in EMBEDDERS:
+        raise ValueError(
+            f"Unknown embedder '{name}'. Expected one of: {', '.join(EMBEDDERS)}"
+        )
+    embedder = EMBEDDERS[name](**kwargs)
+    if cache and embedder.cache_key is not None:
+        from src.matching.embedding_cache import CachedEmbedder
+
+        embedder = CachedEmbedder(embedder)
+    return embedder
@@ -0,0 +1,261 @@
+"""
+On-disk embedding cache and the profile embedding stage.
+
+Mirrors the Node side's embedding_cache table: vectors are keyed by the MD5 of
+the trimmed text, plus the embedder's model version (cache_key), so switching
+or upgrading the model never serves stale vectors. Entries live in SQLite
+(data/cache/embeddings.sqlite) as raw float32 blobs. The least recently used
+entries are evicted once the cache holds more than max_entries vectors. Hits
+only note their last-used time in memory; the stamps are written in one batch
+before each eviction sweep, so a lookup never writes to the database.
+
+CachedEmbedder puts the cache in front of any model embedder. Every call
+dedupes its texts by hash, reads what it can from the cache and sends only
+the missing texts to the model, in large batches. Re-indexing after a small
+profile edit therefore only embeds the strings that actually changed.
+
+Usage:
+    python -m src.matching.embedding_cache embed [--embedder local]
+    python -m src.matching.embedding_cache stats
+    python -m src.matching.embedding_cache clear [--model KEY]
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.matching.embedder import Embedder, get_embedder
+from src.matching.engine import FIELD_WEIGHTS, field_texts
+from src.utils.profile_io import DATA_DIR, PROFILES_DIR, load_profiles
+
+DEFAULT_CACHE_PATH = Path(
+    os.getenv("EMBEDDING_CACHE_PATH", DATA_DIR / "cache" / "embeddings.sqlite")
+)
+MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+# Hits remembered before their last-used stamps are written anyway
+MAX_PENDING_TOUCHES = 100_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+"""
+
+
+def text_hash(text):
+    """Cache key of a text, the same as the Node embedding_cache.text_hash."""
+    return hashlib.md5(text.strip().encode("utf-8")).hexdigest()
+
+
+class VectorCache:
+    """Embedding vectors by (model version, text hash), with LRU eviction."""
+
+    def __init__(self, path=None, max_entries=MAX_ENTRIES):
+        self.path = Path(path or DEFAULT_CACHE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        # {(model, hash): last used} not yet written to the table
+        self._touched = {}
+        self.closed = False
+
+    def close(self):
+        # Embedders sharing a cache each close it
+        with self._lock:
+            if self.closed:
+                return
+            self._write_touched()
+            self.conn.commit()
+            self.conn.close()
+            self.closed = True
+
+    def _write_touched(self):
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(used, model, key) for (model, key), used in self._touched.items()],
+            )
+            self._touched = {}
+
+    def get_many(self, model, hashes):
+        """{hash: vector} for the hashes present in the cache."""
+        found = {}
+        with self._lock:
+            # Stay under SQLite's limit on bound parameters
+            for start in range(0, len(hashes), 900):
+                chunk = hashes[start : start + 900]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *chunk],
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            now = time.time()
+            self._touched.update(((model, key), now) for key in found)
+            if len(self._touched) > MAX_PENDING_TOUCHES:
+                self._write_touched()
+                self.conn.commit()
+        return found
+
+    def put_many(self, model, vectors):
+        """Store {hash: vector}, evicting the least recently used if full."""
+        now = time.time()
+        with self._lock:
+            # Eviction below needs the up-to-date stamps
+            self._write_touched()
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        model,
+                        key,
+                        len(vector),
+                        np.asarray(vector, np.float32).tobytes(),
+                        now,
+                    )
+                    for key, vector in vectors.items()
+                ],
+            )
+            excess = self._count() - self.max_entries
+            if excess > 0:
+                self.conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+            self.conn.commit()
+
+    def _count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
+
+    def stats(self):
+        """{model version: (entries, bytes)}."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT model, COUNT(*), SUM(LENGTH(vector)) FROM embeddings "
+                "GROUP BY model ORDER BY model"
+            )
+            return {model: (count, size) for model, count, size in rows}
+
+    def clear(self, model=None):
+        with self._lock:
+            if model is None:
+                self.conn.execute("DELETE FROM embeddings")
+            else:
+                self.conn.execute("DELETE FROM embeddings WHERE model = ?", (model,))
+            self.conn.commit()
+
+
+class CachedEmbedder(Embedder):
+    """Dedupes texts and serves repeated ones from the vector cache."""
+
+    def __init__(self, embedder, cache=None):
+        self.embedder = embedder
+        self.cache = cache if cache is not None else VectorCache()
+        self.name = embedder.name
+        self.cache_key = embedder.cache_key
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def dim(self):
+        return self.embedder.dim
+
+    def close(self):
+        self.embedder.close()
+        self.cache.close()
+
+    def fit(self, texts):
+        self.embedder.fit(texts)
+        return self
+
+    def embed(self, texts):
+        keys = [text_hash(text) for text in texts]
+        unique = dict(zip(keys, texts))
+        found = self.cache.get_many(self.cache_key, list(unique))
+        missing = [key for key in unique if key not in found]
+        if missing:
+            vectors = self.embedder.embed([unique[key] for key in missing])
+            new = dict(zip(missing, vectors))
+            self.cache.put_many(self.cache_key, new)
+            found.update(new)
+        self.hits += len(unique) - len(missing)
+        self.misses += len(missing)
+
+        if not keys:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        matrix = np.stack([found[key] for key in keys])
+        # When everything came from the cache the model was never asked, so
+        # take its dimension from the cached vectors
+        self.embedder.dim = matrix.shape[1]
+        return matrix
+
+
+def profile_texts(profiles, fields=None):
+    """Every distinct text the matching indexes embed, across all profiles."""
+    texts = {}
+    for profile in profiles.values():
+        for field in fields or FIELD_WEIGHTS:
+            for text in field_texts(profile, field):
+                texts.setdefault(text_hash(text), text)
+    return list(texts.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile embedding cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    embed = subparsers.add_parser("embed", help="Embed all profile texts")
+    embed.add_argument("--embedder", default="local", help="Embedder name")
+    subparsers.add_parser("stats", help="Show cached vectors per model")
+    clear = subparsers.add_parser("clear", help="Drop cached vectors")
+    clear.add_argument("--model", help="Only this model version")
+    args = parser.parse_args(argv)
+
+    if args.command == "embed":
+        embedder = get_embedder(args.embedder)
+        if not isinstance(embedder, CachedEmbedder):
+            print(f"❌ Error: embedder '{args.embedder}' is not cacheable")
+            return 1
+        texts = profile_texts(load_profiles(PROFILES_DIR))
+        start = time.perf_counter()
+        embedder.embed(texts)
+        elapsed = time.perf_counter() - start
+        print(
+            f"✅ {len(texts)} distinct texts: {embedder.misses} embedded in "
+            f"{embedder.embedder.requests} requests, {embedder.hits} from cache "
+            f"({elapsed:.1f} s)"
+        )
+    elif args.command == "stats":
+        for model, (count, size) in VectorCache().stats().items():
+            print(f"{model}: {count} vectors, {size / 2**20:.1f} MiB")
+    elif args.command == "clear":
+        VectorCache().clear(args.model)
+        print("✅ Cleared embedding cache")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
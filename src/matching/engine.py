@@ -0,0 +1,345 @@
+"""
+In-process semantic matching of research queries against supervisor profiles.
+
+Each supervisor is represented by one row of a float32 matrix. Every research
+interest, expertise area and publication title is embedded on its own, the
+items of each field are averaged, and the fields are combined with
+FIELD_WEIGHTS and L2-normalized. A query is then embedded once and scored
+against every supervisor with a single matrix product; the top k are selected
+with argpartition, so only k scores are ever sorted. The rows can be kept
+compressed (storage="float16", "int8" or "pq", see src.matching.quantization).
+
+Single supervisors can be re-embedded (upsert) or removed (delete) without a
+rebuild. A removed or replaced row is only marked dead (a tombstone) and
+scored as 0 until compact() rebuilds the arrays without it. The rows, names,
+departments and tombstones form one Snapshot that updates replace in a single
+assignment, and a query reads one snapshot throughout, so queries can run
+while another thread updates or compacts the engine. Updates themselves must
+not run concurrently with each other (LiveIndexes serializes them).
+
+Nothing outside the process is needed: profiles come from data/profiles
+through the shared profile cache, and the default embedder is offline.
+
+Usage:
+    python -m src.matching.engine "natural language processing" [--top-k 5]
+"""
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from src.matching.embedder import get_embedder, normalize_rows
+from src.matching.quantization import make_storage
+from src.utils.profile_io import PROFILES_DIR, load_profiles
+
+# Relative weight of each profile field in a supervisor's vector
+FIELD_WEIGHTS = {
+    "research_interests": 1.0,
+    "expertise": 1.0,
+    "publications": 0.5,
+}
+
+
+def field_texts(profile, field):
+    """The texts to embed for one profile field, one per item."""
+    items = profile.get(field) or []
+    if isinstance(items, dict):
+        # Grouped lists, e.g. supervised_students by degree level
+        items = [
+            item
+            for group in items.values()
+            for item in (group if isinstance(group, list) else [group])
+        ]
+    texts = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get("title")
+        if isinstance(item, str) and item.strip():
+            texts.append(item.strip())
+    return texts
+
+
+def collect_items(profiles, user_ids, fields):
+    """
+    One flat batch of item texts for user_ids, with the owner row (index into
+    user_ids) and field of each, so all items are embedded in a single call.
+    """
+    texts, owners, item_fields = [], [], []
+    for row, user_id in enumerate(user_ids):
+        for field in fields:
+            items = field_texts(profiles[user_id], field)
+            texts.extend(items)
+            owners.extend([row] * len(items))
+            item_fields.extend([field] * len(items))
+    return texts, np.asarray(owners, dtype=np.intp), np.asarray(item_fields)
+
+
+@dataclass
+class Match:
+    user_id: str
+    name: str
+    department: str
+    score: float
+    evidence: str = None
+    fields: dict = None  # per-field share of the score, when ranked by field
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One consistent version of an engine's rows, replaced as a whole."""
+
+    user_ids: list
+    names: list
+    departments: list
+    vectors: object  # VectorStorage; may hold rows appended after this snapshot
+    rows: dict  # user_id -> row of its live vector
+    alive: np.ndarray
+
+    @property
+    def tombstones(self):
+        return len(self.user_ids) - len(self.rows)
+
+
+EMPTY = Snapshot([], [], [], None, {}, np.zeros(0, dtype=bool))
+
+
+class MatchingEngine:
+    """Ranks supervisors by cosine similarity to a query."""
+
+    def __init__(self, embedder=None, field_weights=None, storage="float32"):
+        self.embedder = embedder or get_embedder()
+        self.field_weights = dict(field_weights or FIELD_WEIGHTS)
+        self.storage = storage
+        self.snapshot = EMPTY
+
+    # The current snapshot's fields; code that reads more than one field while
+    # the engine may be updated should take self.snapshot once instead
+
+    @property
+    def user_ids(self):
+        return self.snapshot.user_ids
+
+    @property
+    def names(self):
+        return self.snapshot.names
+
+    @property
+    def departments(self):
+        return self.snapshot.departments
+
+    @property
+    def vectors(self):
+        return self.snapshot.vectors
+
+    @property
+    def rows(self):
+        return self.snapshot.rows
+
+    @property
+    def alive(self):
+        return self.snapshot.alive
+
+    @classmethod
+    def from_profiles_dir(cls, profiles_dir=PROFILES_DIR, **kwargs):
+        return cls(**kwargs).build(load_profiles(profiles_dir))
+
+    def _supervisor_vectors(self, profiles, user_ids):
+        """Normalized supervisor vectors (rows) for user_ids."""
+        texts, owners, fields = collect_items(profiles, user_ids, self.field_weights)
+        vectors = self.embedder.embed(texts) if texts else None
+
+        matrix = np.zeros((len(user_ids), self.embedder.dim), dtype=np.float32)
+        for field, weight in self.field_weights.items():
+            mask = fields == field
+            if not mask.any():
+                continue
+            # Mean of each supervisor's item vectors for this field
+            field_matrix = np.zeros_like(matrix)
+            np.add.at(field_matrix, owners[mask], vectors[mask])
+            matrix += weight * normalize_rows(field_matrix)
+        return normalize_rows(matrix)
+
+    def build(self, profiles):
+        """Embed a {user_id: profile} mapping into the supervisor matrix."""
+        user_ids = sorted(profiles)
+        texts, _, _ = collect_items(profiles, user_ids, self.field_weights)
+        self.embedder.fit(texts)
+        matrix = self._supervisor_vectors(profiles, user_ids)
+        # Model embedders only know their dimension after the first call
+        vectors = make_storage(self.storage, matrix.shape[1])
+        vectors.add(matrix)
+        self.snapshot = Snapshot(
+            user_ids,
+            [profiles[u].get("name") or u for u in user_ids],
+            [profiles[u].get("department") or "" for u in user_ids],
+            vectors,
+            {user_id: row for row, user_id in enumerate(user_ids)},
+            np.ones(len(user_ids), dtype=bool),
+        )
+        return self
+
+    def upsert(self, user_id, profile):
+        """
+        Re-embed one supervisor; the embedder is not refitted. The new vector
+        is appended and an existing row becomes a tombstone, so rows that
+        queries may be reading are never written to.
+        """
+        vector = self._supervisor_vectors({user_id: profile}, [user_id])
+        snapshot = self.snapshot
+        vectors = snapshot.vectors
+        if vectors is None:
+            vectors = make_storage(self.storage, self.embedder.dim)
+        vectors.add(vector)
+        alive = np.append(snapshot.alive, True)
+        old = snapshot.rows.get(user_id)
+        if old is not None:
+            alive[old] = False
+        self.snapshot = Snapshot(
+            snapshot.user_ids + [user_id],
+            snapshot.names + [profile.get("name") or user_id],
+            snapshot.departments + [profile.get("department") or ""],
+            vectors,
+            {**snapshot.rows, user_id: len(snapshot.user_ids)},
+            alive,
+        )
+
+    def delete(self, user_id):
+        """Tombstone a supervisor; its row is reclaimed by compact()."""
+        snapshot = self.snapshot
+        row = snapshot.rows.get(user_id)
+        if row is None:
+            return
+        alive = snapshot.alive.copy()
+        alive[row] = False
+        rows = dict(snapshot.rows)
+        del rows[user_id]
+        self.snapshot = replace(snapshot, rows=rows, alive=alive)
+
+    @property
+    def tombstones(self):
+        return self.snapshot.tombstones
+
+    @property
+    def tombstone_ratio(self):
+        total = len(self.user_ids)
+        return self.tombstones / total if total else 0.0
+
+    def compact(self):
+        """Drop tombstoned rows, swapping in the compacted arrays at once."""
+        snapshot = self.snapshot
+        if not snapshot.tombstones:
+            return
+        keep = np.flatnonzero(snapshot.alive)
+        user_ids = [snapshot.user_ids[i] for i in keep]
+        self.snapshot = Snapshot(
+            user_ids,
+            [snapshot.names[i] for i in keep],
+            [snapshot.departments[i] for i in keep],
+            snapshot.vectors.compacted(keep),
+            {user_id: row for row, user_id in enumerate(user_ids)},
+            np.ones(len(user_ids), dtype=bool),
+        )
+
+    @property
+    def matrix(self):
+        """The supervisor vectors, decoded to float32."""
+        snapshot = self.snapshot
+        return snapshot.vectors.vectors(np.arange(len(snapshot.user_ids)))
+
+    def scores(self, queries):
+        """Cosine similarity of each query (rows) to each supervisor (columns)."""
+        snapshot = self.snapshot
+        scores = snapshot.vectors.scores(self.embedder.embed(list(queries)))
+        return scores[:, : len(snapshot.user_ids)]
+
+    def top_k(self, scores, k):
+        """Indices of the k best columns of each row of scores, best first."""
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return np.empty((scores.shape[0], 0), dtype=np.intp)
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(k), (scores.shape[0], k))
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        return np.take_along_axis(top, order, axis=1)
+
+    def _matches(self, snapshot, scores, indices):
+        return [
+            Match(
+                snapshot.user_ids[i],
+                snapshot.names[i],
+                snapshot.departments[i],
+                float(scores[i]),
+            )
+            for i in indices
+            if scores[i] > 0
+        ]
+
+    def match(self, query, k=10, department=None):
+        """The k supervisors best matching a query, best first."""
+        return self.match_many([query], k, department)[0]
+
+    def match_many(self, queries, k=10, department=None):
+        """Top-k matches for several queries, scored in one matrix product."""
+        return self.match_vectors(self.embedder.embed(list(queries)), k, department)
+
+    def match_vectors(self, vectors, k=10, department=None):
+        """Top-k matches for already embedded queries (rows of vectors)."""
+        # One snapshot throughout, so an update cannot change the rows under us
+        snapshot = self.snapshot
+        # Rows appended since the snapshot was taken are not part of it
+        scores = snapshot.vectors.scores(vectors)[:, : len(snapshot.user_ids)]
+        if snapshot.tombstones:
+            scores[:, ~snapshot.alive] = 0
+        if department:
+            # Supervisors outside the department score 0 and are dropped
+            scores[:, np.asarray(snapshot.departments) != department] = 0
+        top = self.top_k(scores, k)
+        return [
+            self._matches(snapshot, row, indices) for row, indices in zip(scores, top)
+        ]
+
+
+def print_matches(query, matches):
+    if not matches:
+        print(f"❌ No matching supervisors found for '{query}'")
+        return
+    print(f"✅ Top {len(matches)} supervisors for '{query}':")
+    for rank, match in enumerate(matches, 1):
+        print(f"{rank:>3}. {match.score:.3f}  {match.name} ({match.department})")
+        if match.evidence:
+            print(f"       matched: {match.evidence}")
+        if match.fields:
+            breakdown = ", ".join(
+                f"{field} {score:.4f}" for field, score in match.fields.items()
+            )
+            print(f"       fields: {breakdown}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match a research query")
+    parser.add_argument("query", help="Research interests to match")
+    parser.add_argument("--top-k", type=int, default=5, help="Number of matches")
+    parser.add_argument("--embedder", help="Embedder name (default MATCH_EMBEDDER)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    engine = MatchingEngine.from_profiles_dir(embedder=get_embedder(args.embedder))
+    built = time.perf_counter()
+    matches = engine.match(args.query, args.top_k)
+    done = time.perf_counter()
+
+    print_matches(args.query, matches)
+    print(
+        f"Indexed {len(engine.user_ids)} supervisors in {(built - start) * 1000:.1f} ms, "
+        f"matched in {(done - built) * 1000:.2f} ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
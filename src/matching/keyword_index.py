@@ -0,0 +1,399 @@
+"""
+BM25 keyword index over supervisor profiles.
+
+Embeddings blur exact terms such as "aspect-oriented", "NLP" or a grant name,
+so this index answers keyword queries directly. It is an inverted index with
+array-backed postings: the postings of all terms are stored back to back in
+two arrays (uint32 document ids and float16 term frequencies), and term t owns
+the slice offsets[t]:offsets[t + 1]. That is 6 bytes per posting, with no
+per-term Python objects besides the vocabulary.
+
+Fields are weighted BM25F-style: a term's frequency in a document is the sum
+of its occurrences in each field times FIELD_BOOSTS[field], and document
+length is weighted the same way. Hyphenated words are indexed both whole and
+as parts, and phrases with a known abbreviation (QUERY_SYNONYMS) are also
+indexed under it, so "nlp" finds "Natural Language Processing".
+
+Profiles can be updated one at a time. upsert() gives the new version of a
+profile a fresh document id whose postings go into a small in-memory delta
+(term -> postings), and marks the old document dead (a tombstone). Queries read
+both segments and skip dead documents. compact() merges the delta into the
+main arrays and drops the dead documents, with array operations only.
+
+Usage:
+    python -m src.matching.keyword_index build
+    python -m src.matching.keyword_index search "aspect-oriented" [--top-k 5]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from src.matching.embedder import tokenize
+from src.matching.engine import Match, print_matches
+from src.store.profile_store import QUERY_SYNONYMS
+from src.utils.profile_io import DATA_DIR, PROFILES_DIR, load_profiles
+
+DEFAULT_INDEX_PATH = Path(
+    os.getenv("KEYWORD_INDEX_PATH", DATA_DIR / "cache" / "keyword_index.npz")
+)
+
+# Weight of one occurrence of a term in each field
+FIELD_BOOSTS = {
+    "name": 3.0,
+    "research_interests": 3.0,
+    "expertise": 3.0,
+    "department": 1.0,
+    "publications": 1.0,
+    "conference_publications": 1.0,
+    "book_chapters": 1.0,
+    "projects": 1.5,
+    "supervised_students": 0.5,
+    "key_achievements": 0.5,
+    "awards": 0.5,
+}
+
+# Keys of list items (publications, projects, ...) whose text is indexed
+TEXT_KEYS = {"title", "description", "funding", "journal", "conference", "book"}
+
+SYNONYM_PHRASES = {
+    tuple(phrase.split()): abbreviation
+    for abbreviation, phrase in QUERY_SYNONYMS.items()
+}
+
+
+def profile_strings(value):
+    """All indexable strings in a profile field."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [s for item in value for s in profile_strings(item)]
+    if isinstance(value, dict):
+        return [
+            s
+            for key, item in value.items()
+            if key in TEXT_KEYS or isinstance(item, (list, dict))
+            for s in profile_strings(item)
+        ]
+    return []
+
+
+def index_terms(text):
+    """Terms to index for a text: its tokens, hyphen parts and abbreviations."""
+    tokens = tokenize(text)
+    terms = list(tokens)
+    for token in tokens:
+        if "-" in token:
+            terms.extend(part for part in token.split("-") if part)
+    for phrase, abbreviation in SYNONYM_PHRASES.items():
+        n = len(phrase)
+        for i in range(len(tokens) - n + 1):
+            if tuple(tokens[i : i + n]) == phrase:
+                terms.append(abbreviation)
+    return terms
+
+
+class KeywordIndex:
+    """Field-weighted BM25 over an array-backed inverted index."""
+
+    def __init__(self, field_boosts=None, k1=1.2, b=0.75):
+        self.field_boosts = dict(field_boosts or FIELD_BOOSTS)
+        self.k1 = k1
+        self.b = b
+        self.user_ids = []
+        self.names = []
+        self.departments = []
+        self.vocab = {}
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.uint32)
+        self.tfs = np.zeros(0, dtype=np.float16)
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self._norms = np.zeros(0, dtype=np.float32)
+        self.rows = {}  # user_id -> live document id
+        self.alive = np.zeros(0, dtype=bool)
+        self._delta = {}  # term -> ([doc ids], [weights]) added since build
+
+    def document_terms(self, profile):
+        """Boost-weighted term frequencies and length of one profile."""
+        weights = Counter()
+        length = 0.0
+        for field, boost in self.field_boosts.items():
+            for text in profile_strings(profile.get(field)):
+                terms = index_terms(text)
+                length += boost * len(terms)
+                for term in terms:
+                    weights[term] += boost
+        return weights, length
+
+    def build(self, profiles):
+        """Index a {user_id: profile} mapping."""
+        self.user_ids = sorted(profiles)
+        self.names = [profiles[u].get("name") or u for u in self.user_ids]
+        self.departments = [profiles[u].get("department") or "" for u in self.user_ids]
+
+        vocab = {}
+        term_ids, doc_ids, tfs = [], [], []
+        lengths = np.zeros(len(self.user_ids), dtype=np.float32)
+        for doc, user_id in enumerate(self.user_ids):
+            weights, lengths[doc] = self.document_terms(profiles[user_id])
+            for term, weight in weights.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc)
+                tfs.append(weight)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        # Group postings by term; documents were added in order, so a stable
+        # sort keeps each term's postings sorted by document id
+        order = np.argsort(term_ids, kind="stable")
+        self.vocab = vocab
+        self.doc_ids = np.asarray(doc_ids, dtype=np.uint32)[order]
+        self.tfs = np.asarray(tfs, dtype=np.float16)[order]
+        self.offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=self.offsets[1:])
+        self.doc_lengths = lengths
+        self._reset_documents()
+        return self
+
+    def _reset_documents(self):
+        self.rows = {user_id: doc for doc, user_id in enumerate(self.user_ids)}
+        self.alive = np.ones(len(self.user_ids), dtype=bool)
+        self._delta = {}
+        self._update_norms()
+
+    def _update_norms(self):
+        lengths = self.doc_lengths[self.alive]
+        average = float(lengths.mean()) if len(lengths) and lengths.mean() else 1.0
+        self._norms = (
+            self.k1 * (1 - self.b + self.b * self.doc_lengths / average)
+        ).astype(np.float32)
+
+    def upsert(self, user_id, profile):
+        """Index the new version of a profile, tombstoning the old one."""
+        weights, length = self.document_terms(profile)
+        doc = len(self.user_ids)
+        old = self.rows.get(user_id)
+        alive = np.append(self.alive, True)
+        if old is not None:
+            alive[old] = False
+        for term, weight in weights.items():
+            docs, tfs = self._delta.setdefault(term, ([], []))
+            docs.append(doc)
+            tfs.append(weight)
+        self.user_ids.append(user_id)
+        self.names.append(profile.get("name") or user_id)
+        self.departments.append(profile.get("department") or "")
+        self.doc_lengths = np.append(self.doc_lengths, np.float32(length))
+        self.alive = alive
+        self.rows[user_id] = doc
+        self._update_norms()
+
+    def delete(self, user_id):
+        """Tombstone a profile's document; compact() reclaims it."""
+        doc = self.rows.pop(user_id, None)
+        if doc is not None:
+            self.alive[doc] = False
+            self._update_norms()
+
+    @property
+    def tombstones(self):
+        return len(self.user_ids) - len(self.rows)
+
+    @property
+    def tombstone_ratio(self):
+        total = len(self.user_ids)
+        return self.tombstones / total if total else 0.0
+
+    def compact(self):
+        """Merge the delta into the main postings and drop dead documents."""
+        if not self.tombstones and not self._delta:
+            return
+        # Term id of every main posting, plus the delta's postings
+        term_ids = [np.repeat(np.arange(len(self.vocab)), np.diff(self.offsets))]
+        doc_ids = [self.doc_ids.astype(np.int64)]
+        tfs = [self.tfs]
+        vocab = dict(self.vocab)
+        for term, (docs, weights) in self._delta.items():
+            term_id = vocab.setdefault(term, len(vocab))
+            term_ids.append(np.full(len(docs), term_id))
+            doc_ids.append(np.asarray(docs, dtype=np.int64))
+            tfs.append(np.asarray(weights, dtype=np.float16))
+        term_ids = np.concatenate(term_ids)
+        doc_ids = np.concatenate(doc_ids)
+        tfs = np.concatenate(tfs)
+
+        live = self.alive[doc_ids]
+        term_ids, doc_ids, tfs = term_ids[live], doc_ids[live], tfs[live]
+        keep = np.flatnonzero(self.alive)
+        new_ids = np.cumsum(self.alive) - 1
+        order = np.lexsort((doc_ids, term_ids))
+
+        # Terms left without postings keep an empty slice in the vocabulary
+        self.vocab = vocab
+        self.doc_ids = new_ids[doc_ids[order]].astype(np.uint32)
+        self.tfs = tfs[order]
+        self.offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=self.offsets[1:])
+        self.user_ids = [self.user_ids[i] for i in keep]
+        self.names = [self.names[i] for i in keep]
+        self.departments = [self.departments[i] for i in keep]
+        self.doc_lengths = self.doc_lengths[keep]
+        self._reset_documents()
+
+    def postings(self, term):
+        """(doc ids, weighted term frequencies) of a term's live documents."""
+        term_id = self.vocab.get(term)
+        if term_id is None:
+            docs, tfs = self.doc_ids[:0], self.tfs[:0]
+        else:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs, tfs = self.doc_ids[start:end], self.tfs[start:end]
+        if term in self._delta:
+            delta_docs, delta_tfs = self._delta[term]
+            docs = np.concatenate([docs, np.asarray(delta_docs, dtype=np.uint32)])
+            tfs = np.concatenate([tfs, np.asarray(delta_tfs, dtype=np.float16)])
+        if self.tombstones:
+            live = self.alive[docs]
+            docs, tfs = docs[live], tfs[live]
+        return docs, tfs
+
+    def term_scores(self, query):
+        """(doc ids, BM25 contributions) of each query term that has postings."""
+        n = len(self.rows)
+        parts = []
+        for term, count in Counter(tokenize(query)).items():
+            docs, tfs = self.postings(term)
+            if not len(docs):
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            tfs = tfs.astype(np.float32)
+            parts.append(
+                (docs, count * idf * tfs * (self.k1 + 1) / (tfs + self._norms[docs]))
+            )
+        return parts
+
+    def _dense(self, parts):
+        scores = np.zeros(len(self.user_ids), dtype=np.float32)
+        for docs, contributions in parts:
+            # Each document appears once per term, so plain fancy-index
+            # addition is safe here
+            scores[docs] += contributions
+        return scores
+
+    def scores(self, query):
+        """BM25 score of every document for a query."""
+        return self._dense(self.term_scores(query))
+
+    def matched(self, query):
+        """(doc ids, scores) of only the documents matching a query."""
+        parts = self.term_scores(query)
+        if not parts:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32)
+        if len(parts) == 1:
+            return parts[0]
+        if sum(len(docs) for docs, _ in parts) * 4 < len(self.user_ids):
+            # Few postings (rare terms): sum them sparsely instead of
+            # scanning a dense score array
+            docs, inverse = np.unique(
+                np.concatenate([d for d, _ in parts]), return_inverse=True
+            )
+            weights = np.concatenate([c for _, c in parts])
+            return docs, np.bincount(inverse, weights).astype(np.float32)
+        scores = self._dense(parts)
+        docs = np.flatnonzero(scores)
+        return docs, scores[docs]
+
+    def search(self, query, k=10):
+        """The k best-scoring supervisors for a query, best first."""
+        docs, scores = self.matched(query)
+        if len(docs) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            docs, scores = docs[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [
+            Match(self.user_ids[i], self.names[i], self.departments[i], float(score))
+            for i, score in zip(docs[order].tolist(), scores[order].tolist())
+        ]
+
+    def memory_bytes(self):
+        """Size of the posting and document arrays (excluding the vocabulary)."""
+        arrays = (self.offsets, self.doc_ids, self.tfs, self.doc_lengths, self._norms)
+        return sum(a.nbytes for a in arrays)
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        self.compact()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                terms=np.asarray(terms, dtype=str),
+                offsets=self.offsets,
+                doc_ids=self.doc_ids,
+                tfs=self.tfs,
+                doc_lengths=self.doc_lengths,
+                user_ids=np.asarray(self.user_ids, dtype=str),
+                names=np.asarray(self.names, dtype=str),
+                departments=np.asarray(self.departments, dtype=str),
+                params=np.asarray([self.k1, self.b]),
+                field_boosts=np.asarray(list(self.field_boosts.items()), dtype=str),
+            )
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with np.load(path) as data:
+            field_boosts = {f: float(b) for f, b in data["field_boosts"]}
+            k1, b = data["params"].tolist()
+            index = cls(field_boosts, k1, b)
+            index.vocab = {term: i for i, term in enumerate(data["terms"].tolist())}
+            index.offsets = data["offsets"]
+            index.doc_ids = data["doc_ids"]
+            index.tfs = data["tfs"]
+            index.doc_lengths = data["doc_lengths"]
+            index.user_ids = data["user_ids"].tolist()
+            index.names = data["names"].tolist()
+            index.departments = data["departments"].tolist()
+        index._reset_documents()
+        return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BM25 keyword search over profiles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="Rebuild the index from data/profiles")
+    search = subparsers.add_parser("search", help="Search the index")
+    search.add_argument("query")
+    search.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Index file")
+    args = parser.parse_args(argv)
+
+    index_path = Path(args.index)
+    if args.command == "build" or not index_path.exists():
+        start = time.perf_counter()
+        index = KeywordIndex().build(load_profiles(PROFILES_DIR))
+        index.save(index_path)
+        print(
+            f"Indexed {len(index.user_ids)} profiles, {len(index.vocab)} terms, "
+            f"{len(index.doc_ids)} postings ({index.memory_bytes() / 1024:.1f} KB) "
+            f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+    else:
+        index = KeywordIndex.load(index_path)
+
+    if args.command == "search":
+        start = time.perf_counter()
+        matches = index.search(args.query, args.top_k)
+        elapsed = (time.perf_counter() - start) * 1e6
+        print_matches(args.query, matches)
+        print(f"Searched in {elapsed:.0f} µs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
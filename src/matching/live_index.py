@@ -0,0 +1,177 @@
+"""
+Incremental maintenance of the in-memory matching indexes.
+
+Rebuilding every index after each profile edit throws away all the work for
+the profiles that did not change. LiveIndexes keeps a content hash per
+profile and, on sync(), upserts only the profiles whose hash changed and
+deletes the ones that are gone, in every index it manages: the supervisor
+vectors (MatchingEngine), the BM25 postings (KeywordIndex) and optionally the
+item-level HNSW graph (ItemIndex) and the co-authorship graph (CoauthorGraph). The SQLite profile store, which serves the
+facet filters, already syncs one file at a time by content hash
+(ProfileStore.sync_file) and is left to the profile watcher.
+
+Updates append rows and tombstone the old ones. Once tombstones make up more
+than COMPACT_RATIO of an index, it is compacted: rebuilt from its live rows
+and swapped in. MatchingEngine publishes every change as a new snapshot, so
+vector queries can run during a sync. The other indexes are changed in place
+and must not be queried while a sync is running.
+
+Usage:
+    python -m src.matching.live_index [--interval 2]
+"""
+
+import argparse
+import hashlib
+import pickle
+import sys
+import threading
+import time
+
+from src.matching.engine import MatchingEngine
+from src.matching.keyword_index import KeywordIndex
+from src.utils.profile_io import PROFILES_DIR, load_profiles
+
+# Fraction of dead rows that triggers a compaction
+COMPACT_RATIO = 0.2
+
+
+def profile_hash(profile):
+    """Content hash of a parsed profile."""
+    return hashlib.sha1(pickle.dumps(profile, pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+class LiveIndexes:
+    """Keeps several matching indexes in step with the profiles, incrementally."""
+
+    def __init__(
+        self,
+        engine=None,
+        keyword=None,
+        items=None,
+        graph=None,
+        compact_ratio=COMPACT_RATIO,
+    ):
+        self.indexes = {
+            name: index
+            for name, index in (
+                ("vector", engine),
+                ("keyword", keyword),
+                ("item", items),
+                ("graph", graph),
+            )
+            if index is not None
+        }
+        self.compact_ratio = compact_ratio
+        self.hashes = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_profiles_dir(cls, profiles_dir=PROFILES_DIR, **kwargs):
+        if not kwargs:
+            kwargs = {"engine": MatchingEngine(), "keyword": KeywordIndex()}
+        indexes = cls(**kwargs)
+        indexes.sync(load_profiles(profiles_dir))
+        return indexes
+
+    def changes(self, profiles):
+        """
+        (changed {user_id: profile}, removed user ids, new hashes) against
+        the last sync.
+        """
+        hashes = {user_id: profile_hash(p) for user_id, p in profiles.items()}
+        changed = {
+            user_id: profiles[user_id]
+            for user_id, digest in hashes.items()
+            if self.hashes.get(user_id) != digest
+        }
+        removed = self.hashes.keys() - hashes.keys()
+        return changed, removed, hashes
+
+    def sync(self, profiles):
+        """
+        Bring every index up to date with {user_id: profile}. The first sync
+        builds the indexes; later ones only touch changed profiles. Returns
+        the set of changed or removed user ids.
+        """
+        with self._lock:
+            changed, removed, hashes = self.changes(profiles)
+            if not self.hashes:
+                for index in self.indexes.values():
+                    index.build(profiles)
+            else:
+                for index in self.indexes.values():
+                    for user_id in removed:
+                        index.delete(user_id)
+                    for user_id, profile in changed.items():
+                        index.upsert(user_id, profile)
+                self.compact()
+            self.hashes = hashes
+            return set(changed) | removed
+
+    def apply(self, user_id, profile):
+        """Update one profile (None if deleted); False if it was unchanged."""
+        with self._lock:
+            if profile is None:
+                # Deleting is idempotent, and a loaded index may hold profiles
+                # this instance never hashed
+                self.hashes.pop(user_id, None)
+                for index in self.indexes.values():
+                    index.delete(user_id)
+            else:
+                digest = profile_hash(profile)
+                if self.hashes.get(user_id) == digest:
+                    return False
+                self.hashes[user_id] = digest
+                for index in self.indexes.values():
+                    index.upsert(user_id, profile)
+            self.compact()
+            return True
+
+    def compact(self, force=False):
+        """Compact the indexes whose share of dead rows is over the limit."""
+        compacted = []
+        for name, index in self.indexes.items():
+            if index.tombstones and (
+                force or index.tombstone_ratio > self.compact_ratio
+            ):
+                index.compact()
+                compacted.append(name)
+        return compacted
+
+    def stats(self):
+        return {
+            "profiles": len(self.hashes),
+            **{
+                f"{name}_tombstones": index.tombstones
+                for name, index in self.indexes.items()
+            },
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the matching indexes live")
+    parser.add_argument(
+        "--interval", type=float, default=2.0, help="Seconds between profile scans"
+    )
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    indexes = LiveIndexes.from_profiles_dir()
+    print(
+        f"✅ Indexed {len(indexes.hashes)} profiles in {time.perf_counter() - start:.2f} s"
+    )
+    try:
+        while True:
+            time.sleep(args.interval)
+            start = time.perf_counter()
+            changed = indexes.sync(load_profiles(PROFILES_DIR))
+            if changed:
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"Updated {', '.join(sorted(changed))} in {elapsed:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
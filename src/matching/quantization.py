@@ -0,0 +1,372 @@
+"""
+Compact vector storage for the matching indexes.
+
+Publication-level embeddings at university scale are millions of float32
+vectors, gigabytes of RAM. Every store here holds row vectors behind the same
+interface and scores queries without ever materializing the full float32
+matrix:
+
+    float32  4 bytes per dimension, exact
+    float16  2 bytes per dimension; blocks are widened to float32 for scoring
+    int8     1 byte per dimension plus a per-vector float32 scale (the largest
+             absolute component / 127); dot products are taken on the codes
+             and rescaled
+    pq       product quantization: the vector is split into m sub-vectors and
+             each is replaced by the id of its nearest of 256 k-means
+             centroids, so a vector costs m bytes. Queries are scored
+             asymmetrically: the query is kept exact and its dot product with
+             every centroid is tabulated once, after which a vector's score
+             is the sum of m table lookups
+
+The codebooks are trained on the first rows added; a store built in one go
+(build()) trains on the whole matrix. One that grows a few rows at a time keeps
+exact copies of its rows until the codebooks have seen enough of them, and
+retrains each time it doubles in size, encoding its rows into new arrays that
+replace the old ones together with the codebooks, so queries running
+meanwhile are unaffected. Calling train() with a sample before the first
+add() fixes the codebooks instead.
+
+float16 halves memory but not latency: NumPy has no fast float16 matrix
+product, so every block is widened to float32 on each query, which makes a
+scan several times slower than over float32 rows. Keeping a widened copy would
+give the memory back, so use float16 only where memory is what runs out.
+
+Scores are computed in blocks of rows, so the float32 working set stays small
+whatever the number of vectors.
+"""
+
+import copy
+from typing import NamedTuple
+
+import numpy as np
+
+BLOCK_ROWS = 4096
+
+
+class VectorStorage:
+    """Exact float32 rows; the base class of the quantized stores."""
+
+    kind = "float32"
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.size = 0
+        self._arrays = None
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def trained(self):
+        return True
+
+    def train(self, vectors):
+        """Fit the encoding to sample vectors; a no-op for most stores."""
+        return self
+
+    def _encode(self, vectors):
+        """Row-aligned arrays encoding vectors."""
+        return (vectors,)
+
+    def _decode(self, parts):
+        return parts[0]
+
+    def add(self, vectors):
+        """Append rows; returns their ids."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if not len(vectors):
+            return []
+        if not self.trained:
+            self.train(vectors)
+        parts = self._encode(vectors)
+        n = len(vectors)
+        if self._arrays is None:
+            self._arrays = [
+                np.zeros((max(n, 64), *p.shape[1:]), dtype=p.dtype) for p in parts
+            ]
+        elif self.size + n > len(self._arrays[0]):
+            capacity = max(self.size + n, 2 * len(self._arrays[0]))
+            for i, array in enumerate(self._arrays):
+                grown = np.zeros((capacity, *array.shape[1:]), dtype=array.dtype)
+                grown[: self.size] = array[: self.size]
+                self._arrays[i] = grown
+        for array, part in zip(self._arrays, parts):
+            array[self.size : self.size + n] = part
+        self.size += n
+        return list(range(self.size - n, self.size))
+
+    def set(self, ids, vectors):
+        """Overwrite the rows ids in place."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        for array, part in zip(self._arrays, self._encode(vectors)):
+            array[ids] = part
+
+    def compacted(self, ids):
+        """A new store of the same kind (and codebooks) with only rows ids."""
+        store = copy.copy(self)
+        if self._arrays is not None:
+            store._arrays = [array[ids] for array in self._arrays]
+        store.size = len(ids)
+        return store
+
+    def _rows(self, ids):
+        return tuple(array[ids] for array in self._arrays)
+
+    def vectors(self, ids=None):
+        """Rows (all by default) decoded to float32."""
+        if self._arrays is None:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if ids is None:
+            ids = slice(0, self.size)
+        return self._decode(self._rows(ids)).astype(np.float32, copy=False)
+
+    def prepare(self, queries):
+        """Per-query state reused across scoring calls (e.g. PQ tables)."""
+        return np.asarray(queries, dtype=np.float32)
+
+    def dot(self, ids, prepared):
+        """Dot products of the rows ids with one prepared query."""
+        return self.vectors(ids) @ prepared
+
+    def _block_scores(self, prepared, rows):
+        # Matrix-vector products are faster with the rows on the left
+        return (self.vectors(rows) @ prepared.T).T
+
+    def scores(self, queries):
+        """Dot product of each query (rows) with every stored vector (columns)."""
+        # Read once, before the rows the query will score are taken: rows may
+        # be appended while the blocks are scored
+        size = self.size
+        queries = np.atleast_2d(queries)
+        prepared = self.prepare(queries)
+        scores = np.empty((len(queries), size), dtype=np.float32)
+        for start in range(0, size, BLOCK_ROWS):
+            rows = slice(start, min(start + BLOCK_ROWS, size))
+            scores[:, rows] = self._block_scores(prepared, rows)
+        return scores
+
+    def memory_bytes(self):
+        if self._arrays is None:
+            return 0
+        return sum(array[: self.size].nbytes for array in self._arrays)
+
+
+class Float16Storage(VectorStorage):
+    kind = "float16"
+
+    def _encode(self, vectors):
+        return (vectors.astype(np.float16),)
+
+    def dot(self, ids, prepared):
+        return self._arrays[0][ids].astype(np.float32) @ prepared
+
+
+class Int8Storage(VectorStorage):
+    """Scalar int8 codes with one float32 scale per vector."""
+
+    kind = "int8"
+
+    def _encode(self, vectors):
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _decode(self, parts):
+        codes, scales = parts
+        return codes.astype(np.float32) * scales[:, None]
+
+    def dot(self, ids, prepared):
+        codes, scales = self._rows(ids)
+        return (codes.astype(np.float32) @ prepared) * scales
+
+    def _block_scores(self, prepared, rows):
+        codes, scales = self._rows(rows)
+        return (codes.astype(np.float32) @ prepared.T).T * scales
+
+
+def kmeans(vectors, k, iterations=20, seed=0):
+    """Lloyd's k-means; returns k centroids (fewer if there are fewer vectors)."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    norms = (vectors**2).sum(axis=1)
+    for _ in range(iterations):
+        distances = (
+            norms[:, None] - 2 * vectors @ centroids.T + (centroids**2).sum(axis=1)
+        )
+        assignment = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.stack(
+            [np.bincount(assignment, column, k) for column in vectors.T], axis=1
+        )
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Re-seed empty clusters with random points
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty))]
+    return centroids
+
+
+class PQQuery(NamedTuple):
+    """A query prepared for PQ scoring, with the codes its tables apply to."""
+
+    tables: np.ndarray  # (q, m, k) dot products with every centroid
+    arrays: list
+
+
+class PQStorage(VectorStorage):
+    """Product quantization with asymmetric (exact query) scoring."""
+
+    kind = "pq"
+    # The codebooks and the row arrays encoded with them. Retraining replaces
+    # both in one assignment, so a query never scores codes with other books
+    _coding = (None, None)
+
+    def __init__(self, dim, m=None, centroids=256, training_sample=50000, seed=0):
+        super().__init__(dim)
+        # Default to 8-dimensional sub-vectors
+        self.m = m or max(1, dim // 8)
+        if dim % self.m:
+            raise ValueError(f"dim {dim} is not divisible into {self.m} sub-vectors")
+        self.sub_dim = dim // self.m
+        self.n_centroids = centroids
+        self.training_sample = training_sample
+        self.seed = seed
+        # k-means wants a few dozen points per centroid; until codebooks trained
+        # by add() have seen that many rows, exact copies are kept to retrain on
+        self.full_training = min(training_sample, 39 * centroids)
+        self.trained_rows = 0
+        self._exact = None
+
+    @property
+    def codebooks(self):
+        """(m, centroids, sub_dim) centroids, or None until trained."""
+        return self._coding[0]
+
+    @property
+    def _arrays(self):
+        return self._coding[1]
+
+    @_arrays.setter
+    def _arrays(self, arrays):
+        self._coding = (self.codebooks, arrays)
+
+    @property
+    def trained(self):
+        return self.codebooks is not None
+
+    def train(self, vectors):
+        self._coding = (self._fit(vectors), self._arrays)
+        return self
+
+    def _fit(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.trained_rows = len(vectors)
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > self.training_sample:
+            vectors = vectors[rng.choice(len(vectors), self.training_sample, False)]
+        subs = vectors.reshape(len(vectors), self.m, self.sub_dim)
+        books = [
+            kmeans(subs[:, j], self.n_centroids, seed=self.seed) for j in range(self.m)
+        ]
+        # Pad to a common size when there were fewer vectors than centroids
+        size = max(len(book) for book in books)
+        codebooks = np.zeros((self.m, size, self.sub_dim), dtype=np.float32)
+        for j, book in enumerate(books):
+            codebooks[j, : len(book)] = book
+            codebooks[j, len(book) :] = book[0]
+        return codebooks
+
+    def add(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if not self.trained:
+            # The codebooks will be trained on this first batch only
+            self._exact = vectors[:0]
+        ids = super().add(vectors)
+        if self._exact is not None:
+            self._exact = np.concatenate([self._exact, vectors])
+            # Doubling keeps the total re-encoding work linear in the rows
+            if len(self._exact) >= 2 * self.trained_rows:
+                # Queries may be reading the current codes, so the rows are
+                # encoded into new arrays and published with the new books
+                codebooks = self._fit(self._exact)
+                codes = np.zeros_like(self._arrays[0])
+                codes[: self.size] = self._encode(self._exact, codebooks)[0]
+                self._coding = (codebooks, [codes])
+            if self.trained_rows >= self.full_training:
+                self._exact = None
+        return ids
+
+    def set(self, ids, vectors):
+        super().set(ids, vectors)
+        if self._exact is not None:
+            self._exact[ids] = np.asarray(vectors, np.float32).reshape(-1, self.dim)
+
+    def compacted(self, ids):
+        store = super().compacted(ids)
+        if self._exact is not None:
+            store._exact = self._exact[ids]
+        return store
+
+    def _encode(self, vectors, codebooks=None):
+        codebooks = self.codebooks if codebooks is None else codebooks
+        subs = vectors.reshape(len(vectors), self.m, self.sub_dim)
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        book_norms = (codebooks**2).sum(axis=2)
+        for j in range(self.m):
+            # Nearest centroid by squared distance, dropping the constant |x|^2
+            distances = book_norms[j] - 2 * subs[:, j] @ codebooks[j].T
+            codes[:, j] = distances.argmin(axis=1)
+        return (codes,)
+
+    def vectors(self, ids=None):
+        codebooks, arrays = self._coding
+        if arrays is None:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        codes = arrays[0][slice(0, self.size) if ids is None else ids]
+        return codebooks[np.arange(self.m), codes].reshape(len(codes), self.dim)
+
+    def prepare(self, queries):
+        """Each query's dot products with every centroid, and the codes to score."""
+        codebooks, arrays = self._coding
+        queries = np.asarray(queries, dtype=np.float32)
+        subs = queries.reshape(-1, self.m, self.sub_dim)
+        return PQQuery(np.einsum("qmd,mkd->qmk", subs, codebooks), arrays)
+
+    def _lookup(self, table, codes):
+        # One gather per sub-space beats a single (n, m) fancy index
+        scores = np.zeros(len(codes), dtype=np.float32)
+        for j in range(self.m):
+            scores += table[j].take(codes[:, j])
+        return scores
+
+    def dot(self, ids, prepared):
+        # One query: the tables are (m, k) or (1, m, k)
+        codes = prepared.arrays[0][ids]
+        return self._lookup(prepared.tables.reshape(self.m, -1), codes)
+
+    def _block_scores(self, prepared, rows):
+        codes = prepared.arrays[0][rows]
+        return np.stack([self._lookup(table, codes) for table in prepared.tables])
+
+    def memory_bytes(self):
+        extra = [a for a in (self.codebooks, self._exact) if a is not None]
+        return super().memory_bytes() + sum(a.nbytes for a in extra)
+
+
+STORAGES = {
+    storage.kind: storage
+    for storage in (VectorStorage, Float16Storage, Int8Storage, PQStorage)
+}
+
+
+def make_storage(kind, dim, **kwargs):
+    """Create an empty store of the given kind (float32, float16, int8 or pq)."""
+    kind = kind or "float32"
+    if kind not in STORAGES:
+        raise ValueError(
+            f"Unknown vector storage '{kind}'. Expected one of: {', '.join(STORAGES)}"
+        )
+    return STORAGES[kind](dim, **kwargs)
@@ -0,0 +1,287 @@
+"""
+Cache of matching results for repeated queries.
+
+Students send the same popular queries over and over ("machine learning",
+"NLP", ...). ResultCache keeps finished results keyed by the normalized query,
+k and any filters. Entries expire after a TTL, and the least recently used
+are evicted once the cache holds max_entries. The process-wide instance from
+shared_cache() is used by main.py --match, the interactive prompt below and
+the search service, so they all report the same hit rates. Each CachedMatcher
+keys and tags its entries with its embedder and profiles directory, so
+matchers over different embedders or profiles never see each other's results.
+
+Invalidation is driven by the profiles behind each result. CachedMatcher
+tags every entry with the supervisors it returned and remembers the query
+vector and the k-th best score. refresh() updates the engine for the profiles
+that changed (LiveIndexes), then drops the entries that returned a changed
+supervisor, and the entries a changed
+supervisor would now enter: those where the supervisor's new vector scores
+above the cached k-th score. All other entries stay warm. Scores of entries
+kept across a refresh may differ slightly from a fresh search when the
+embedder is fitted to the corpus (the hashing embedder's IDF); the TTL bounds
+that.
+
+Usage:
+    python -m src.matching.result_cache [--top-k 5] [--department NAME]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+from src.matching.embedder import embedder_key
+from src.matching.engine import MatchingEngine, print_matches
+from src.matching.live_index import LiveIndexes
+from src.utils.profile_io import PROFILES_DIR, load_profiles
+
+MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL", "300"))
+
+
+def normalize_query(query):
+    """Case- and whitespace-insensitive form of a query."""
+    return " ".join(query.lower().split())
+
+
+def cache_key(query, k, **filters):
+    return (
+        normalize_query(query),
+        k,
+        tuple(sorted((name, value) for name, value in filters.items() if value)),
+    )
+
+
+class ResultCache:
+    """LRU cache with a TTL, whose entries are tagged with supervisor ids."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires, value, user_ids, meta)
+        self._keys_by_user = defaultdict(set)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, key):
+        _, _, user_ids, _ = self._entries.pop(key)
+        for user_id in user_ids:
+            keys = self._keys_by_user[user_id]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+    def get(self, key):
+        """The cached value for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= self.clock():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, user_ids=(), meta=None):
+        """Cache value, tagged with the supervisors it depends on."""
+        user_ids = frozenset(user_ids)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (self.clock() + self.ttl, value, user_ids, meta)
+            for user_id in user_ids:
+                self._keys_by_user[user_id].add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, user_ids):
+        """Drop every entry tagged with any of user_ids; returns the count."""
+        with self._lock:
+            keys = set().union(*(self._keys_by_user.get(u, ()) for u in user_ids))
+            for key in keys:
+                self._drop(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def discard(self, keys):
+        """Drop the given entries; returns how many were present."""
+        with self._lock:
+            present = [key for key in keys if key in self._entries]
+            for key in present:
+                self._drop(key)
+            self.invalidations += len(present)
+            return len(present)
+
+    def metas(self):
+        """[(key, meta)] of every entry with metadata."""
+        with self._lock:
+            return [
+                (key, entry[3])
+                for key, entry in self._entries.items()
+                if entry[3] is not None
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_cache():
+    """The process-wide result cache, created on first use."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResultCache()
+        return _shared_cache
+
+
+class CachedMatcher:
+    """A MatchingEngine front-end that serves repeated queries from a cache."""
+
+    def __init__(self, engine, cache=None, profiles_dir=PROFILES_DIR, live=None):
+        self.engine = engine
+        self.cache = cache if cache is not None else shared_cache()
+        self.profiles_dir = profiles_dir
+        # Other indexes kept live alongside the engine may share the sync
+        self.live = live if live is not None else LiveIndexes(engine=engine)
+
+    @property
+    def namespace(self):
+        """Prefix of this matcher's keys and tags in a possibly shared cache."""
+        return (embedder_key(self.engine.embedder), str(self.profiles_dir))
+
+    @classmethod
+    def from_profiles_dir(cls, profiles_dir=PROFILES_DIR, cache=None, **kwargs):
+        matcher = cls(MatchingEngine(**kwargs), cache, profiles_dir)
+        matcher.refresh(load_profiles(profiles_dir))
+        return matcher
+
+    def match(self, query, k=10, department=None):
+        """Like MatchingEngine.match, from the cache when possible."""
+        namespace = self.namespace
+        key = (namespace, *cache_key(query, k, department=department))
+        matches = self.cache.get(key)
+        if matches is None:
+            vector = self.engine.embedder.embed([query])
+            matches = self.engine.match_vectors(vector, k, department)[0]
+            # A supervisor outside the result must beat this score to enter it
+            threshold = matches[-1].score if len(matches) == k else 0.0
+            self.cache.put(
+                key,
+                matches,
+                [(namespace, m.user_id) for m in matches],
+                meta=(vector[0], threshold, department),
+            )
+        return list(matches)
+
+    def refresh(self, profiles=None):
+        """
+        Update the engine with the profiles that changed and invalidate the
+        cached results the changes affect. Returns the changed user ids.
+        """
+        if profiles is None:
+            profiles = load_profiles(self.profiles_dir)
+        changed = self.live.sync(profiles)
+        if changed:
+            namespace = self.namespace
+            self.cache.invalidate({(namespace, user_id) for user_id in changed})
+            self._invalidate_newcomers(changed & self.engine.rows.keys())
+        return changed
+
+    def _invalidate_newcomers(self, user_ids):
+        """Drop entries that a changed supervisor would now enter."""
+        namespace = self.namespace
+        metas = [(key, meta) for key, meta in self.cache.metas() if key[0] == namespace]
+        if not metas or not user_ids:
+            return
+        rows = [self.engine.rows[u] for u in sorted(user_ids)]
+        vectors = self.engine.vectors.vectors(rows)
+        departments = np.asarray(self.engine.departments)[rows]
+        queries = np.stack([vector for _, (vector, _, _) in metas])
+        scores = queries @ vectors.T
+        stale = [
+            key
+            for (key, (_, threshold, department)), row in zip(metas, scores)
+            if np.any(
+                (row > threshold) & ((departments == department) | (not department))
+            )
+        ]
+        self.cache.discard(stale)
+
+    def stats(self):
+        return self.cache.stats()
+
+
+def print_stats(stats):
+    print(
+        f"Result cache: {stats['entries']} entries, {stats['hits']} hits, "
+        f"{stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), "
+        f"{stats['expirations']} expired, {stats['evictions']} evicted, "
+        f"{stats['invalidations']} invalidated"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interactive cached matching")
+    parser.add_argument("--top-k", type=int, default=5, help="Number of matches")
+    parser.add_argument("--department", help="Only supervisors in this department")
+    args = parser.parse_args(argv)
+
+    matcher = CachedMatcher.from_profiles_dir()
+    print("Enter research queries (empty line to quit)")
+    while True:
+        try:
+            query = input("> ").strip()
+        except EOFError:
+            break
+        if not query:
+            break
+        # Pick up profile edits made while the prompt is open
+        matcher.refresh()
+        start = time.perf_counter()
+        matches = matcher.match(query, args.top_k, args.department)
+        elapsed = (time.perf_counter() - start) * 1e6
+        print_matches(query, matches)
+        print(f"Matched in {elapsed:.0f} µs")
+    print_stats(matcher.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Split large markdown sources into token-budgeted chunks for extraction.
+
+CV pages converted by markdownify can be far larger than a comfortable prompt
+or regex pass (mostly inline base64 images and long publication lists). The
+chunker strips inline data URIs, splits the text at section headings, and packs
+whole sections into chunks of at most CHUNK_TOKEN_BUDGET estimated tokens.
+Sections larger than the budget are split at paragraph and then line
+boundaries, and each continuation chunk repeats the section heading so that
+section-based extractors still see which section the text belongs to.
+"""
+
+import os
+import re
+
+from src.processor.gemini_integration import PROMPT_TOKEN_BUDGET, estimate_tokens
+
+CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", PROMPT_TOKEN_BUDGET))
+
+INLINE_DATA_URI = re.compile(r"\(data:[^)\s]*\)")
+# Markdown headings, bold-only lines and short all-caps lines such as
+# "ACADEMIC QUALIFICATION", which is how the UM CV pages mark sections
+SECTION_HEADING = re.compile(
+    r"^(?:#{1,6}\s+\S.*|\*\*[^*\n]+\*\*:?|[A-Z][A-Z0-9 /&,()'-]{3,80}:?)\s*$"
+)
+
+
+def strip_inline_data(markdown):
+    """Replace inline data URIs (embedded images) with empty links."""
+    return INLINE_DATA_URI.sub("()", markdown)
+
+
+def split_sections(markdown):
+    """Split markdown into (heading, text) sections; text includes the heading."""
+    sections = []
+    heading = None
+    lines = []
+    for line in markdown.split("\n"):
+        if SECTION_HEADING.match(line.strip()) and any(l.strip() for l in lines):
+            sections.append((heading, "\n".join(lines)))
+            lines = []
+        if SECTION_HEADING.match(line.strip()):
+            heading = line.strip()
+        lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((heading, "\n".join(lines)))
+    return sections
+
+
+def _split_text(text, budget, separator):
+    """Greedily pack pieces of text (split on separator) under the budget."""
+    parts = []
+    current = []
+    current_tokens = 0
+    for piece in text.split(separator):
+        tokens = estimate_tokens(piece)
+        if current and current_tokens + tokens > budget:
+            parts.append(separator.join(current))
+            current = []
+            current_tokens = 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        parts.append(separator.join(current))
+    return parts
+
+
+def _split_oversized(text, budget):
+    """Split a section at paragraph, then line, then character boundaries."""
+    pieces = []
+    for paragraph_group in _split_text(text, budget, "\n\n"):
+        if estimate_tokens(paragraph_group) <= budget:
+            pieces.append(paragraph_group)
+            continue
+        for line_group in _split_text(paragraph_group, budget, "\n"):
+            if estimate_tokens(line_group) <= budget:
+                pieces.append(line_group)
+                continue
+            # A single enormous line; cut it at roughly budget-sized widths
+            width = max(budget * 2, 1)
+            pieces.extend(
+                line_group[i : i + width] for i in range(0, len(line_group), width)
+            )
+    return pieces
+
+
+def chunk_markdown(markdown, budget=CHUNK_TOKEN_BUDGET):
+    """Split markdown into chunks of at most about budget estimated tokens."""
+    markdown = strip_inline_data(markdown)
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n".join(current))
+        current = []
+        current_tokens = 0
+
+    for heading, text in split_sections(markdown):
+        tokens = estimate_tokens(text)
+        if tokens > budget:
+            flush()
+            heading_tokens = estimate_tokens(heading) if heading else 0
+            pieces = _split_oversized(text, max(budget - heading_tokens, budget // 2))
+            for i, piece in enumerate(pieces):
+                if i and heading:
+                    piece = f"{heading}\n{piece}"
+                chunks.append(piece)
+            continue
+
+        if current and current_tokens + tokens > budget:
+            flush()
+        current.append(text)
+        current_tokens += tokens
+
+    flush()
+    return chunks
@@ -0,0 +1,425 @@
+"""
+Batch mode for the Gemini merge pipeline.
+
+Instead of one request per supervisor, several supervisors' residual merge
+inputs are packed into a single request that shares one instruction header.
+The response is constrained to JSON by a response schema derived from
+docs/schema/profile_schema.json and is keyed by user_id, so no free-form YAML
+has to be parsed. Batches can be sent synchronously or submitted to Gemini's
+offline batch endpoint for overnight runs.
+
+Usage:
+    python -m src.processor.gemini_batch [--batch-size 8] [--offline] [--no-cache]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from dotenv import load_dotenv
+
+from src.processor.gemini_integration import (
+    PROMPT_TOKEN_BUDGET,
+    estimate_tokens,
+    merge_locally,
+    save_merged_profile,
+)
+from src.processor.llm_cache import LLMResponseCache
+from src.processor.llm_client import LLMClient
+from src.processor.merge_engine import apply_patch
+from src.utils.profile_io import dump_yaml
+
+load_dotenv()
+
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-pro-exp-03-25")
+API_BASE = os.getenv(
+    "GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta"
+)
+BATCH_TOKEN_BUDGET = int(os.getenv("BATCH_TOKEN_BUDGET", 4 * PROMPT_TOKEN_BUDGET))
+SCHEMA_PATH = (
+    Path(__file__).parent.parent.parent / "docs" / "schema" / "profile_schema.json"
+)
+
+# JSON Schema keywords that Gemini's response schema (an OpenAPI subset) rejects
+UNSUPPORTED_SCHEMA_KEYS = {
+    "$schema",
+    "title",
+    "additionalProperties",
+    "minLength",
+    "minItems",
+    "minimum",
+    "maximum",
+    "pattern",
+    "format",
+}
+
+BATCH_INSTRUCTIONS = """You are a helpful assistant trained to merge extracted data with existing YAML profiles.
+
+TASK: For each supervisor below, the existing profile has already been merged with everything
+that could be merged automatically. Resolve the remaining items for every supervisor and
+return one patch per supervisor following these rules:
+
+1. Include ONLY profile fields that need to be added or changed
+2. For each conflict, output the correct value for its field
+3. Convert unstructured fragments into structured entries; skip fragments that are not
+   genuine entries (navigation text, duplicates, noise)
+4. Publications need title, authors, venue and year; academic_background entries need
+   degree, field, institution and year
+5. Return exactly one result per supervisor, using the user_id given in its heading
+"""
+
+
+def _strip_schema(node, is_properties=False):
+    """Remove keywords Gemini's response schema does not support."""
+    if isinstance(node, dict):
+        # Inside "properties" the keys are field names (e.g. "title"), not keywords
+        return {
+            key: _strip_schema(value, is_properties=key == "properties")
+            for key, value in node.items()
+            if is_properties or key not in UNSUPPORTED_SCHEMA_KEYS
+        }
+    if isinstance(node, list):
+        return [_strip_schema(item) for item in node]
+    return node
+
+
+def build_response_schema(schema_path=SCHEMA_PATH):
+    """
+    Response schema for a batch: a list of {user_id, patch} results where each
+    patch is a profile with no required fields.
+    """
+    with open(schema_path, "r", encoding="utf-8") as f:
+        profile_schema = json.load(f)
+
+    patch_schema = _strip_schema(copy.deepcopy(profile_schema))
+    # A patch may touch any subset of fields, including within nested objects
+    # such as contact; list items keep their required fields.
+    patch_schema.pop("required", None)
+    patch_schema.pop("description", None)
+    for field_schema in patch_schema["properties"].values():
+        if field_schema.get("type") == "object":
+            field_schema.pop("required", None)
+
+    return {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "user_id": {"type": "string"},
+                        "patch": patch_schema,
+                    },
+                    "required": ["user_id", "patch"],
+                },
+            }
+        },
+        "required": ["results"],
+    }
+
+
+def _dump(data):
+    return dump_yaml(data)
+
+
+def _supervisor_section(user_id, merge_result):
+    profile = merge_result.profile
+    context = {
+        key: profile[key]
+        for key in ("name", "position", "department")
+        if key in profile
+    }
+    return f"""
+### user_id: {user_id}
+
+PROFILE CONTEXT:
+```yaml
+{_dump(context)}```
+
+ITEMS TO RESOLVE:
+```yaml
+{_dump(merge_result.residual())}```
+"""
+
+
+def build_batch_prompt(entries):
+    """Build one prompt for a list of (user_id, MergeResult) entries."""
+    sections = [_supervisor_section(user_id, result) for user_id, result in entries]
+    return BATCH_INSTRUCTIONS + "".join(sections)
+
+
+def pack_batches(entries, batch_size, budget=BATCH_TOKEN_BUDGET):
+    """Group entries into batches bounded by both count and estimated tokens."""
+    header_tokens = estimate_tokens(BATCH_INSTRUCTIONS)
+    batches = []
+    current = []
+    current_tokens = header_tokens
+
+    for user_id, result in entries:
+        tokens = estimate_tokens(_supervisor_section(user_id, result))
+        if current and (len(current) >= batch_size or current_tokens + tokens > budget):
+            batches.append(current)
+            current = []
+            current_tokens = header_tokens
+        current.append((user_id, result))
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+class GeminiBatchClient:
+    """Minimal REST client for structured Gemini requests and batch jobs."""
+
+    provider = "gemini"
+    # Keyed like the update clients, so responses are cached per provider
+    cache_model = LLMClient.cache_model
+
+    def __init__(self, api_key, model_name=MODEL_NAME, api_base=API_BASE, timeout=300):
+        self.model_name = model_name
+        self.client = httpx.Client(
+            base_url=api_base,
+            params={"key": api_key},
+            timeout=timeout,
+        )
+        self.response_schema = build_response_schema()
+
+    def _request_body(self, prompt):
+        return {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "responseMimeType": "application/json",
+                "responseSchema": self.response_schema,
+            },
+        }
+
+    @property
+    def generation_config(self):
+        """Config that, together with model and prompt, identifies a response."""
+        return {"responseMimeType": "application/json", "schema": self.response_schema}
+
+    @staticmethod
+    def response_text(response):
+        """Extract the text of the first candidate of a generateContent response."""
+        parts = response["candidates"][0]["content"]["parts"]
+        return "".join(part.get("text", "") for part in parts)
+
+    def generate(self, prompt):
+        """Send one structured request and return the response text."""
+        response = self.client.post(
+            f"/models/{self.model_name}:generateContent",
+            json=self._request_body(prompt),
+        )
+        response.raise_for_status()
+        return self.response_text(response.json())
+
+    def submit_batch(self, prompts, display_name="profile-merge"):
+        """Submit prompts keyed by name to the offline batch endpoint."""
+        requests = [
+            {"request": self._request_body(prompt), "metadata": {"key": key}}
+            for key, prompt in prompts.items()
+        ]
+        response = self.client.post(
+            f"/models/{self.model_name}:batchGenerateContent",
+            json={
+                "batch": {
+                    "display_name": display_name,
+                    "input_config": {"requests": {"requests": requests}},
+                }
+            },
+        )
+        response.raise_for_status()
+        return response.json()["name"]
+
+    def wait_for_batch(self, name, poll_interval=60, timeout=24 * 3600):
+        """Poll a batch job until it finishes and return response texts by key."""
+        deadline = time.monotonic() + timeout
+        while True:
+            response = self.client.get(f"/{name}")
+            response.raise_for_status()
+            operation = response.json()
+
+            if operation.get("done"):
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Batch {name} did not finish in {timeout}s")
+            time.sleep(poll_interval)
+
+        if "error" in operation:
+            raise RuntimeError(f"Batch {name} failed: {operation['error']}")
+
+        inlined = operation["response"]["inlinedResponses"]["inlinedResponses"]
+        return {
+            item["metadata"]["key"]: self.response_text(item["response"])
+            for item in inlined
+            if "response" in item
+        }
+
+    def close(self):
+        self.client.close()
+
+
+def parse_batch_response(response_text):
+    """Map user_id to patch from a structured batch response."""
+    data = json.loads(response_text)
+    return {
+        item["user_id"]: item.get("patch") or {} for item in data.get("results", [])
+    }
+
+
+def apply_batch_results(batch, patches):
+    """Apply patches to the batch's merged profiles. Returns the ids updated."""
+    updated = []
+    for user_id, result in batch:
+        if user_id not in patches:
+            print(f"❌ No result returned for {user_id}")
+            continue
+        profile = apply_patch(result.profile, patches[user_id]).profile
+        save_merged_profile(user_id, profile)
+        updated.append(user_id)
+        print(f"✅ Successfully updated profile for {user_id}")
+    return updated
+
+
+def collect_entries(user_ids):
+    """Merge each supervisor locally and return those that still need the LLM."""
+    entries = []
+    for user_id in user_ids:
+        result = merge_locally(user_id)
+        if result is None:
+            continue
+        if result.changes:
+            save_merged_profile(user_id, result.profile)
+            print(f"Merged {len(result.changes)} changes locally for {user_id}")
+        if result.needs_llm:
+            entries.append((user_id, result))
+    return entries
+
+
+def run_batches(client, batches, cache=None, offline=False, poll_interval=60):
+    """
+    Send the batches (synchronously or as one offline job) and apply results.
+
+    Synchronous batches are parsed, cached and applied as each response
+    arrives, so a failed request only loses its own batch.
+    """
+    prompts = {f"batch-{i}": build_batch_prompt(b) for i, b in enumerate(batches)}
+    responses = {}
+
+    if cache:
+        for key, prompt in prompts.items():
+            cached = cache.get(client.cache_model, prompt, client.generation_config)
+            if cached is not None:
+                responses[key] = cached
+
+    pending = {k: p for k, p in prompts.items() if k not in responses}
+    if pending and offline:
+        try:
+            name = client.submit_batch(pending)
+            print(f"Submitted offline batch job {name} with {len(pending)} requests")
+            responses.update(client.wait_for_batch(name, poll_interval=poll_interval))
+        except (httpx.HTTPError, TimeoutError, RuntimeError) as e:
+            # Expired or failed jobs; the cached batches are still applied
+            print(f"❌ Error running offline batch job: {e}")
+
+    updated = []
+    for i, batch in enumerate(batches):
+        key = f"batch-{i}"
+        if key in pending and not offline:
+            print(f"   Calling Gemini API with model {client.model_name} ({key})...")
+            try:
+                responses[key] = client.generate(pending[key])
+            except httpx.HTTPError as e:
+                print(f"❌ Error calling Gemini API for {key}: {e}")
+                continue
+        if key not in responses:
+            print(f"❌ No response for {key}")
+            continue
+        try:
+            patches = parse_batch_response(responses[key])
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            print(f"❌ Error: Invalid structured response for {key}: {e}")
+            continue
+        if cache and key in pending:
+            cache.put(
+                client.cache_model,
+                prompts[key],
+                responses[key],
+                client.generation_config,
+            )
+        updated.extend(apply_batch_results(batch, patches))
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Merge extracted data into profiles with batched Gemini requests"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=8, help="Supervisors per request"
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Submit to Gemini's offline batch endpoint and wait for the job",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=int,
+        default=60,
+        help="Seconds between status checks of an offline batch job",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the API instead of reusing cached responses",
+    )
+    args = parser.parse_args()
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        print("Error: GEMINI_API_KEY not found in .env file")
+        return 1
+
+    extracted_dir = Path("data/extracted")
+    user_ids = sorted(
+        f.name.replace("_extracted.yaml", "")
+        for f in extracted_dir.glob("*_extracted.yaml")
+    )
+    entries = collect_entries(user_ids)
+    if not entries:
+        print("No LLM merges needed.")
+        return 0
+
+    batches = pack_batches(entries, args.batch_size)
+    print(f"Packed {len(entries)} supervisors into {len(batches)} request(s).")
+
+    cache = None if args.no_cache else LLMResponseCache()
+    client = GeminiBatchClient(api_key)
+    try:
+        updated = run_batches(
+            client,
+            batches,
+            cache=cache,
+            offline=args.offline,
+            poll_interval=args.poll_interval,
+        )
+    finally:
+        client.close()
+
+    print(f"\nSummary: Successfully updated {len(updated)}/{len(entries)} profiles")
+    if cache:
+        print(cache.format_stats())
+        cache.close()
+    return 0 if len(updated) == len(entries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,58 +6,222 @@ with Google Gemini 2.5 Pro to update the supervisor YAML profiles.
 
 After running processor.py, you'll have extracted data files in the 'data/extracted' directory
 with "_extracted.yaml" suffix alongside the original profiles.
+
+Everything that can be merged by rules (deduplicated lists, missing fields,
+contact details and profile links) is merged locally by merge_engine.py and
+written straight to the profile. Only the residual - conflicting values and
+unstructured text fragments - is turned into a prompt for Gemini, which answers
+with a YAML patch that the update scripts apply on top of the profile.
+
+Each prompt is kept within PROMPT_TOKEN_BUDGET estimated tokens; a residual that
+does not fit is split across several prompt files ({user_id}_part2_prompt.txt, ...).
 """
 
 import os
-import yaml
+import re
 from pathlib import Path
 
+from src.processor.merge_engine import merge_profile
+from src.store.version_store import save_profile_version
+from src.utils.profile_io import dump_yaml, read_yaml
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 4000))
+PROMPT_FILE_PATTERN = re.compile(r"^(?P<user_id>.+?)(?:_part\d+)?_prompt\.txt$")
+
+
+def estimate_tokens(text):
+    """
+    Rough token count for budgeting prompts.
+
+    Gemini's tokenizer averages about four characters per token on English text;
+    dense text such as DOIs and author lists runs closer to one token per word
+    piece, so the larger of the two estimates is used.
+    """
+    words = len(re.findall(r"\w+|[^\w\s]", text))
+    return max((len(text) + 3) // 4, int(words * 0.75))
+
 
-def generate_gemini_prompt(user_id):
+def prompt_user_id(prompt_file_name):
+    """Map a prompt file name (including split parts) back to its user_id."""
+    match = PROMPT_FILE_PATTERN.match(os.path.basename(prompt_file_name))
+    return match.group("user_id") if match else None
+
+
+def merge_locally(user_id):
     """
-    Generate a prompt for Google Gemini 2.5 Pro to update a supervisor's profile.
+    Merge a supervisor's extracted data into their profile using the rule engine.
+
+    Returns a MergeResult, or None if there is no extracted data for the user.
     """
     profile_file = f"data/profiles/{user_id}.yaml"
     extracted_file = f"data/extracted/{user_id}_extracted.yaml"
 
     if not os.path.exists(extracted_file):
-        return f"No extracted data found for {user_id}"
+        return None
 
     # Load the profile and extracted data
-    with open(profile_file, "r", encoding="utf-8") as f:
-        existing_profile = yaml.safe_load(f)
+    existing_profile = read_yaml(profile_file)
+    extracted_data = read_yaml(extracted_file)
+
+    return merge_profile(existing_profile, extracted_data)
+
+
+def _residual_items(residual):
+    """Flatten a residual into (section, field, item) triples."""
+    items = [("conflicts", None, c) for c in residual.get("conflicts", [])]
+    for field_name, values in residual.get("unstructured", {}).items():
+        if isinstance(values, list):
+            items.extend(("unstructured", field_name, v) for v in values)
+        else:
+            items.append(("unstructured", field_name, values))
+    return items
+
+
+def _residual_from_items(items):
+    residual = {}
+    for section, field_name, item in items:
+        if section == "conflicts":
+            residual.setdefault("conflicts", []).append(item)
+        elif isinstance(item, dict):
+            residual.setdefault("unstructured", {})[field_name] = item
+        else:
+            residual.setdefault("unstructured", {}).setdefault(field_name, []).append(
+                item
+            )
+    return residual
+
+
+def split_residual(residual, budget):
+    """
+    Pack residual items into as few chunks as possible within a token budget.
+
+    An item that is larger than the budget on its own gets a chunk to itself.
+    Each item is sized once, with its section and field headers, and a chunk
+    keeps a running total; that total never underestimates the chunk as a
+    whole, since headers shared by several items are counted for each.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for item in _residual_items(residual):
+        tokens = estimate_tokens(_dump(_residual_from_items([item])))
+        if current and current_tokens + tokens > budget:
+            chunks.append(_residual_from_items(current))
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        chunks.append(_residual_from_items(current))
+    return chunks
+
+
+def _dump(data):
+    return dump_yaml(data)
 
-    with open(extracted_file, "r", encoding="utf-8") as f:
-        extracted_data = yaml.safe_load(f)
+
+def generate_gemini_prompt(user_id, merge_result=None, residual=None):
+    """
+    Generate a prompt for Google Gemini 2.5 Pro covering only what the local
+    merge could not resolve. Returns None when nothing is left for the LLM.
+    """
+    if merge_result is None:
+        merge_result = merge_locally(user_id)
+    if merge_result is None or not merge_result.needs_llm:
+        return None
+    if residual is None:
+        residual = merge_result.residual()
+
+    profile = merge_result.profile
+    context = {
+        key: profile[key]
+        for key in ("name", "position", "department")
+        if key in profile
+    }
 
     # Create the prompt for Gemini
     prompt = f"""You are a helpful assistant trained to merge extracted data with existing YAML profiles.
 
-TASK: Merge the extracted data into the existing profile for Professor {user_id} while following these rules:
+TASK: The existing profile for Professor {user_id} has already been merged with everything
+that could be merged automatically. Resolve the remaining items below and return a YAML
+patch following these rules:
 
-1. IMPORTANT: Add new information without removing any existing information
-2. Merge similar sections, combining data appropriately
-3. Ensure the final result is valid YAML with proper indentation
-4. Remove any duplicates (e.g., in publications, research interests)
-5. Format inline lists as YAML lists with proper indentation
-6. Prioritize newer information when there are conflicts
+1. Output ONLY profile fields that need to be added or changed, using the profile schema
+   field names (e.g. publications, academic_background, contact, profile_links)
+2. For each conflict, output the correct value for its field
+3. Convert unstructured fragments into structured entries; skip fragments that are not
+   genuine entries (navigation text, duplicates, noise)
+4. Publications need title, authors, venue and year; academic_background entries need
+   degree, field, institution and year
+5. Ensure the result is valid YAML with proper indentation
 
-EXISTING PROFILE:
+PROFILE CONTEXT:
 ```yaml
-{yaml.dump(existing_profile, default_flow_style=False, allow_unicode=True)}
+{_dump(context)}
 ```
 
-EXTRACTED DATA:
+ITEMS TO RESOLVE:
 ```yaml
-{yaml.dump(extracted_data, default_flow_style=False, allow_unicode=True)}
+{_dump(residual)}
 ```
 
-OUTPUT FORMAT: Provide ONLY the updated YAML content without any additional explanations or conversation.
+OUTPUT FORMAT: Provide ONLY the YAML patch without any additional explanations or conversation.
 """
 
     return prompt
 
 
+def build_gemini_prompts(user_id, merge_result=None, budget=PROMPT_TOKEN_BUDGET):
+    """
+    Build the prompts for a supervisor, splitting the residual so that each
+    prompt stays within the token budget. Returns an empty list when the local
+    merge resolved everything.
+    """
+    if merge_result is None:
+        merge_result = merge_locally(user_id)
+    if merge_result is None or not merge_result.needs_llm:
+        return []
+
+    # The instructions and context are repeated in every prompt
+    overhead = estimate_tokens(generate_gemini_prompt(user_id, merge_result, {}))
+    chunks = split_residual(merge_result.residual(), max(budget - overhead, 1))
+    return [generate_gemini_prompt(user_id, merge_result, chunk) for chunk in chunks]
+
+
+def prompt_file_name(user_id, part):
+    """File name of the given (1-based) prompt part for a supervisor."""
+    if part == 1:
+        return f"{user_id}_prompt.txt"
+    return f"{user_id}_part{part}_prompt.txt"
+
+
+def save_merged_profile(user_id, profile):
+    """Write a locally merged profile as a new revision in its history."""
+    save_profile_version(user_id, profile, "local merge")
+
+
+def write_gemini_prompts(user_id, merge_result, prompt_dir=Path("data/prompts")):
+    """
+    Replace a supervisor's prompt files with prompts for the given merge result.
+
+    Returns the prompts written, which is empty when nothing is left for the LLM.
+    """
+    prompt_dir = Path(prompt_dir)
+    prompt_dir.mkdir(exist_ok=True, parents=True)
+
+    # Remove stale prompts so the update scripts only see the current ones
+    for stale in prompt_dir.glob(f"{user_id}_*prompt.txt"):
+        if prompt_user_id(stale.name) == user_id:
+            stale.unlink()
+
+    prompts = build_gemini_prompts(user_id, merge_result)
+    for part, prompt in enumerate(prompts, start=1):
+        with open(
+            prompt_dir / prompt_file_name(user_id, part), "w", encoding="utf-8"
+        ) as f:
+            f.write(prompt)
+    return prompts
+
+
 def create_gemini_inputs():
     """
     Create prompt files for each supervisor to use with Google Gemini 2.5 Pro.
@@ -71,13 +235,19 @@ def create_gemini_inputs():
 
     for file in extracted_files:
         user_id = file.replace("_extracted.yaml", "")
-        prompt = generate_gemini_prompt(user_id)
+        result = merge_locally(user_id)
 
-        prompt_file = prompt_dir / f"{user_id}_prompt.txt"
-        with open(prompt_file, "w", encoding="utf-8") as f:
-            f.write(prompt)
+        if result.changes:
+            save_merged_profile(user_id, result.profile)
+            print(f"Merged {len(result.changes)} changes locally for {user_id}")
+
+        prompts = write_gemini_prompts(user_id, result, prompt_dir)
+        if not prompts:
+            print(f"No LLM merge needed for {user_id}")
+            continue
 
-        print(f"Created prompt for {user_id}")
+        tokens = sum(estimate_tokens(p) for p in prompts)
+        print(f"Created {len(prompts)} prompt(s) for {user_id} (~{tokens} tokens)")
 
 
 def main():
@@ -99,7 +269,7 @@ def main():
     print("1. Go to the 'data/prompts' directory")
     print("2. For each file, copy the content and paste it to Google Gemini 2.5 Pro")
     print(
-        "3. Save Gemini's response as the updated YAML file in 'data/profiles' directory, replacing the original file"
+        "3. Merge Gemini's YAML patch into the matching profile in 'data/profiles' directory"
     )
     print("4. After updating each profile, you can delete the _extracted.yaml file")
     print(
@@ -0,0 +1,152 @@
+"""
+Persistent cache for LLM responses used by the Gemini update scripts.
+
+Responses are stored in a local SQLite database keyed by the model name, a hash
+of the normalized prompt and the generation config, so re-running an update
+after a crash or a validation tweak does not pay for the same call twice.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+DEFAULT_CACHE_PATH = Path(
+    os.getenv("LLM_CACHE_PATH", DATA_DIR / "cache" / "llm_responses.sqlite")
+)
+DEFAULT_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+def normalize_prompt(prompt):
+    """Normalize line endings and trailing whitespace so cosmetic edits still hit."""
+    lines = prompt.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def make_cache_key(model_name, prompt, generation_config=None):
+    """Build the cache key from model, normalized prompt hash and generation config."""
+    prompt_hash = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    config = json.dumps(generation_config or {}, sort_keys=True, default=str)
+    return hashlib.sha256(
+        f"{model_name}\x00{prompt_hash}\x00{config}".encode("utf-8")
+    ).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache with size-based LRU eviction."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used_idx ON responses(last_used)"
+        )
+        self.conn.commit()
+
+    def get(self, model_name, prompt, generation_config=None):
+        """Return the cached response text, or None on a miss."""
+        key = make_cache_key(model_name, prompt, generation_config)
+        row = self.conn.execute(
+            "SELECT response FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.conn.execute(
+            "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        self.conn.commit()
+        return row[0]
+
+    def put(self, model_name, prompt, response_text, generation_config=None):
+        """Store a response and evict old entries if the cache is over budget."""
+        key = make_cache_key(model_name, prompt, generation_config)
+        now = time.time()
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO responses
+                (key, model, response, size, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                key,
+                model_name,
+                response_text,
+                len(response_text.encode("utf-8")),
+                now,
+                now,
+            ),
+        )
+        self.conn.commit()
+        self.evict()
+
+    def total_size(self):
+        """Total size in bytes of all cached responses."""
+        row = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return row[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        excess = self.total_size() - self.max_bytes
+        if excess <= 0:
+            return 0
+
+        removed = 0
+        rows = self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_used ASC"
+        ).fetchall()
+        for key, size in rows:
+            if excess <= 0:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            excess -= size
+            removed += 1
+        self.conn.commit()
+        return removed
+
+    def stats(self):
+        """Return hit/miss counters for this session and the on-disk footprint."""
+        lookups = self.hits + self.misses
+        entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": self.total_size(),
+        }
+
+    def format_stats(self):
+        """Human-readable one-line summary of the cache statistics."""
+        s = self.stats()
+        return (
+            f"Cache: {s['hits']} hits, {s['misses']} misses "
+            f"({s['hit_rate']:.0%} hit rate), {s['entries']} entries, "
+            f"{s['size_bytes'] / 1024:.1f} KB on disk"
+        )
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,282 @@
+"""
+Provider-agnostic LLM client used by the profile update scripts.
+
+One long-lived client is kept per provider and model (see get_client), so the
+underlying HTTP connection pool is reused across profiles instead of being set
+up for every call. Each client exposes the same sync and async interface:
+
+    generate(prompt, config=None) -> str
+    stream(prompt, config=None) -> iterator of text chunks
+    agenerate(prompt, config=None) -> str (awaitable)
+    astream(prompt, config=None) -> async iterator of text chunks
+
+Backends:
+    gemini  - Google Gemini through the google-genai SDK (GEMINI_API_KEY, GEMINI_MODEL)
+    local   - any OpenAI-compatible server such as LM Studio
+              (LM_STUDIO_API_URL, LOCAL_LLM_MODEL, optional LOCAL_LLM_API_KEY)
+
+The provider defaults to LLM_PROVIDER, or gemini when that is not set.
+"""
+
+import asyncio
+import json
+import os
+import threading
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+# Model name sent to local servers when LOCAL_LLM_MODEL is not set; LM Studio
+# answers it with whichever model is loaded
+LOCAL_PLACEHOLDER_MODEL = "local-model"
+POOL_LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=16)
+REQUEST_TIMEOUT = httpx.Timeout(300.0, connect=10.0)
+
+
+class LLMClient:
+    """Interface shared by all providers."""
+
+    provider = None
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    @property
+    def cache_model(self):
+        """Provider and model, as the model part of a response cache key."""
+        return f"{self.provider}:{self.model_name}"
+
+    def generate(self, prompt, config=None):
+        raise NotImplementedError
+
+    def stream(self, prompt, config=None):
+        raise NotImplementedError
+
+    async def agenerate(self, prompt, config=None):
+        raise NotImplementedError
+
+    async def astream(self, prompt, config=None):
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    def close(self):
+        pass
+
+
+class GeminiClient(LLMClient):
+    """Gemini backend on a single google-genai client."""
+
+    provider = "gemini"
+
+    def __init__(self, model_name=None, api_key=None):
+        from google import genai
+
+        super().__init__(
+            model_name or os.getenv("GEMINI_MODEL", "gemini-2.5-pro-exp-03-25")
+        )
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError(
+                "GEMINI_API_KEY environment variable not set. Please create a .env file based on .env.example"
+            )
+        self.client = genai.Client(api_key=api_key)
+
+    def generate(self, prompt, config=None):
+        response = self.client.models.generate_content(
+            model=self.model_name, contents=prompt, config=config
+        )
+        return response.text
+
+    def stream(self, prompt, config=None):
+        for chunk in self.client.models.generate_content_stream(
+            model=self.model_name, contents=prompt, config=config
+        ):
+            yield chunk.text or ""
+
+    async def agenerate(self, prompt, config=None):
+        response = await self.client.aio.models.generate_content(
+            model=self.model_name, contents=prompt, config=config
+        )
+        return response.text
+
+    async def astream(self, prompt, config=None):
+        stream = await self.client.aio.models.generate_content_stream(
+            model=self.model_name, contents=prompt, config=config
+        )
+        async for chunk in stream:
+            yield chunk.text or ""
+
+
+class OpenAICompatibleClient(LLMClient):
+    """Backend for OpenAI-compatible chat completion servers such as LM Studio."""
+
+    provider = "local"
+
+    def __init__(self, model_name=None, base_url=None, api_key=None):
+        super().__init__(
+            model_name or os.getenv("LOCAL_LLM_MODEL", LOCAL_PLACEHOLDER_MODEL)
+        )
+        self.base_url = base_url or os.getenv(
+            "LM_STUDIO_API_URL", "http://localhost:1234/v1"
+        )
+        api_key = api_key or os.getenv("LOCAL_LLM_API_KEY")
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            headers=headers,
+            limits=POOL_LIMITS,
+            timeout=REQUEST_TIMEOUT,
+        )
+        self._async_client = None
+        self._async_loop = None
+        self._headers = headers
+        self._served_model = None
+
+    @property
+    def async_client(self):
+        # Created lazily so it binds to the event loop that first uses it, and
+        # again if that loop has since been closed
+        if self._async_client is None or self._async_loop.is_closed():
+            self._async_loop = asyncio.get_running_loop()
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers,
+                limits=POOL_LIMITS,
+                timeout=REQUEST_TIMEOUT,
+            )
+        return self._async_client
+
+    @property
+    def cache_model(self):
+        return f"{self.provider}:{self.served_model()}"
+
+    def served_model(self):
+        """
+        The model that answers requests: the configured name, or for the
+        placeholder the model the server reports as loaded, so switching
+        models in LM Studio does not serve another model's cached responses.
+        Asked once per client; a failed lookup is retried on the next call.
+        """
+        if self.model_name != LOCAL_PLACEHOLDER_MODEL:
+            return self.model_name
+        if self._served_model is None:
+            try:
+                response = self.client.get("/models")
+                response.raise_for_status()
+                models = response.json().get("data") or []
+            except (httpx.HTTPError, ValueError):
+                return self.model_name
+            if models:
+                self._served_model = models[0].get("id", self.model_name)
+        return self._served_model or self.model_name
+
+    def _body(self, prompt, config, stream):
+        return {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream,
+            **(config or {}),
+        }
+
+    @staticmethod
+    def _delta(line):
+        """Text carried by one server-sent event line, or None."""
+        if not line.startswith("data:"):
+            return None
+        data = line[len("data:") :].strip()
+        if not data or data == "[DONE]":
+            return None
+        choices = json.loads(data).get("choices") or [{}]
+        return choices[0].get("delta", {}).get("content")
+
+    def generate(self, prompt, config=None):
+        response = self.client.post(
+            "/chat/completions", json=self._body(prompt, config, stream=False)
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    def stream(self, prompt, config=None):
+        with self.client.stream(
+            "POST", "/chat/completions", json=self._body(prompt, config, stream=True)
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                text = self._delta(line)
+                if text:
+                    yield text
+
+    async def agenerate(self, prompt, config=None):
+        response = await self.async_client.post(
+            "/chat/completions", json=self._body(prompt, config, stream=False)
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def astream(self, prompt, config=None):
+        async with self.async_client.stream(
+            "POST", "/chat/completions", json=self._body(prompt, config, stream=True)
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                text = self._delta(line)
+                if text:
+                    yield text
+
+    async def aclose(self):
+        """Close both connection pools, from the event loop that used them."""
+        self.client.close()
+        if self._async_client is not None:
+            async_client, self._async_client = self._async_client, None
+            await async_client.aclose()
+
+    def close(self):
+        """
+        Close both connection pools. Pooled async connections can only be
+        closed on their own event loop: from inside it, prefer aclose(); once
+        it has been closed, its connections were closed with it.
+        """
+        self.client.close()
+        if self._async_client is None:
+            return
+        async_client, self._async_client = self._async_client, None
+        if self._async_loop.is_running():
+            self._async_loop.create_task(async_client.aclose())
+        elif not self._async_loop.is_closed():
+            self._async_loop.run_until_complete(async_client.aclose())
+
+
+PROVIDERS = {
+    "gemini": GeminiClient,
+    "local": OpenAICompatibleClient,
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(provider=None, model_name=None):
+    """Return the shared client for a provider and model, creating it once."""
+    provider = provider or DEFAULT_PROVIDER
+    if provider not in PROVIDERS:
+        raise ValueError(
+            f"Unknown LLM provider {provider!r}; choose from {', '.join(PROVIDERS)}"
+        )
+
+    key = (provider, model_name)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = PROVIDERS[provider](model_name=model_name)
+        return _clients[key]
+
+
+def close_clients():
+    """Close every shared client, e.g. at the end of a run."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,382 @@
+"""
+Rule-based merge of extracted data into supervisor profiles.
+
+Most of what processor.py extracts is mechanical to merge: a phone number that
+is missing from the profile, a research interest that is already listed, a
+Google Scholar link. This module merges those locally following the profile
+schema in docs/schema/profile_schema.json and only leaves behind a small
+residual (genuine conflicts and unstructured text fragments) for the LLM.
+"""
+
+import copy
+import re
+from dataclasses import dataclass, field
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+# How list items are matched against each other, per profile field. Each entry
+# is a list of alternative identity keys; two items are the same if any of the
+# alternatives has the same (normalized, non-empty) value on both.
+LIST_IDENTITY_KEYS = {
+    "academic_background": [("degree", "institution"), ("degree", "year")],
+    "publications": [("doi",), ("title",)],
+    "conference_publications": [("doi",), ("title",)],
+    "book_chapters": [("doi",), ("title",)],
+    "projects": [("title",)],
+    "roles": [("title", "organization")],
+    "professional_memberships": [("name",)],
+    "awards": [("title",), ("name",)],
+    "phd": [("name",)],
+    "masters": [("name",)],
+    "undergraduate": [("name",)],
+}
+DEFAULT_IDENTITY_KEYS = [("doi",), ("title",), ("name",)]
+
+# Values produced by regex heuristics that are too noisy to override or
+# conflict with curated data; they only fill gaps.
+LOW_CONFIDENCE_FIELDS = {"contact.office"}
+
+# Known academic profile hosts, used to sort extracted links into profile_links
+LINK_HOSTS = {
+    "scholar.google": "google_scholar",
+    "orcid.org": "orcid",
+    "scopus.com": "scopus",
+    "researchgate.net": "researchgate",
+    "linkedin.com": "linkedin",
+    "dblp.org": "dblp",
+    "academia.edu": "academia",
+    "webofscience.com": "web_of_science",
+}
+
+# Query parameters that do not identify a profile page
+IGNORED_URL_PARAMS = {"hl", "authuser", "fbclid", "oi", "view_op"}
+
+DEGREE_PATTERN = re.compile(
+    r"\b(?:phd|ph\.d|doctor|doctorate|master|msc|m\.sc|mse|bsc|b\.sc|bachelor|degree|diploma)",
+    re.IGNORECASE,
+)
+DOI_PATTERN = re.compile(r"10\.\d{4,}(?:\.\d+)*/[^\s,;]+[^\s,;.)]")
+
+
+@dataclass
+class MergeResult:
+    """Outcome of a local merge: the merged profile and what is left for the LLM."""
+
+    profile: dict
+    conflicts: list = field(default_factory=list)
+    unstructured: dict = field(default_factory=dict)
+    changes: list = field(default_factory=list)
+
+    @property
+    def needs_llm(self):
+        return bool(self.conflicts or self.unstructured)
+
+    def residual(self):
+        """The part of the extracted data that could not be merged by rules."""
+        residual = {}
+        if self.conflicts:
+            residual["conflicts"] = self.conflicts
+        if self.unstructured:
+            residual["unstructured"] = self.unstructured
+        return residual
+
+
+def normalize_text(value):
+    """Casefold and strip punctuation so near-identical strings compare equal."""
+    text = str(value).replace("\xa0", " ").casefold()
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+def normalize_phone(value):
+    """Reduce a Malaysian phone number to its digits without country/trunk prefix."""
+    digits = re.sub(r"\D", "", str(value))
+    if digits.startswith("60"):
+        digits = digits[2:]
+    return digits.lstrip("0")
+
+
+def clean_url(url):
+    """Strip markdown debris such as trailing ')' or '.' from an extracted URL."""
+    url = str(url).strip().split("](")[0]
+    url = url.rstrip(")*.,;'\"]").replace("\\_", "_")
+    parsed = urlparse(url)
+    if not parsed.netloc or parsed.path.strip("/") == "":
+        return None
+    return url
+
+
+def normalize_url(url):
+    """Canonical form of a URL for equality checks."""
+    parsed = urlparse(str(url).strip().rstrip("/"))
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    # Country mirrors such as scholar.google.com.my point at the same profile
+    host = re.sub(r"\.com\.[a-z]{2}$", ".com", host)
+    params = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query) if k not in IGNORED_URL_PARAMS
+    )
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{host}{parsed.path.rstrip('/')}{query}"
+
+
+def is_empty(value):
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _values_equal(path, a, b):
+    if path.endswith("phone"):
+        return normalize_phone(a) == normalize_phone(b)
+    if isinstance(a, str) and a.startswith("http") and isinstance(b, str):
+        return normalize_url(a) == normalize_url(b)
+    return normalize_text(a) == normalize_text(b)
+
+
+def _identity(item, keys):
+    """Identity values of a list item, one per alternative key set."""
+    if not isinstance(item, dict):
+        return [("value", normalize_text(item))]
+
+    identities = []
+    for key_set in keys:
+        values = [item.get(k) for k in key_set]
+        if all(not is_empty(v) for v in values):
+            identities.append(
+                (key_set, tuple(normalize_text(v) for v in values))
+            )
+    return identities
+
+
+class MergeEngine:
+    """Merges structured data into a profile, recording conflicts."""
+
+    def __init__(self, prefer_incoming=False):
+        # With prefer_incoming the incoming side wins scalar conflicts; this is
+        # how LLM patches resolving earlier conflicts are applied.
+        self.prefer_incoming = prefer_incoming
+
+    def merge(self, base, incoming, result, path=""):
+        """Merge incoming into base (in place) and return the merged value."""
+        if isinstance(base, dict) and isinstance(incoming, dict):
+            return self._merge_maps(base, incoming, result, path)
+        if isinstance(base, list) and isinstance(incoming, list):
+            return self._merge_lists(base, incoming, result, path)
+        return self._merge_scalar(base, incoming, result, path)
+
+    def _merge_maps(self, base, incoming, result, path):
+        for key, value in incoming.items():
+            child_path = f"{path}.{key}" if path else key
+            if is_empty(value):
+                continue
+            if key not in base or is_empty(base[key]):
+                base[key] = copy.deepcopy(value)
+                result.changes.append(f"added {child_path}")
+            else:
+                base[key] = self.merge(base[key], value, result, child_path)
+        return base
+
+    def _merge_lists(self, base, incoming, result, path):
+        field_name = path.rsplit(".", 1)[-1]
+        keys = LIST_IDENTITY_KEYS.get(field_name, DEFAULT_IDENTITY_KEYS)
+
+        index = {}
+        for i, item in enumerate(base):
+            for identity in _identity(item, keys):
+                index.setdefault(identity, i)
+
+        for item in incoming:
+            if is_empty(item):
+                continue
+            identities = _identity(item, keys)
+            match = next((index[i] for i in identities if i in index), None)
+
+            if match is None:
+                base.append(copy.deepcopy(item))
+                for identity in _identity(item, keys):
+                    index.setdefault(identity, len(base) - 1)
+                result.changes.append(f"added item to {path}")
+            elif isinstance(item, dict) and isinstance(base[match], dict):
+                self._merge_maps(base[match], item, result, f"{path}[{match}]")
+        return base
+
+    def _merge_scalar(self, base, incoming, result, path):
+        if is_empty(incoming) or _values_equal(path, base, incoming):
+            return base
+        if is_empty(base):
+            result.changes.append(f"set {path}")
+            return incoming
+        if self.prefer_incoming:
+            result.changes.append(f"replaced {path}")
+            return incoming
+        if path not in LOW_CONFIDENCE_FIELDS:
+            result.conflicts.append(
+                {"field": path, "existing": base, "extracted": incoming}
+            )
+        return base
+
+
+def _classify_links(social_profiles):
+    """Turn processor.py's social_profiles lists into a profile_links map."""
+    links = {}
+    for key, urls in (social_profiles or {}).items():
+        if isinstance(urls, str):
+            urls = [urls]
+        for raw in urls or []:
+            url = clean_url(raw)
+            if not url:
+                continue
+            host = urlparse(url).netloc.lower()
+            link_key = next(
+                (name for marker, name in LINK_HOSTS.items() if marker in host),
+                None if key == "website" else key,
+            )
+            if link_key and link_key not in links:
+                links[link_key] = url
+    return links
+
+
+def _split_fragments(text):
+    """Split a block of publication text into individual entries."""
+    parts = re.split(r"\n\s*\n|\n\s*\d+\.\s+|\n-\s+", str(text))
+    return [" ".join(p.split()) for p in parts if len(p.strip()) > 30]
+
+
+def _known_publication(fragment, profile):
+    """Whether a free-text publication fragment is already in the profile."""
+    norm_fragment = normalize_text(fragment)
+    dois = {normalize_text(d) for d in DOI_PATTERN.findall(fragment)}
+
+    for section in ("publications", "conference_publications", "book_chapters"):
+        for pub in profile.get(section) or []:
+            if not isinstance(pub, dict):
+                continue
+            if pub.get("doi") and normalize_text(pub["doi"]) in dois:
+                return True
+            title = normalize_text(pub.get("title", ""))
+            if len(title) > 15 and title in norm_fragment:
+                return True
+    return False
+
+
+def _known_qualification(fragment, profile):
+    """Whether a free-text qualification is covered by academic_background."""
+    norm_fragment = normalize_text(fragment)
+    for entry in profile.get("academic_background") or []:
+        if not isinstance(entry, dict):
+            continue
+        degree = normalize_text(entry.get("degree", "")).split(" ")[0]
+        if not degree or degree not in norm_fragment:
+            continue
+        year = str(entry.get("year", ""))
+        field_name = normalize_text(entry.get("field", ""))
+        if (year and year in norm_fragment) or (
+            field_name and field_name in norm_fragment
+        ):
+            return True
+    return False
+
+
+def normalize_extracted(extracted, profile):
+    """
+    Split processor.py output into schema-shaped data and unstructured fragments.
+
+    Returns a tuple (structured, unstructured) where structured can be merged by
+    the rules and unstructured only holds fragments not already in the profile.
+    """
+    structured = {}
+    unstructured = {}
+
+    for key, value in (extracted or {}).items():
+        if is_empty(value):
+            continue
+
+        if key == "social_profiles":
+            links = _classify_links(value)
+            if links:
+                structured["profile_links"] = links
+
+        elif key == "contact":
+            contact = {}
+            for contact_key, contact_value in value.items():
+                if isinstance(contact_value, list):
+                    contact_value = contact_value[0] if contact_value else None
+                if not is_empty(contact_value):
+                    contact[contact_key] = str(contact_value).strip()
+            if contact:
+                structured["contact"] = contact
+
+        elif key in ("publications", "conference_publications", "book_chapters"):
+            items = [p for p in value if isinstance(p, dict) and "title" in p]
+            if items:
+                structured[key] = items
+
+            fragments = []
+            seen = set()
+            for pub in value:
+                if isinstance(pub, dict) and "title" in pub:
+                    continue
+                text = pub.get("content", "") if isinstance(pub, dict) else pub
+                for fragment in _split_fragments(text):
+                    fragment_key = normalize_text(fragment)
+                    if fragment_key not in seen and not _known_publication(
+                        fragment, profile
+                    ):
+                        fragments.append(fragment)
+                    seen.add(fragment_key)
+            if fragments:
+                unstructured[key] = fragments
+
+        elif key == "academic_background":
+            items = [q for q in value if isinstance(q, dict)]
+            if items:
+                structured[key] = items
+
+            fragments = []
+            for qual in value:
+                if isinstance(qual, dict):
+                    continue
+                qual = " ".join(str(qual).replace("\xa0", " ").split()).lstrip("- ")
+                if (
+                    DEGREE_PATTERN.search(qual)
+                    and qual not in fragments
+                    and not _known_qualification(qual, profile)
+                ):
+                    fragments.append(qual)
+            if fragments:
+                unstructured[key] = fragments
+
+        elif key == "additional_info":
+            unstructured[key] = value
+
+        else:
+            structured[key] = value
+
+    return structured, unstructured
+
+
+def merge_profile(profile, extracted):
+    """
+    Merge extracted data into a profile using deterministic rules.
+
+    The input profile is not modified. Lists are unioned and deduplicated,
+    missing scalars are filled and contact/profile_links maps are merged; the
+    returned MergeResult lists anything that still needs the LLM.
+    """
+    merged = copy.deepcopy(profile or {})
+    structured, unstructured = normalize_extracted(extracted, merged)
+
+    result = MergeResult(profile=merged, unstructured=unstructured)
+    MergeEngine().merge(merged, structured, result)
+    return result
+
+
+def apply_patch(profile, patch):
+    """
+    Apply an LLM-produced patch to a profile.
+
+    Values in the patch win scalar conflicts, while lists are still unioned so
+    a patch can never drop existing entries.
+    """
+    merged = copy.deepcopy(profile or {})
+    result = MergeResult(profile=merged)
+    MergeEngine(prefer_incoming=True).merge(merged, patch or {}, result)
+    return result
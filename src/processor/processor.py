@@ -1,15 +1,12 @@
 import os
 import re
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
-try:
-    import yaml
-except ImportError:
-    print("Installing PyYAML...")
-    import subprocess
+from src.processor.chunker import CHUNK_TOKEN_BUDGET, chunk_markdown
+from src.processor.merge_engine import normalize_phone, normalize_text, normalize_url
+from src.utils.profile_io import read_yaml, write_yaml
 
-    subprocess.check_call(["pip3", "install", "pyyaml"])
-    import yaml
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", os.cpu_count() or 1))
 
 try:
     from markdownify import markdownify
@@ -23,8 +20,7 @@ except ImportError:
 
 def read_yaml_profile(file_path):
     """Read an existing YAML profile file."""
-    with open(file_path, "r", encoding="utf-8") as file:
-        return yaml.safe_load(file)
+    return read_yaml(file_path)
 
 
 def read_html_and_markdownify(file_path):
@@ -270,88 +266,135 @@ def extract_academic_background(markdown_content):
     return education
 
 
+def empty_extracted():
+    """Skeleton of the extracted data written for each supervisor."""
+    return {
+        "publications": [],
+        "contact": {},
+        "social_profiles": {},
+        "research_interests": [],
+        "academic_background": [],
+        "additional_info": {},
+    }
+
+
+def extract_from_markdown(markdown_content):
+    """Run every extractor over one piece of markdown."""
+    extracted = empty_extracted()
+    extracted["publications"] = extract_publications(markdown_content)
+    extracted["contact"] = extract_contact_info(markdown_content)
+    extracted["social_profiles"] = extract_social_profiles(markdown_content)
+    extracted["research_interests"] = extract_research_interests(markdown_content)
+    extracted["academic_background"] = extract_academic_background(markdown_content)
+    return extracted
+
+
+def _unique(items, key):
+    """Drop items whose normalized key has been seen, keeping first occurrences."""
+    seen = set()
+    unique = []
+    for item in items:
+        k = key(item)
+        if k not in seen:
+            seen.add(k)
+            unique.append(item)
+    return unique
+
+
+def reduce_extracted(results):
+    """
+    Combine extraction results (per chunk or per source) into one.
+
+    Lists are concatenated in order and deduplicated on normalized text, so a
+    publication repeated in two chunks is kept once; for single-valued contact
+    fields such as office the first result wins.
+    """
+    reduced = empty_extracted()
+    for result in results:
+        reduced["publications"].extend(result.get("publications", []))
+        reduced["research_interests"].extend(result.get("research_interests", []))
+        reduced["academic_background"].extend(result.get("academic_background", []))
+
+        for k, v in result.get("contact", {}).items():
+            if isinstance(v, list):
+                reduced["contact"].setdefault(k, []).extend(v)
+            else:
+                reduced["contact"].setdefault(k, v)
+
+        for k, v in result.get("social_profiles", {}).items():
+            reduced["social_profiles"].setdefault(k, []).extend(v)
+
+        for k, v in result.get("additional_info", {}).items():
+            reduced["additional_info"].setdefault(k, v)
+
+    reduced["publications"] = _unique(
+        reduced["publications"], lambda p: normalize_text(p["content"])
+    )
+    reduced["research_interests"] = _unique(
+        reduced["research_interests"], normalize_text
+    )
+    reduced["academic_background"] = _unique(
+        reduced["academic_background"], normalize_text
+    )
+    contact_keys = {"email": normalize_text, "phone": normalize_phone}
+    for k, v in reduced["contact"].items():
+        if isinstance(v, list):
+            reduced["contact"][k] = _unique(v, contact_keys.get(k, normalize_text))
+    for k, v in reduced["social_profiles"].items():
+        reduced["social_profiles"][k] = _unique(v, normalize_url)
+
+    return reduced
+
+
+def extract_markdown(markdown_content, executor=None, budget=CHUNK_TOKEN_BUDGET):
+    """
+    Extract from markdown of any size by map-reduce over budgeted chunks.
+
+    Chunks are extracted in parallel when an executor is given, which keeps
+    the cost of the regex passes bounded on very large CV pages.
+    """
+    chunks = chunk_markdown(markdown_content, budget)
+    if executor is None or len(chunks) < 2:
+        results = map(extract_from_markdown, chunks)
+    else:
+        results = executor.map(extract_from_markdown, chunks)
+    return reduce_extracted(results)
+
+
 def main():
     # Get list of all YAML files
     yaml_files = [f for f in os.listdir("profiles") if f.endswith(".yaml")]
 
-    for yaml_file in yaml_files:
-        user_id = yaml_file.replace(".yaml", "")
-        print(f"Processing {user_id}...")
-
-        result = process_supervisor(user_id)
-
-        if not result["sources"]:
-            print(f"No source files found for {user_id}")
-            continue
-
-        # Extract relevant information from sources
-        extracted_data = {
-            "publications": [],
-            "contact": {},
-            "social_profiles": {},
-            "research_interests": [],
-            "academic_background": [],
-            "additional_info": {},
-        }
-
-        for source_type, content in result["sources"].items():
-            print(f"  Extracting from {source_type}...")
-
-            # Extract publications
-            publications = extract_publications(content)
-            if publications:
-                extracted_data["publications"].extend(publications)
-
-            # Extract contact info
-            contact_info = extract_contact_info(content)
-            if contact_info:
-                for k, v in contact_info.items():
-                    if k not in extracted_data["contact"]:
-                        extracted_data["contact"][k] = v
-
-            # Extract social profiles
-            social_profiles = extract_social_profiles(content)
-            if social_profiles:
-                for k, v in social_profiles.items():
-                    if k not in extracted_data["social_profiles"]:
-                        extracted_data["social_profiles"][k] = v
-
-            # Extract research interests
-            interests = extract_research_interests(content)
-            if interests:
-                extracted_data["research_interests"].extend(interests)
-
-            # Extract academic background
-            education = extract_academic_background(content)
-            if education:
-                extracted_data["academic_background"].extend(education)
-
-        # Remove duplicates
-        extracted_data["research_interests"] = list(
-            set(extracted_data["research_interests"])
-        )
-        extracted_data["academic_background"] = list(
-            set(extracted_data["academic_background"])
-        )
-
-        # Create a combined data file for review (temporary)
-        temp_output_path = f"profiles/{user_id}_extracted.yaml"
-
-        with open(temp_output_path, "w", encoding="utf-8") as f:
-            # Use yaml.dump with allow_unicode to handle non-ASCII characters
-            yaml.dump(
-                extracted_data,
-                f,
-                default_flow_style=False,
-                allow_unicode=True,
-            )
+    # One pool for the whole run; large sources fan out across it
+    with ProcessPoolExecutor(max_workers=EXTRACT_WORKERS) as executor:
+        for yaml_file in yaml_files:
+            user_id = yaml_file.replace(".yaml", "")
+            print(f"Processing {user_id}...")
+
+            result = process_supervisor(user_id)
 
-        print(f"Saved extracted data for {user_id} at {temp_output_path}")
-        print(
-            "Please use this extracted data to update the original profile using a language model like Google Gemini."
-        )
-        print(f"Original profile: profiles/{user_id}.yaml")
-        print(f"Extracted data: {temp_output_path}")
+            if not result["sources"]:
+                print(f"No source files found for {user_id}")
+                continue
+
+            # Extract relevant information from sources, chunk by chunk
+            per_source = []
+            for source_type, content in result["sources"].items():
+                print(f"  Extracting from {source_type}...")
+                per_source.append(extract_markdown(content, executor))
+            extracted_data = reduce_extracted(per_source)
+
+            # Create a combined data file for review (temporary)
+            temp_output_path = f"profiles/{user_id}_extracted.yaml"
+
+            write_yaml(temp_output_path, extracted_data, sort_keys=True)
+
+            print(f"Saved extracted data for {user_id} at {temp_output_path}")
+            print(
+                "Please use this extracted data to update the original profile using a language model like Google Gemini."
+            )
+            print(f"Original profile: profiles/{user_id}.yaml")
+            print(f"Extracted data: {temp_output_path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+"""
+Shared steps of the LLM profile update scripts.
+
+gemini_update.py and simple_gemini_update.py are thin command-line wrappers
+around this module: they differ only in how many prompt files they process
+and whether the extracted data file is removed without asking.
+"""
+
+import os
+
+import yaml
+from dotenv import load_dotenv
+
+from src.processor.gemini_integration import prompt_user_id
+from src.processor.llm_cache import LLMResponseCache
+from src.processor.llm_client import PROVIDERS, close_clients, get_client
+from src.processor.merge_engine import apply_patch
+from src.processor.stream_validator import StreamAborted, generate_validated
+from src.processor.yaml_repair import (
+    RepairStats,
+    build_repair_prompt,
+    parse_with_repair,
+)
+from src.store.version_store import save_profile_version
+from src.utils.profile_io import read_yaml
+
+# Load environment variables from .env file
+load_dotenv()
+
+PROMPT_DIR = os.getenv("PROMPT_DIR", "data/prompts")
+EXTRACTED_DATA_SUFFIX = os.getenv("EXTRACTED_DATA_SUFFIX", "_extracted.yaml")
+
+# How responses were parsed across this run
+repair_stats = RepairStats()
+
+
+def generate_response(prompt, existing_profile, cache=None, client=None, config=None):
+    """Get the model's response to a prompt, from the cache or a validated stream."""
+    client = client or get_client()
+    # Keyed on provider and served model as well as the config, so switching
+    # either never returns another model's response
+    cache_model = client.cache_model if cache else None
+    response_text = cache.get(cache_model, prompt, config) if cache else None
+
+    if response_text is not None:
+        print(f"   Using cached response for model {client.model_name}")
+    else:
+        # Stream the response, validating it as it arrives so a bad
+        # generation is cancelled and retried early
+        print(
+            f"   Streaming {client.provider} response from model {client.model_name}..."
+        )
+        response_text = generate_validated(
+            lambda: client.stream(prompt, config), existing_profile
+        )
+
+        # Cache the raw response before validation so a re-run is free
+        if cache:
+            cache.put(cache_model, prompt, response_text, config)
+
+    return response_text
+
+
+def remove_extracted_data(user_id, confirm=False):
+    """Delete a supervisor's extracted data file, asking first if confirm is set."""
+    extracted_file = f"data/extracted/{user_id}{EXTRACTED_DATA_SUFFIX}"
+    if not os.path.exists(extracted_file):
+        return
+    if confirm:
+        answer = input(f"   Remove extracted data file for {user_id}? (y/n): ")
+        if answer.lower() != "y":
+            return
+    os.remove(extracted_file)
+    print(f"   Removed extracted data file for {user_id}")
+
+
+def update_profile(
+    user_id, cache=None, prompt_file=None, client=None, confirm_cleanup=False
+):
+    """Update a profile from its prompt, reusing a cached response if available."""
+    client = client or get_client()
+    if prompt_file is None:
+        prompt_file = f"{PROMPT_DIR}/{user_id}_prompt.txt"
+
+    if not os.path.exists(prompt_file):
+        print(f"No prompt file found for {user_id}")
+        return False
+
+    # Read the prompt
+    with open(prompt_file, "r", encoding="utf-8") as f:
+        prompt = f.read()
+
+    profile_path = f"data/profiles/{user_id}.yaml"
+    existing_profile = {}
+    if os.path.exists(profile_path):
+        existing_profile = read_yaml(profile_path) or {}
+
+    try:
+        response_text = generate_response(prompt, existing_profile, cache, client)
+
+        # Validate that it's valid YAML, repairing mechanical errors locally
+        try:
+            reprompted = False
+            try:
+                patch, fixes = parse_with_repair(response_text)
+            except yaml.YAMLError as e:
+                # Only pay for another call when local repair has failed
+                print("   Local YAML repair failed, re-prompting with the parse error")
+                response_text = generate_response(
+                    build_repair_prompt(prompt, response_text, e),
+                    existing_profile,
+                    cache,
+                    client,
+                )
+                reprompted = True
+                patch, fixes = parse_with_repair(response_text)
+            repair_stats.record(fixes, reprompted=reprompted)
+
+            if fixes:
+                print(f"   Repaired response locally: {', '.join(fixes)}")
+
+            # Apply the response as a patch so existing entries are never dropped
+            updated_profile = apply_patch(existing_profile, patch).profile
+
+            # Save the updated profile as a new revision; earlier ones are kept
+            revision = save_profile_version(
+                user_id, updated_profile, f"LLM update ({client.model_name})"
+            )
+            print(f"   Saved revision {revision[:12]}")
+
+            print(f"✅ Successfully updated profile for {user_id}")
+
+            remove_extracted_data(user_id, confirm=confirm_cleanup)
+            return True
+
+        except yaml.YAMLError as e:
+            repair_stats.record(None, ok=False)
+            print(f"❌ Error: Invalid YAML generated for {user_id}")
+            print(f"Error details: {e}")
+
+            # Save the raw response for debugging
+            raw_path = f"data/backups/raw_responses/{user_id}_raw.txt"
+            os.makedirs(os.path.dirname(raw_path), exist_ok=True)
+            with open(raw_path, "w", encoding="utf-8") as f:
+                f.write(response_text)
+            print(f"   Raw response saved to {raw_path}")
+            return False
+
+    except StreamAborted as e:
+        print(f"❌ Error: LLM response for {user_id} rejected: {e}")
+        return False
+
+    except Exception as e:
+        print(f"❌ Error calling LLM API: {e}")
+        return False
+
+
+def add_arguments(parser):
+    """Add the options shared by the update scripts to an argument parser."""
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the API instead of reusing cached responses",
+    )
+    parser.add_argument(
+        "--provider",
+        choices=sorted(PROVIDERS),
+        help="LLM backend to use (default: LLM_PROVIDER or gemini)",
+    )
+
+
+def start_run(args):
+    """
+    Set up a run from the parsed options: (client, cache, prompt file names),
+    or None after printing why there is nothing to do.
+    """
+    try:
+        # One shared client, so connections are reused across profiles
+        client = get_client(args.provider)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+
+    # Create directories if they don't exist
+    os.makedirs("data/profiles", exist_ok=True)
+    os.makedirs(PROMPT_DIR, exist_ok=True)
+    os.makedirs("data/backups/raw_responses", exist_ok=True)
+
+    prompt_files = sorted(
+        f for f in os.listdir(PROMPT_DIR) if f.endswith("_prompt.txt")
+    )
+    if not prompt_files:
+        print(f"No prompt files found in '{PROMPT_DIR}' directory.")
+        print("Please run gemini_integration.py to create them first.")
+        return None
+
+    print(f"Found {len(prompt_files)} prompt files to process.")
+    cache = None if args.no_cache else LLMResponseCache()
+    return client, cache, prompt_files
+
+
+def update_from_prompt_file(prompt_file, cache, client, confirm_cleanup=False):
+    """Update the profile a prompt file (or split part) belongs to."""
+    user_id = prompt_user_id(prompt_file)
+    print(f"\nProcessing {user_id}...")
+    return update_profile(
+        user_id,
+        cache=cache,
+        prompt_file=os.path.join(PROMPT_DIR, prompt_file),
+        client=client,
+        confirm_cleanup=confirm_cleanup,
+    )
+
+
+def finish_run(cache):
+    """Print the run's repair and cache statistics and release the clients."""
+    print(repair_stats.summary())
+    if cache:
+        print(cache.format_stats())
+        cache.close()
+    close_clients()
@@ -0,0 +1,213 @@
+"""
+Incremental validation of streamed Gemini responses.
+
+The update scripts consume Gemini's answer as a stream and feed each chunk to a
+StreamValidator. Every top-level YAML section is checked against the profile
+schema as soon as it is complete, and the request is cancelled the moment the
+output clearly cannot be used (unknown or repeated sections, the wrong shape
+for a field, placeholder text standing in for existing entries, or a model
+stuck repeating itself), instead of paying for the full generation first.
+"""
+
+import json
+import re
+from pathlib import Path
+
+import yaml
+
+from src.processor.yaml_repair import fix_list_indentation, quote_colon_values
+from src.utils.profile_io import load_yaml
+
+SCHEMA_PATH = (
+    Path(__file__).parent.parent.parent / "docs" / "schema" / "profile_schema.json"
+)
+
+# Sections found in curated profiles that the schema does not (yet) describe
+EXTRA_PROFILE_FIELDS = {
+    "faculty",
+    "conference_publications",
+    "book_chapters",
+    "research_metrics",
+    "awards",
+    "profile_photo",
+}
+
+TOP_LEVEL_KEY = re.compile(r"^([A-Za-z_][\w-]*):(?:\s|$)")
+FENCE = re.compile(r"^\s*```")
+PLACEHOLDER = re.compile(
+    r"^\s*(?:-\s*)?#?\s*(?:\.\.\.|…)\s*$"
+    r"|\b(?:rest|remainder) of (?:the )?(?:profile|entries|list|publications)\b"
+    r"|\b(?:existing|remaining|other) (?:entries|items|publications|data) "
+    r"(?:unchanged|omitted|remain)",
+    re.IGNORECASE,
+)
+MAX_PROSE_LINES = 5
+MAX_REPEATED_LINES = 20
+
+
+class StreamAborted(Exception):
+    """Raised when a streamed response is rejected before it completes."""
+
+
+def load_schema_properties(schema_path=SCHEMA_PATH):
+    with open(schema_path, "r", encoding="utf-8") as f:
+        return json.load(f)["properties"]
+
+
+class StreamValidator:
+    """Validates a YAML response incrementally as chunks arrive."""
+
+    def __init__(self, existing_profile=None, schema_properties=None):
+        self.properties = schema_properties or load_schema_properties()
+        self.allowed_fields = (
+            set(self.properties)
+            | EXTRA_PROFILE_FIELDS
+            | set((existing_profile or {}).keys())
+        )
+        self.text = ""
+        self._pending = ""
+        self._section_name = None
+        self._section_lines = []
+        self._seen_sections = set()
+        self._prose_lines = 0
+        self._in_yaml = False
+        self._closed = False
+        self._last_line = None
+        self._repeats = 0
+
+    def feed(self, chunk):
+        """Add a chunk of response text, validating every completed line."""
+        self.text += chunk
+        self._pending += chunk
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            self._process_line(line)
+
+    def finish(self):
+        """Validate whatever is left once the stream has ended."""
+        if self._pending:
+            self._process_line(self._pending)
+            self._pending = ""
+        self._close_section()
+        if not self._seen_sections:
+            raise StreamAborted("response contains no profile fields")
+
+    def _process_line(self, line):
+        if self._closed or not line.strip():
+            return
+
+        self._check_repetition(line)
+
+        if FENCE.match(line):
+            # An opening fence is fine; a closing one ends the document
+            if self._in_yaml:
+                self._closed = True
+            return
+
+        if PLACEHOLDER.search(line):
+            raise StreamAborted(
+                f"placeholder instead of existing content: {line.strip()!r}"
+            )
+
+        match = TOP_LEVEL_KEY.match(line)
+        if match:
+            self._in_yaml = True
+            self._start_section(match.group(1))
+        elif self._in_yaml and (line[0].isspace() or line.startswith("-")):
+            self._section_lines.append(line)
+        elif self._in_yaml:
+            # Prose after the YAML, such as a closing remark, ends the document
+            # like a closing fence; parse_with_repair strips it locally
+            self._closed = True
+            return
+        else:
+            self._prose_lines += 1
+            if self._prose_lines > MAX_PROSE_LINES:
+                raise StreamAborted("response does not start with YAML")
+            return
+
+        if match:
+            self._section_lines.append(line)
+
+    def _check_repetition(self, line):
+        if line == self._last_line:
+            self._repeats += 1
+            if self._repeats >= MAX_REPEATED_LINES:
+                raise StreamAborted("response is repeating itself")
+        else:
+            self._last_line = line
+            self._repeats = 0
+
+    def _start_section(self, name):
+        self._close_section()
+        if name not in self.allowed_fields:
+            raise StreamAborted(f"unknown profile field {name!r}")
+        if name in self._seen_sections:
+            raise StreamAborted(f"field {name!r} appears twice")
+        self._seen_sections.add(name)
+        self._section_name = name
+
+    def _close_section(self):
+        if self._section_name is None:
+            return
+        name = self._section_name
+        section = "\n".join(self._section_lines)
+        try:
+            value = load_yaml(section)
+        except yaml.YAMLError as e:
+            # Mechanical errors are repaired locally afterwards, so only abort
+            # when the section cannot be repaired either
+            try:
+                value = load_yaml(quote_colon_values(fix_list_indentation(section)))
+            except yaml.YAMLError:
+                raise StreamAborted(f"invalid YAML in {name!r}: {e}") from e
+        self._check_shape(name, (value or {}).get(name))
+        self._section_name = None
+        self._section_lines = []
+
+    def _check_shape(self, name, value):
+        """Check a completed section against the type declared in the schema."""
+        schema = self.properties.get(name)
+        if schema is None or value is None:
+            return
+
+        expected = schema.get("type")
+        if expected == "array":
+            if not isinstance(value, list):
+                raise StreamAborted(f"field {name!r} should be a list")
+            if schema.get("items", {}).get("type") == "object" and not all(
+                isinstance(item, dict) for item in value
+            ):
+                raise StreamAborted(f"entries of {name!r} should be mappings")
+        elif expected == "object" and not isinstance(value, dict):
+            raise StreamAborted(f"field {name!r} should be a mapping")
+        elif expected == "string" and isinstance(value, (dict, list)):
+            raise StreamAborted(f"field {name!r} should be a single value")
+
+
+def generate_validated(start_stream, existing_profile=None, max_attempts=3):
+    """
+    Consume a streamed response with incremental validation, retrying on abort.
+
+    start_stream is called once per attempt and must return an iterable of text
+    chunks. Returns the full response text, or raises StreamAborted once every
+    attempt has been rejected.
+    """
+    error = None
+    for attempt in range(1, max_attempts + 1):
+        validator = StreamValidator(existing_profile)
+        stream = start_stream()
+        try:
+            for chunk in stream:
+                validator.feed(chunk)
+            validator.finish()
+            return validator.text
+        except StreamAborted as e:
+            error = e
+            print(f"   Aborted response (attempt {attempt}/{max_attempts}): {e}")
+        finally:
+            # Closing the stream cancels the request on the server side
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+    raise error
@@ -0,0 +1,229 @@
+"""
+Local repair of malformed YAML returned by the LLM.
+
+Most invalid responses are broken in mechanical ways: the YAML is wrapped in
+markdown code fences, a sentence of prose precedes or follows the document,
+list items are indented inconsistently, or a value contains an unquoted
+colon. These are fixed here, cheaply and deterministically, before anything
+is sent back to the model. Only if repair fails do the update scripts
+re-prompt, passing along the specific parse error.
+
+A document only counts as parsed once it also has the shape of a profile
+patch: any subset of the schema's fields, each of the declared type. List
+items indented inconsistently are repaired even when the text loads, as YAML
+reads an item indented one space too far as part of the previous one.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+import jsonschema
+import yaml
+
+from src.utils.profile_io import load_yaml
+
+SCHEMA_PATH = (
+    Path(__file__).parent.parent.parent / "docs" / "schema" / "profile_schema.json"
+)
+
+FENCED_BLOCK = re.compile(r"```[\w-]*[ \t]*\n(.*?)(?:\n```|\Z)", re.DOTALL)
+TOP_LEVEL_KEY = re.compile(r"^[A-Za-z_][\w-]*:(?:\s|$)")
+YAML_LINE = re.compile(r"^(?:\s+\S|-\s|[A-Za-z_][\w-]*:(?:\s|$)|#)")
+KEY_VALUE = re.compile(r"^(\s*(?:-\s+)?[A-Za-z_][\w-]*):[ \t]+(.+?)\s*$")
+LIST_ITEM = re.compile(r"^(\s*)-\s")
+
+
+@dataclass
+class RepairStats:
+    """
+    Counts how responses were parsed, for the end-of-run summary. Record
+    each document once, with its final outcome.
+    """
+
+    clean: int = 0
+    repaired: int = 0
+    reprompted: int = 0
+    failed: int = 0
+
+    def record(self, fixes, ok=True, reprompted=False):
+        if not ok:
+            self.failed += 1
+        elif reprompted:
+            self.reprompted += 1
+        elif fixes:
+            self.repaired += 1
+        else:
+            self.clean += 1
+
+    def summary(self):
+        needing_repair = self.repaired + self.reprompted + self.failed
+        rate = self.repaired / needing_repair if needing_repair else 0.0
+        return (
+            f"YAML repair: {self.clean} parsed cleanly, {self.repaired} repaired "
+            f"locally, {self.reprompted} fixed by re-prompting, {self.failed} "
+            f"failed ({rate:.0%} local repair success rate)"
+        )
+
+
+def strip_code_fences(text):
+    """Return the contents of the first fenced block, or drop stray fence lines."""
+    match = FENCED_BLOCK.search(text)
+    if match:
+        return match.group(1)
+    return "\n".join(line for line in text.split("\n") if not line.startswith("```"))
+
+
+def strip_prose(text):
+    """Drop prose before the first top-level key and after the last YAML line."""
+    lines = text.split("\n")
+    start = next((i for i, line in enumerate(lines) if TOP_LEVEL_KEY.match(line)), None)
+    if start is None:
+        return text
+
+    end = start
+    for i in range(start, len(lines)):
+        if not lines[i].strip():
+            continue
+        if not YAML_LINE.match(lines[i]):
+            break
+        end = i
+    return "\n".join(lines[start : end + 1])
+
+
+def fix_list_indentation(text):
+    """Align list items that are off by one or two spaces from their siblings."""
+    lines = text.replace("\t", "  ").split("\n")
+    # Indents of the lists still open, innermost last
+    open_lists = []
+    opens_block = False
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        match = LIST_ITEM.match(line)
+        if match:
+            indent = len(match.group(1))
+            siblings = [n for n in open_lists if 0 < abs(indent - n) <= 2]
+            if indent not in open_lists and siblings and not opens_block:
+                indent = siblings[-1]
+                lines[i] = " " * indent + line.lstrip()
+            # A list nested under a key may start at any deeper indent
+            open_lists = [n for n in open_lists if n < indent] + [indent]
+        elif TOP_LEVEL_KEY.match(line):
+            open_lists = []
+        opens_block = line.rstrip().endswith(":")
+    return "\n".join(lines)
+
+
+def quote_colon_values(text):
+    """Quote scalar values that contain ': ', which YAML reads as a nested mapping."""
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        match = KEY_VALUE.match(line)
+        if not match:
+            continue
+        key, value = match.groups()
+        if ": " not in value or value[0] in "'\"[{|>&*!":
+            continue
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+        lines[i] = f'{key}: "{escaped}"'
+    return "\n".join(lines)
+
+
+# Indentation is fixed before prose is stripped, since misaligned list items
+# can otherwise load as continuation lines of the previous item.
+REPAIRS = [
+    ("stripped code fences", strip_code_fences),
+    ("fixed list indentation", fix_list_indentation),
+    ("stripped surrounding prose", strip_prose),
+    ("quoted values containing colons", quote_colon_values),
+]
+
+
+@cache
+def patch_validator(schema_path=SCHEMA_PATH):
+    """
+    Validator for profile patches: the profile schema without its required
+    fields, so a patch may touch any subset of fields, including within nested
+    objects such as contact. List items keep their required fields.
+    """
+    with open(schema_path, "r", encoding="utf-8") as f:
+        schema = json.load(f)
+    schema.pop("required", None)
+    # Extra fields are left to the stream validator, which knows the profile
+    schema.pop("additionalProperties", None)
+    for field_schema in schema["properties"].values():
+        if field_schema.get("type") == "object":
+            field_schema.pop("required", None)
+    return jsonschema.validators.validator_for(schema)(schema)
+
+
+def _load_mapping(text):
+    if fix_list_indentation(text) != text.replace("\t", "  "):
+        # Such text often loads, but as the wrong data
+        raise yaml.YAMLError("List items are indented inconsistently")
+    data = load_yaml(text)
+    if not isinstance(data, dict):
+        raise yaml.YAMLError("Response is not a YAML mapping")
+    error = jsonschema.exceptions.best_match(patch_validator().iter_errors(data))
+    if error is not None:
+        path = "/".join(str(p) for p in error.absolute_path)
+        raise yaml.YAMLError(
+            f"Response does not match the profile schema at {path}: {error.message}"
+        )
+    return data
+
+
+def parse_with_repair(text, stats=None):
+    """
+    Parse a profile patch, applying local repairs until it loads in the
+    schema's shape.
+
+    Repairs are applied cumulatively in order. Returns (data, fixes) where fixes
+    lists the repairs that were needed; raises the first parse error if the
+    text cannot be repaired.
+    """
+    try:
+        data = _load_mapping(text)
+        if stats:
+            stats.record([])
+        return data, []
+    except yaml.YAMLError as e:
+        error = e
+
+    fixes = []
+    for description, repair in REPAIRS:
+        repaired = repair(text)
+        if repaired == text:
+            continue
+        text = repaired
+        fixes.append(description)
+        try:
+            data = _load_mapping(text)
+            if stats:
+                stats.record(fixes)
+            return data, fixes
+        except yaml.YAMLError:
+            continue
+
+    if stats:
+        stats.record(fixes, ok=False)
+    raise error
+
+
+def build_repair_prompt(prompt, response_text, error):
+    """Follow-up prompt asking the model to fix its own output, with the error."""
+    return f"""{prompt}
+
+YOUR PREVIOUS RESPONSE COULD NOT BE PARSED AS A YAML PROFILE PATCH:
+```
+{response_text}
+```
+
+PARSE ERROR:
+{error}
+
+Return the corrected YAML only, without code fences or any explanation.
+"""
@@ -0,0 +1,414 @@
+"""
+ASGI search service over the in-memory matching indexes.
+
+The Next.js search route goes through Prisma and pgvector for every query.
+This service loads the profiles once at startup, builds the supervisor
+vectors (MatchingEngine) and the BM25 postings (KeywordIndex), and keeps them
+warm: a background task re-syncs them every REFRESH_SECONDS through
+LiveIndexes, touching only the profiles that changed. Vector searches go
+through CachedMatcher and the process-wide result cache.
+
+Endpoints (all JSON):
+
+    GET  /search?q=...&k=5&department=...&mode=vector|keyword
+    GET  /supervisors/{id}
+    POST /batch-match   {"queries": ["...", {"id": "...", "query": "..."}], "k": 5}
+    GET  /health
+
+Embedding and scoring are CPU-bound, so handlers run them in a thread pool
+(WORKERS threads) and the event loop stays free to accept requests. Queries
+hold a read/write lock for reading and never block each other; only a
+refresh takes it for writing, so an update never runs while a query is
+being scored. A refresh that finds no changed profile never takes it.
+
+The app is a plain ASGI callable, so no web framework is needed; uvicorn
+serves it.
+
+Usage:
+    python -m src.service.app [--host 127.0.0.1] [--port 8000]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict
+from urllib.parse import parse_qs
+
+import uvicorn
+
+from src.matching.batch import match_batch
+from src.matching.embedder import get_embedder
+from src.matching.engine import MatchingEngine
+from src.matching.keyword_index import KeywordIndex
+from src.matching.live_index import LiveIndexes
+from src.matching.result_cache import CachedMatcher
+from src.utils.profile_io import PROFILES_DIR, load_profiles
+
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.getenv("SEARCH_WORKERS", str(min(8, os.cpu_count() or 1))))
+REFRESH_SECONDS = float(os.getenv("SEARCH_REFRESH_INTERVAL", "5"))
+MAX_K = 100
+MAX_BATCH = int(os.getenv("SEARCH_MAX_BATCH", "10000"))
+
+MODES = ("vector", "keyword")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ReadWriteLock:
+    """Any number of readers or one writer; a waiting writer holds off new readers."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def reading(self):
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+def match_json(match):
+    """A Match as a JSON object, without the fields it does not carry."""
+    return {
+        key: value
+        for key, value in asdict(match).items()
+        if value is not None and value != {}
+    }
+
+
+def _int_param(value, name, default, maximum):
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{name} must be an integer") from None
+    if not 1 <= number <= maximum:
+        raise HTTPError(400, f"{name} must be between 1 and {maximum}")
+    return number
+
+
+def batch_queries(body):
+    """[(student id, query)] from a /batch-match request body."""
+    if not isinstance(body, dict) or not isinstance(body.get("queries"), list):
+        raise HTTPError(400, 'body must be {"queries": [...]}')
+    queries = []
+    for number, item in enumerate(body["queries"], 1):
+        if isinstance(item, dict):
+            student_id, text = item.get("id"), item.get("query")
+        else:
+            student_id, text = None, item
+        if not isinstance(text, str) or not text.strip():
+            raise HTTPError(400, f"query {number} is empty")
+        queries.append((str(student_id or number), text.strip()))
+    if len(queries) > MAX_BATCH:
+        raise HTTPError(413, f"at most {MAX_BATCH} queries per batch")
+    return queries
+
+
+class SearchService:
+    """The ASGI application: warm indexes plus the request routing."""
+
+    def __init__(
+        self,
+        profiles_dir=PROFILES_DIR,
+        embedder=None,
+        cache=None,
+        workers=WORKERS,
+        refresh_interval=REFRESH_SECONDS,
+    ):
+        self.profiles_dir = profiles_dir
+        self.embedder = embedder
+        self.cache = cache
+        self.workers = workers
+        self.refresh_interval = refresh_interval
+        self.profiles = {}
+        self.matcher = None
+        self.keyword = None
+        self.executor = None
+        self.started = None
+        self._index_lock = ReadWriteLock()
+        self._refresher = None
+        self.routes = {
+            "/search": ("GET", self.search),
+            "/batch-match": ("POST", self.batch_match),
+            "/health": ("GET", self.health),
+        }
+
+    # Lifecycle
+
+    def _build(self):
+        profiles = load_profiles(self.profiles_dir)
+        engine = MatchingEngine(self.embedder or get_embedder())
+        self.keyword = KeywordIndex()
+        live = LiveIndexes(engine=engine, keyword=self.keyword)
+        self.matcher = CachedMatcher(engine, self.cache, self.profiles_dir, live)
+        self.matcher.refresh(profiles)
+        self.profiles = profiles
+
+    def refresh(self):
+        """Re-sync the indexes with the profiles on disk; the changed ids."""
+        profiles = load_profiles(self.profiles_dir)
+        live = self.matcher.live
+        changed, removed, _ = live.changes(profiles)
+        if not changed and not removed:
+            return set()
+        with self._index_lock.writing():
+            changed = self.matcher.refresh(profiles)
+            self.profiles = profiles
+        return changed
+
+    async def startup(self):
+        start = time.perf_counter()
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="search")
+        await self.run(self._build)
+        self.started = time.time()
+        if self.refresh_interval:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+        logger.info(
+            "Indexed %d profiles in %.2f s",
+            len(self.profiles),
+            time.perf_counter() - start,
+        )
+
+    async def shutdown(self):
+        if self._refresher:
+            self._refresher.cancel()
+            self._refresher = None
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                changed = await self.run(self.refresh)
+            except Exception:
+                logger.exception("Profile refresh failed")
+                continue
+            if changed:
+                logger.info("Updated %s", ", ".join(sorted(changed)))
+
+    async def run(self, function, *args):
+        """Run a blocking call in the thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    def _reading(self, function, *args):
+        with self._index_lock.reading():
+            return function(*args)
+
+    # Handlers: (params, body) -> JSON-able response
+
+    async def search(self, params, body):
+        query = (params.get("q") or "").strip()
+        if not query:
+            raise HTTPError(400, "q is required")
+        k = _int_param(params.get("k"), "k", 5, MAX_K)
+        mode = params.get("mode") or "vector"
+        if mode not in MODES:
+            raise HTTPError(400, f"mode must be one of {', '.join(MODES)}")
+        department = params.get("department") or None
+        if mode == "vector":
+            matches = await self.run(
+                self._reading, self.matcher.match, query, k, department
+            )
+        else:
+            matches = await self.run(
+                self._reading, self._keyword_search, query, k, department
+            )
+        return {
+            "query": query,
+            "mode": mode,
+            "count": len(matches),
+            "supervisors": [match_json(m) for m in matches],
+        }
+
+    def _keyword_search(self, query, k, department):
+        if not department:
+            return self.keyword.search(query, k)
+        matches = self.keyword.search(query, len(self.keyword.user_ids))
+        return [m for m in matches if m.department == department][:k]
+
+    async def supervisor(self, user_id):
+        profile = self.profiles.get(user_id)
+        if profile is None:
+            raise HTTPError(404, f"no supervisor {user_id}")
+        return {"id": user_id, **profile}
+
+    async def batch_match(self, params, body):
+        queries = batch_queries(body)
+        k = _int_param(body.get("k"), "k", 5, MAX_K)
+        results = await self.run(
+            self._reading,
+            lambda: list(match_batch(self.matcher.engine, queries, k)),
+        )
+        return {
+            "count": len(results),
+            "results": [
+                {"id": student_id, "supervisors": [match_json(m) for m in matches]}
+                for student_id, matches in results
+            ],
+        }
+
+    async def health(self, params, body):
+        return {
+            "status": "ok",
+            "uptime": round(time.time() - self.started, 1),
+            "indexes": self.matcher.live.stats(),
+            "cache": self.matcher.stats(),
+        }
+
+    # ASGI
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    logger.exception("Startup failed")
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        try:
+            if self.matcher is None:
+                raise HTTPError(503, "indexes are not loaded")
+            status, payload = 200, await self._dispatch(scope, receive)
+        except HTTPError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception:
+            logger.exception("Error handling %s", scope["path"])
+            status, payload = 500, {"error": "internal error"}
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _dispatch(self, scope, receive):
+        path, method = scope["path"].rstrip("/") or "/", scope["method"]
+        if path.startswith("/supervisors/"):
+            if method != "GET":
+                raise HTTPError(405, "method not allowed")
+            # ASGI paths arrive percent-decoded already
+            return await self.supervisor(path[len("/supervisors/") :])
+        if path not in self.routes:
+            raise HTTPError(404, "not found")
+        allowed, handler = self.routes[path]
+        if method != allowed:
+            raise HTTPError(405, "method not allowed")
+        params = {
+            name: values[-1]
+            for name, values in parse_qs(scope["query_string"].decode()).items()
+        }
+        body = None
+        if method == "POST":
+            raw = await _read_body(receive)
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError:
+                raise HTTPError(400, "body must be JSON") from None
+        return await handler(params, body)
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def create_app(**kwargs):
+    return SearchService(**kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve supervisor search over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Scoring threads")
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=REFRESH_SECONDS,
+        help="Seconds between profile re-syncs (0 disables)",
+    )
+    parser.add_argument("--embedder", help="Embedder name (default MATCH_EMBEDDER)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    app = create_app(
+        embedder=get_embedder(args.embedder),
+        workers=args.workers,
+        refresh_interval=args.refresh_interval,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,484 @@
+"""
+Sync of the YAML profiles into the PostgreSQL/pgvector tables of db/schema.sql.
+
+scripts/import-profiles.js writes every profile row by row through Prisma.
+This stage only touches the supervisors whose profile changed:
+
+1. Diff. supervisors.content_hash holds a hash of each profile (and of the
+   embedder that produced its vectors). Profiles whose hash differs from the
+   database are changed. Supervisors without a YAML file are removed.
+   The hashing embedder weighs terms by their document frequency in the
+   corpus. That fit is pinned in the embedder_fits table and reused, so an
+   edit re-embeds only the edited supervisors. It is refitted on --full, or
+   once the corpus's document frequencies have drifted more than REFIT_DRIFT
+   from it; the fit is part of every content hash, so a refit re-embeds
+   every supervisor.
+2. Embed. The changed supervisors' research interests and field texts are
+   embedded in one batched call. The field texts are research_interests,
+   expertise and publication titles, as in import-profiles.js.
+3. Load. The rows go into temporary staging tables with binary COPY; vectors
+   are sent in pgvector's binary format. A few set-based statements then
+   upsert supervisors and supervisor_embeddings and replace the changed
+   supervisors' research_interests, all in one transaction.
+4. Index. An ivfflat index keeps the centroids it was built with, so large
+   loads degrade it. When the changed rows exceed REINDEX_RATIO of a table,
+   its index is dropped before the load and rebuilt after it, with lists
+   sized to the table (rows / 1000, as pgvector recommends). Smaller changes
+   go into the existing index.
+
+Usage:
+    python -m src.store.pg_sync [--dsn postgresql://...] [--full] [--apply-schema]
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+import psycopg
+from psycopg.types.json import Jsonb
+
+from src.matching.embedder import DEFAULT_EMBEDDER, embedder_key, get_embedder
+from src.store.profile_store import _strings, _text
+from src.utils.profile_io import PROFILES_DIR, load_profiles
+
+SCHEMA_PATH = Path(__file__).parent.parent.parent / "db" / "schema.sql"
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://localhost/postgres")
+# Dimension of the vector columns in db/schema.sql
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "768"))
+
+# Share of a table's rows that may change before its ivfflat index is rebuilt
+REINDEX_RATIO = float(os.getenv("PG_SYNC_REINDEX_RATIO", "0.1"))
+# Drift of the corpus's document frequencies (see fit_drift) past which the
+# hashing embedder's pinned fit is refitted
+REFIT_DRIFT = float(os.getenv("PG_SYNC_REFIT_DRIFT", "0.1"))
+
+# Table -> its ivfflat index, as created by db/schema.sql
+IVFFLAT_INDEXES = {
+    "research_interests": "research_interests_embedding_idx",
+    "supervisor_embeddings": "supervisor_embeddings_idx",
+}
+
+# embedding_type -> the profile field whose items are joined into its text
+FIELD_EMBEDDINGS = {
+    "research_interests": "research_interests",
+    "expertise": "expertise",
+    "publications": "publications",
+}
+
+STAGING = """
+CREATE TEMP TABLE stage_supervisors (
+  id VARCHAR, name VARCHAR, position VARCHAR, department VARCHAR,
+  email VARCHAR, profile_data JSONB, content_hash VARCHAR
+) ON COMMIT DROP;
+CREATE TEMP TABLE stage_embeddings (
+  supervisor_id VARCHAR, embedding_type VARCHAR, embedding vector
+) ON COMMIT DROP;
+CREATE TEMP TABLE stage_interests (
+  supervisor_id VARCHAR, interest VARCHAR, embedding vector
+) ON COMMIT DROP;
+"""
+
+UPSERT = [
+    """
+    INSERT INTO supervisors (
+      id, name, position, department, email, profile_data, content_hash, last_updated
+    )
+    SELECT id, name, position, department, email, profile_data, content_hash, NOW()
+    FROM stage_supervisors
+    ON CONFLICT (id) DO UPDATE SET
+      name = EXCLUDED.name,
+      position = EXCLUDED.position,
+      department = EXCLUDED.department,
+      email = EXCLUDED.email,
+      profile_data = EXCLUDED.profile_data,
+      content_hash = EXCLUDED.content_hash,
+      last_updated = EXCLUDED.last_updated
+    """,
+    """
+    DELETE FROM research_interests r
+    USING stage_supervisors s
+    WHERE r.supervisor_id = s.id
+    """,
+    """
+    INSERT INTO research_interests (supervisor_id, interest, embedding)
+    SELECT supervisor_id, interest, embedding FROM stage_interests
+    """,
+    """
+    DELETE FROM supervisor_embeddings e
+    USING stage_supervisors s
+    WHERE e.supervisor_id = s.id
+      AND NOT EXISTS (
+        SELECT 1 FROM stage_embeddings x
+        WHERE x.supervisor_id = e.supervisor_id
+          AND x.embedding_type = e.embedding_type
+      )
+    """,
+    """
+    INSERT INTO supervisor_embeddings (supervisor_id, embedding_type, embedding)
+    SELECT supervisor_id, embedding_type, embedding FROM stage_embeddings
+    ON CONFLICT (supervisor_id, embedding_type) DO UPDATE SET
+      embedding = EXCLUDED.embedding,
+      created_at = NOW()
+    """,
+]
+
+
+def libpq_dsn(url):
+    """A Prisma DATABASE_URL without the query parameters libpq rejects."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != "schema"]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def content_hash(profile, embedder_key=""):
+    """Hash of a profile and of the embedder its vectors come from."""
+    data = json.dumps(profile, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(f"{embedder_key}\0{data}".encode()).hexdigest()
+
+
+def field_text(profile, field):
+    """The joined text of a field, as import-profiles.js embeds it."""
+    if field == "publications":
+        items = [
+            p.get("title") if isinstance(p, dict) else p
+            for p in profile.get("publications") or []
+        ]
+    else:
+        items = profile.get(field) or []
+        if not isinstance(items, list):
+            items = [items]
+    return " ".join(_strings(items)).strip()
+
+
+def vector_bytes(matrix):
+    """Rows of matrix in pgvector's binary format (for binary COPY)."""
+    matrix = np.asarray(matrix, dtype=">f4")
+    header = struct.pack(">HH", matrix.shape[1], 0)
+    return [header + row.tobytes() for row in matrix]
+
+
+def default_embedder(name=None):
+    """The named embedder, sized to the schema's vectors when it can be."""
+    name = name or DEFAULT_EMBEDDER
+    return get_embedder(name, **({"dim": EMBEDDING_DIM} if name == "hashing" else {}))
+
+
+def fit_drift(fitted, current):
+    """Share of the fitted document frequencies that differ in current."""
+    return float(np.abs(current - fitted).sum() / max(fitted.sum(), 1))
+
+
+def ivfflat_lists(rows):
+    """pgvector's suggested list count: rows / 1000, sqrt(rows) past 1M rows."""
+    if rows > 1_000_000:
+        return int(math.sqrt(rows))
+    return max(1, rows // 1000)
+
+
+class PgSync:
+    """Loads changed profiles into PostgreSQL with COPY and set-based upserts."""
+
+    def __init__(
+        self,
+        conn,
+        embedder=None,
+        reindex_ratio=REINDEX_RATIO,
+        refit_drift=REFIT_DRIFT,
+    ):
+        self.conn = conn
+        self.embedder = embedder or default_embedder()
+        self.reindex_ratio = reindex_ratio
+        self.refit_drift = refit_drift
+
+    @property
+    def embedder_key(self):
+        return embedder_key(self.embedder)
+
+    @property
+    def fit_name(self):
+        """The embedder_fits row of the embedder: its kind and dimension."""
+        return f"{self.embedder.name}:{self.embedder.dim}"
+
+    @classmethod
+    def connect(cls, dsn=DATABASE_URL, **kwargs):
+        # Autocommit, so that each transaction() block is a real transaction
+        return cls(psycopg.connect(libpq_dsn(dsn), autocommit=True), **kwargs)
+
+    def apply_schema(self, path=SCHEMA_PATH):
+        """Create the tables and indexes of db/schema.sql if missing."""
+        with self.conn.transaction():
+            self.conn.execute(Path(path).read_text(encoding="utf-8"))
+
+    def database_hashes(self):
+        """{supervisor id: content hash} as stored in the database."""
+        return dict(self.conn.execute("SELECT id, content_hash FROM supervisors"))
+
+    def vector_dim(self):
+        """Dimension of the schema's embedding columns."""
+        (dim,) = self.conn.execute(
+            "SELECT atttypmod FROM pg_attribute "
+            "WHERE attrelid = 'supervisor_embeddings'::regclass "
+            "AND attname = 'embedding'"
+        ).fetchone()
+        return dim
+
+    def stored_fit(self):
+        """(documents, document frequencies) of the embedder's pinned fit."""
+        row = self.conn.execute(
+            "SELECT documents, document_frequencies FROM embedder_fits "
+            "WHERE embedder = %s",
+            (self.fit_name,),
+        ).fetchone()
+        return row and (row[0], np.frombuffer(row[1], dtype="<f4"))
+
+    def fit_embedder(self, profiles, full=False, fitted=None):
+        """
+        Fit the embedder to the profiles' field texts. A corpus-fitted
+        embedder keeps the fit it has (fitted, from stored_fit()) unless full
+        is set or the corpus has drifted from it; returns the new (documents,
+        document frequencies) to store, or None when the fit was kept.
+        """
+        texts = [field_text(p, f) for p in profiles.values() for f in FIELD_EMBEDDINGS]
+        if not hasattr(self.embedder, "set_fit"):
+            # Pretrained models do not depend on the corpus
+            self.embedder.fit(texts)
+            return None
+        df = self.embedder.document_frequencies(texts)
+        if fitted and not full and fit_drift(fitted[1], df) <= self.refit_drift:
+            return None
+        self.embedder.set_fit(df, len(texts))
+        return len(texts), df
+
+    def plan(self, profiles, full=False, stored=None):
+        """(changed {id: profile}, removed ids, {id: new hash})."""
+        if stored is None:
+            stored = self.database_hashes()
+        hashes = {
+            user_id: content_hash(profile, self.embedder_key)
+            for user_id, profile in profiles.items()
+        }
+        changed = {
+            user_id: profiles[user_id]
+            for user_id, digest in hashes.items()
+            if full or stored.get(user_id) != digest
+        }
+        removed = sorted(stored.keys() - profiles.keys())
+        return changed, removed, hashes
+
+    def _embed(self, profiles, changed):
+        """(field embedding rows, interest rows) of the changed supervisors."""
+        fields, interests = [], []
+        for user_id, profile in changed.items():
+            for embedding_type, field in FIELD_EMBEDDINGS.items():
+                text = field_text(profile, field)
+                if text:
+                    fields.append((user_id, embedding_type, text))
+            interests.extend(
+                (user_id, interest.strip(), interest.strip())
+                for interest in _strings(profile.get("research_interests"))
+                if interest.strip()
+            )
+
+        texts = list(dict.fromkeys(text for _, _, text in fields + interests))
+        if not texts:
+            return [], []
+        matrix = self.embedder.embed(texts)
+        dim = self.vector_dim()
+        if matrix.shape[1] != dim:
+            raise ValueError(
+                f"the embedder produces {matrix.shape[1]}-dimensional vectors, "
+                f"but the embedding columns are vector({dim})"
+            )
+        by_text = dict(zip(texts, vector_bytes(matrix)))
+        return (
+            [(u, kind, by_text[text]) for u, kind, text in fields],
+            [(u, interest, by_text[text]) for u, interest, text in interests],
+        )
+
+    def _copy(self, table, columns, types, rows):
+        query = f"COPY {table} ({', '.join(columns)}) FROM STDIN (FORMAT BINARY)"
+        with self.conn.cursor().copy(query) as copy:
+            copy.set_types(types)
+            for row in rows:
+                copy.write_row(row)
+
+    def _tables_to_reindex(self, ids, staged):
+        """Tables whose changed rows exceed reindex_ratio of their size."""
+        tables = []
+        for table, new_rows in staged.items():
+            total, replaced = self.conn.execute(
+                f"SELECT count(*), count(*) FILTER (WHERE supervisor_id = ANY(%s)) "
+                f"FROM {table}",
+                (ids,),
+            ).fetchone()
+            if replaced + new_rows > self.reindex_ratio * total:
+                tables.append(table)
+        return tables
+
+    def _create_index(self, table):
+        (rows,) = self.conn.execute(f"SELECT count(*) FROM {table}").fetchone()
+        self.conn.execute(
+            f"CREATE INDEX {IVFFLAT_INDEXES[table]} ON {table} "
+            f"USING ivfflat (embedding vector_cosine_ops) "
+            f"WITH (lists = {ivfflat_lists(rows)})"
+        )
+        self.conn.execute(f"ANALYZE {table}")
+
+    def sync(self, profiles, full=False):
+        """
+        Bring the database up to date with {user_id: profile}. Returns counts
+        of added, updated, removed and unchanged supervisors, plus the list
+        of rebuilt indexes under "reindexed".
+        """
+        # The fit is part of every content hash, so plan with the pinned one
+        fitted = self.stored_fit() if hasattr(self.embedder, "set_fit") else None
+        if fitted:
+            self.embedder.set_fit(fitted[1], fitted[0])
+        stored = self.database_hashes()
+        changed, removed, hashes = self.plan(profiles, full, stored)
+        fit = None
+        # Unless something changed, the corpus has not drifted from the fit
+        if changed or removed or not fitted:
+            fit = self.fit_embedder(profiles, full, fitted)
+            if fit:
+                changed, removed, hashes = self.plan(profiles, full, stored)
+        counts = {
+            "added": len(changed.keys() - stored.keys()),
+            "updated": len(changed.keys() & stored.keys()),
+            "removed": len(removed),
+            "unchanged": len(profiles) - len(changed),
+            "reindexed": [],
+        }
+        if not changed and not removed:
+            return counts
+
+        fields, interests = self._embed(profiles, changed)
+        supervisors = [
+            (
+                user_id,
+                _text(profile.get("name")) or "Unknown",
+                _text(profile.get("position")) or "",
+                _text(profile.get("department")) or "",
+                _text((profile.get("contact") or {}).get("email")) or "",
+                Jsonb(profile, dumps=lambda d: json.dumps(d, default=str)),
+                hashes[user_id],
+            )
+            for user_id, profile in changed.items()
+        ]
+
+        with self.conn.transaction():
+            ids = sorted(changed) + removed
+            reindex = self._tables_to_reindex(
+                ids,
+                {
+                    "research_interests": len(interests),
+                    "supervisor_embeddings": len(fields),
+                },
+            )
+            for table in reindex:
+                self.conn.execute(f"DROP INDEX IF EXISTS {IVFFLAT_INDEXES[table]}")
+
+            self.conn.execute("DELETE FROM supervisors WHERE id = ANY(%s)", (removed,))
+            self.conn.execute(STAGING)
+            self._copy(
+                "stage_supervisors",
+                [
+                    "id",
+                    "name",
+                    "position",
+                    "department",
+                    "email",
+                    "profile_data",
+                    "content_hash",
+                ],
+                ["varchar"] * 5 + ["jsonb", "varchar"],
+                supervisors,
+            )
+            self._copy(
+                "stage_embeddings",
+                ["supervisor_id", "embedding_type", "embedding"],
+                ["varchar", "varchar", "bytea"],  # bytea: raw pgvector bytes
+                fields,
+            )
+            self._copy(
+                "stage_interests",
+                ["supervisor_id", "interest", "embedding"],
+                ["varchar", "varchar", "bytea"],
+                interests,
+            )
+            for statement in UPSERT:
+                self.conn.execute(statement)
+            if fit:
+                # Stored with the vectors made with it
+                documents, df = fit
+                self.conn.execute(
+                    "INSERT INTO embedder_fits "
+                    "(embedder, documents, document_frequencies, fitted_at) "
+                    "VALUES (%s, %s, %s, NOW()) ON CONFLICT (embedder) DO UPDATE SET "
+                    "documents = EXCLUDED.documents, "
+                    "document_frequencies = EXCLUDED.document_frequencies, "
+                    "fitted_at = EXCLUDED.fitted_at",
+                    (self.fit_name, documents, df.astype("<f4").tobytes()),
+                )
+
+            for table in reindex:
+                self._create_index(table)
+        counts["reindexed"] = [IVFFLAT_INDEXES[table] for table in reindex]
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync profiles into PostgreSQL")
+    parser.add_argument("--dsn", default=DATABASE_URL, help="Default DATABASE_URL")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Reload every profile, changed or not, and refit the hashing embedder",
+    )
+    parser.add_argument(
+        "--apply-schema", action="store_true", help="Run db/schema.sql first"
+    )
+    parser.add_argument("--embedder", help="Embedder name (default MATCH_EMBEDDER)")
+    args = parser.parse_args(argv)
+
+    try:
+        sync = PgSync.connect(args.dsn, embedder=default_embedder(args.embedder))
+    except psycopg.Error as e:
+        print(f"❌ Error: could not connect to the database: {e}")
+        return 1
+
+    start = time.perf_counter()
+    try:
+        if args.apply_schema:
+            sync.apply_schema()
+        counts = sync.sync(load_profiles(PROFILES_DIR), full=args.full)
+    except (psycopg.Error, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    finally:
+        sync.close()
+
+    reindexed = counts.pop("reindexed")
+    print(
+        "✅ "
+        + ", ".join(f"{n} {k}" for k, n in counts.items())
+        + f" in {time.perf_counter() - start:.2f} s"
+    )
+    if reindexed:
+        print(f"Rebuilt {', '.join(reindexed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,478 @@
+"""
+Embedded SQLite store of supervisor profiles, synced from the YAML files.
+
+The YAML files in data/profiles remain the source of truth. This store mirrors
+them into normalized tables (supervisors, interests, expertise, publications,
+projects) with FTS5 full-text indexes, so questions across profiles, such as
+"everyone in Software Engineering with an NLP interest", become indexed
+lookups instead of parsing every file.
+
+Syncing is incremental: a profile is only re-imported when its file's mtime,
+size and content hash show it actually changed, and supervisors whose file has
+gone are removed.
+
+Usage:
+    python -m src.store.profile_store sync
+    python -m src.store.profile_store search "natural language processing"
+    python -m src.store.profile_store find --department "Software Engineering" --interest nlp
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+from src.utils.profile_io import PROFILES_DIR, read_yaml
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+DEFAULT_STORE_PATH = Path(
+    os.getenv("PROFILE_STORE_PATH", DATA_DIR / "cache" / "profiles.sqlite")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS supervisors (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    position TEXT,
+    department TEXT,
+    faculty TEXT,
+    university TEXT,
+    email TEXT,
+    profile_json TEXT NOT NULL,
+    source_mtime_ns INTEGER NOT NULL,
+    source_size INTEGER NOT NULL,
+    source_sha1 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS supervisors_department_idx ON supervisors(department);
+CREATE INDEX IF NOT EXISTS supervisors_faculty_idx ON supervisors(faculty);
+
+CREATE TABLE IF NOT EXISTS interests (
+    supervisor_id INTEGER NOT NULL REFERENCES supervisors(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    interest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS interests_supervisor_idx ON interests(supervisor_id);
+
+CREATE TABLE IF NOT EXISTS expertise (
+    supervisor_id INTEGER NOT NULL REFERENCES supervisors(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    term TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS expertise_supervisor_idx ON expertise(supervisor_id);
+
+CREATE TABLE IF NOT EXISTS publications (
+    id INTEGER PRIMARY KEY,
+    supervisor_id INTEGER NOT NULL REFERENCES supervisors(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    title TEXT,
+    authors TEXT,
+    venue TEXT,
+    year INTEGER,
+    doi TEXT
+);
+CREATE INDEX IF NOT EXISTS publications_supervisor_idx ON publications(supervisor_id);
+CREATE INDEX IF NOT EXISTS publications_year_idx ON publications(year);
+CREATE INDEX IF NOT EXISTS publications_doi_idx ON publications(doi);
+
+CREATE TABLE IF NOT EXISTS projects (
+    supervisor_id INTEGER NOT NULL REFERENCES supervisors(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    title TEXT,
+    description TEXT,
+    year TEXT,
+    funding TEXT
+);
+CREATE INDEX IF NOT EXISTS projects_supervisor_idx ON projects(supervisor_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS supervisors_fts USING fts5(
+    user_id UNINDEXED, name, department, faculty, interests, expertise, projects,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS publications_fts USING fts5(
+    user_id UNINDEXED, publication_id UNINDEXED, title, authors, venue,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+# Abbreviations used in queries that profiles spell out in full
+QUERY_SYNONYMS = {
+    "nlp": "natural language processing",
+    "ai": "artificial intelligence",
+    "ml": "machine learning",
+    "iot": "internet of things",
+    "hci": "human computer interaction",
+}
+
+
+def fts_query(text):
+    """
+    Turn free text into a safe FTS5 query that matches all of its words.
+
+    Known abbreviations also match their expanded phrase, so "nlp" finds
+    "Natural Language Processing".
+    """
+    clauses = []
+    for word in re.findall(r"\w+", text.lower()):
+        clause = f'"{word}"'
+        if word in QUERY_SYNONYMS:
+            clause = f'({clause} OR "{QUERY_SYNONYMS[word]}")'
+        clauses.append(clause)
+    return " AND ".join(clauses)
+
+
+def _year(value):
+    match = re.search(r"\b(19|20)\d{2}\b", str(value or ""))
+    return int(match.group(0)) if match else None
+
+
+def _text(value):
+    """A scalar or list field as a single string, or None when empty."""
+    if isinstance(value, list):
+        value = ", ".join(str(v) for v in value if v not in (None, ""))
+    return str(value) if value not in (None, "") else None
+
+
+def _strings(values):
+    return [str(v) for v in values or [] if v not in (None, "")]
+
+
+def _entries(values):
+    return [v for v in values or [] if isinstance(v, dict)]
+
+
+class ProfileStore:
+    """Normalized, full-text indexed mirror of the YAML profiles."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH, profiles_dir=PROFILES_DIR):
+        self.path = Path(path)
+        self.profiles_dir = Path(profiles_dir)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    # Syncing
+
+    def _source_state(self, user_id):
+        return self.conn.execute(
+            "SELECT source_mtime_ns, source_size, source_sha1 FROM supervisors "
+            "WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+
+    def sync_file(self, path, profile=None):
+        """
+        Bring one profile up to date. Returns "added", "updated", "removed" or
+        "unchanged". Pass the already-parsed profile to avoid reading it again.
+        """
+        path = Path(path)
+        user_id = path.stem
+        if not path.exists():
+            return "removed" if self.remove(user_id) else "unchanged"
+
+        stat = path.stat()
+        state = self._source_state(user_id)
+        if state and (state["source_mtime_ns"], state["source_size"]) == (
+            stat.st_mtime_ns,
+            stat.st_size,
+        ):
+            return "unchanged"
+
+        with open(path, "rb") as f:
+            sha1 = hashlib.sha1(f.read()).hexdigest()
+        if state and state["source_sha1"] == sha1:
+            # Touched but not changed: just record the new mtime
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE supervisors SET source_mtime_ns = ?, source_size = ? "
+                    "WHERE user_id = ?",
+                    (stat.st_mtime_ns, stat.st_size, user_id),
+                )
+            return "unchanged"
+
+        if profile is None:
+            profile = read_yaml(path) or {}
+        with self.conn:
+            self._write_profile(user_id, profile, stat, sha1)
+        return "updated" if state else "added"
+
+    def _write_profile(self, user_id, profile, stat, sha1):
+        self._delete(user_id)
+        contact = profile.get("contact") or {}
+        cursor = self.conn.execute(
+            """
+            INSERT INTO supervisors (
+                user_id, name, position, department, faculty, university, email,
+                profile_json, source_mtime_ns, source_size, source_sha1
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                user_id,
+                _text(profile.get("name")),
+                _text(profile.get("position")),
+                _text(profile.get("department")),
+                _text(profile.get("faculty")),
+                _text(profile.get("university")),
+                _text(contact.get("email")) if isinstance(contact, dict) else None,
+                json.dumps(profile, ensure_ascii=False, default=str),
+                stat.st_mtime_ns,
+                stat.st_size,
+                sha1,
+            ),
+        )
+        supervisor_id = cursor.lastrowid
+
+        interests = _strings(profile.get("research_interests"))
+        expertise = _strings(profile.get("expertise"))
+        projects = _entries(profile.get("projects"))
+        self.conn.executemany(
+            "INSERT INTO interests VALUES (?, ?, ?)",
+            [(supervisor_id, i, v) for i, v in enumerate(interests)],
+        )
+        self.conn.executemany(
+            "INSERT INTO expertise VALUES (?, ?, ?)",
+            [(supervisor_id, i, v) for i, v in enumerate(expertise)],
+        )
+        self.conn.executemany(
+            "INSERT INTO projects VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    supervisor_id,
+                    i,
+                    _text(p.get("title")),
+                    _text(p.get("description")),
+                    _text(p.get("year")),
+                    _text(p.get("funding")),
+                )
+                for i, p in enumerate(projects)
+            ],
+        )
+
+        publications = _entries(profile.get("publications")) + _entries(
+            profile.get("conference_publications")
+        )
+        for i, pub in enumerate(publications):
+            venue = _text(
+                pub.get("journal") or pub.get("conference") or pub.get("venue")
+            )
+            title = _text(pub.get("title"))
+            authors = _text(pub.get("authors"))
+            cursor = self.conn.execute(
+                "INSERT INTO publications "
+                "(supervisor_id, position, title, authors, venue, year, doi) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    supervisor_id,
+                    i,
+                    title,
+                    authors,
+                    venue,
+                    _year(pub.get("year")),
+                    _text(pub.get("doi")),
+                ),
+            )
+            self.conn.execute(
+                "INSERT INTO publications_fts VALUES (?, ?, ?, ?, ?)",
+                (
+                    user_id,
+                    cursor.lastrowid,
+                    title,
+                    authors,
+                    venue,
+                ),
+            )
+
+        self.conn.execute(
+            "INSERT INTO supervisors_fts VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                user_id,
+                _text(profile.get("name")),
+                _text(profile.get("department")),
+                _text(profile.get("faculty")),
+                "\n".join(interests),
+                "\n".join(expertise),
+                "\n".join(
+                    f"{_text(p.get('title')) or ''} {_text(p.get('description')) or ''}"
+                    for p in projects
+                ),
+            ),
+        )
+
+    def _delete(self, user_id):
+        self.conn.execute("DELETE FROM supervisors_fts WHERE user_id = ?", (user_id,))
+        self.conn.execute("DELETE FROM publications_fts WHERE user_id = ?", (user_id,))
+        cursor = self.conn.execute(
+            "DELETE FROM supervisors WHERE user_id = ?", (user_id,)
+        )
+        return cursor.rowcount > 0
+
+    def remove(self, user_id):
+        """Drop a supervisor from the store. Returns whether it was present."""
+        with self.conn:
+            return self._delete(user_id)
+
+    def sync(self):
+        """Sync every profile file, removing supervisors whose file is gone."""
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        seen = set()
+        for path in sorted(self.profiles_dir.glob("*.yaml")):
+            if "_extracted" in path.name:
+                continue
+            seen.add(path.stem)
+            counts[self.sync_file(path)] += 1
+
+        for user_id in set(self.user_ids()) - seen:
+            self.remove(user_id)
+            counts["removed"] += 1
+        return counts
+
+    # Queries
+
+    def user_ids(self):
+        return [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT user_id FROM supervisors ORDER BY user_id"
+            )
+        ]
+
+    def get(self, user_id):
+        """The full profile as stored, or None."""
+        row = self.conn.execute(
+            "SELECT profile_json FROM supervisors WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search(self, text, limit=20):
+        """
+        Rank supervisors by full-text match on name, department, interests,
+        expertise and projects. Returns dicts with user_id, name and score.
+        """
+        query = fts_query(text)
+        if not query:
+            return []
+        rows = self.conn.execute(
+            """
+            SELECT f.user_id, s.name, s.department, -bm25(supervisors_fts) AS score
+            FROM supervisors_fts f JOIN supervisors s ON s.user_id = f.user_id
+            WHERE supervisors_fts MATCH ?
+            ORDER BY score DESC LIMIT ?
+            """,
+            (query, limit),
+        )
+        return [dict(row) for row in rows]
+
+    def find(self, department=None, faculty=None, interest=None, expertise=None):
+        """
+        Supervisors matching every given filter. Department and faculty match
+        as case-insensitive substrings; interest and expertise are full-text
+        matches against those lists.
+        """
+        clauses = []
+        params = []
+        if department:
+            clauses.append("s.department LIKE ?")
+            params.append(f"%{department}%")
+        if faculty:
+            clauses.append("s.faculty LIKE ?")
+            params.append(f"%{faculty}%")
+        for column, text in (("interests", interest), ("expertise", expertise)):
+            if text:
+                query = fts_query(text)
+                # Like search(), text without any words matches nothing
+                if not query:
+                    return []
+                clauses.append(
+                    "s.user_id IN (SELECT user_id FROM supervisors_fts "
+                    "WHERE supervisors_fts MATCH ?)"
+                )
+                params.append(f"{column} : ({query})")
+
+        where = " AND ".join(clauses) or "1"
+        rows = self.conn.execute(
+            f"SELECT s.user_id, s.name, s.department FROM supervisors s "
+            f"WHERE {where} ORDER BY s.user_id",
+            params,
+        )
+        return [dict(row) for row in rows]
+
+    def interests(self, user_id):
+        return [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT i.interest FROM interests i "
+                "JOIN supervisors s ON s.id = i.supervisor_id "
+                "WHERE s.user_id = ? ORDER BY i.position",
+                (user_id,),
+            )
+        ]
+
+    def search_publications(self, text, limit=20, since=None):
+        """Full-text search over publication titles, authors and venues."""
+        query = fts_query(text)
+        if not query:
+            return []
+        rows = self.conn.execute(
+            """
+            SELECT f.user_id, p.title, p.authors, p.venue, p.year, p.doi,
+                   -bm25(publications_fts) AS score
+            FROM publications_fts f JOIN publications p ON p.id = f.publication_id
+            WHERE publications_fts MATCH ? AND (? IS NULL OR p.year >= ?)
+            ORDER BY score DESC LIMIT ?
+            """,
+            (query, since, since, limit),
+        )
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the indexed profile store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("sync", help="Sync the store from data/profiles")
+    search = subparsers.add_parser("search", help="Full-text search supervisors")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=20)
+    pubs = subparsers.add_parser("publications", help="Full-text search publications")
+    pubs.add_argument("query")
+    pubs.add_argument("--since", type=int)
+    pubs.add_argument("--limit", type=int, default=20)
+    find = subparsers.add_parser("find", help="Filter supervisors")
+    find.add_argument("--department")
+    find.add_argument("--faculty")
+    find.add_argument("--interest")
+    find.add_argument("--expertise")
+    args = parser.parse_args()
+
+    store = ProfileStore()
+    counts = store.sync()
+    if args.command == "sync":
+        print(", ".join(f"{n} {k}" for k, n in counts.items()))
+    elif args.command == "search":
+        for row in store.search(args.query, args.limit):
+            print(f"{row['score']:6.2f}  {row['user_id']:<15} {row['name']}")
+    elif args.command == "publications":
+        for row in store.search_publications(args.query, args.limit, args.since):
+            print(f"{row['year'] or '----'}  {row['user_id']:<15} {row['title']}")
+    elif args.command == "find":
+        for row in store.find(
+            args.department, args.faculty, args.interest, args.expertise
+        ):
+            print(f"{row['user_id']:<15} {row['name']} ({row['department']})")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""
+Version history for profiles.
+
+Every revision of a profile is kept as a content-addressed object under
+data/history/objects, named by the SHA-256 of the profile file. Objects are
+zlib-compressed and, except for a periodic full snapshot, stored as a
+line-level delta against the previous revision, so a small edit to a large
+profile costs a few hundred bytes. Each profile has an append-only log
+(data/history/logs/<user_id>.jsonl) listing its revisions in order.
+
+Writes are crash-safe: the object is written first, then the live profile is
+replaced by atomic rename, and only then is the revision appended to the log.
+An interrupted write leaves either the old or the new profile in place, never
+a partial one.
+
+Usage:
+    python -m src.store.version_store history <user_id>
+    python -m src.store.version_store show <user_id> [REV]
+    python -m src.store.version_store diff <user_id> [REV_A] [REV_B]
+    python -m src.store.version_store rollback <user_id> REV
+    python -m src.store.version_store import
+
+REV is a revision hash prefix, or a number of revisions back from the latest
+(0 is the latest, 1 the one before, ...). Without REV_B, diff compares
+against the live file.
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+
+from src.utils.profile_io import PROFILES_DIR, atomic_write, dump_yaml, write_yaml
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+HISTORY_DIR = Path(os.getenv("PROFILE_HISTORY_DIR", DATA_DIR / "history"))
+
+# A full snapshot is stored after this many consecutive deltas, which bounds
+# the work needed to reconstruct any revision
+SNAPSHOT_EVERY = 10
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def make_delta(base_lines, lines):
+    """Line-level delta: ["c", start, end] copies base lines, ["i", [...]] inserts."""
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["c", i1, i2])
+        elif j2 > j1:
+            ops.append(["i", lines[j1:j2]])
+    return ops
+
+
+def apply_delta(base_lines, ops):
+    lines = []
+    for op in ops:
+        if op[0] == "c":
+            lines.extend(base_lines[op[1] : op[2]])
+        else:
+            lines.extend(op[1])
+    return lines
+
+
+class VersionStore:
+    """Content-addressed, delta-compressed revisions of every profile."""
+
+    def __init__(
+        self,
+        root=HISTORY_DIR,
+        profiles_dir=PROFILES_DIR,
+        snapshot_every=SNAPSHOT_EVERY,
+    ):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.logs_dir = self.root / "logs"
+        self.profiles_dir = Path(profiles_dir)
+        self.snapshot_every = snapshot_every
+        self._cache = {}
+
+    # Objects
+
+    def _object_path(self, digest):
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def _read_record(self, digest):
+        with open(self._object_path(digest), "rb") as f:
+            return json.loads(zlib.decompress(f.read()))
+
+    def put_object(self, content, base=None):
+        """Store content (bytes), as a delta against base's hash if given."""
+        digest = content_hash(content)
+        path = self._object_path(digest)
+        if path.exists():
+            return digest
+
+        text = content.decode("utf-8")
+        record = {"type": "full", "data": text}
+        if base is not None:
+            base_record = self._read_record(base)
+            depth = base_record.get("depth", 0) + 1
+            if depth < self.snapshot_every:
+                base_lines = self.get_object(base).decode("utf-8").splitlines(True)
+                record = {
+                    "type": "delta",
+                    "base": base,
+                    "depth": depth,
+                    "ops": make_delta(base_lines, text.splitlines(True)),
+                }
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        atomic_write(path, zlib.compress(payload.encode("utf-8"), 9))
+        self._cache[digest] = content
+        return digest
+
+    def get_object(self, digest):
+        """Reconstruct the full content of a stored revision."""
+        if digest in self._cache:
+            return self._cache[digest]
+
+        # Walk back to the nearest snapshot, then replay the deltas forward
+        chain = []
+        current = digest
+        while current not in self._cache:
+            record = self._read_record(current)
+            chain.append((current, record))
+            if record["type"] == "full":
+                break
+            current = record["base"]
+
+        content = None
+        for current, record in reversed(chain):
+            if record["type"] == "full":
+                text = record["data"]
+            else:
+                if content is None:
+                    content = self._cache[record["base"]]
+                base_lines = content.decode("utf-8").splitlines(True)
+                text = "".join(apply_delta(base_lines, record["ops"]))
+            content = text.encode("utf-8")
+            if content_hash(content) != current:
+                raise ValueError(f"Corrupt history object {current}")
+            self._cache[current] = content
+        return content
+
+    # Logs
+
+    def _log_path(self, user_id):
+        return self.logs_dir / f"{user_id}.jsonl"
+
+    def history(self, user_id):
+        """Revisions of a profile, newest first."""
+        path = self._log_path(user_id)
+        if not path.exists():
+            return []
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append
+                    continue
+        return entries[::-1]
+
+    def head(self, user_id):
+        entries = self.history(user_id)
+        return entries[0]["hash"] if entries else None
+
+    def _append_log(self, user_id, entry):
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._log_path(user_id), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    # Revisions
+
+    def record(self, user_id, content, message=""):
+        """
+        Add content (bytes) as the newest revision of a profile, unless it is
+        already the newest. Returns the revision hash.
+        """
+        head = self.head(user_id)
+        digest = self.put_object(content, base=head)
+        if digest != head:
+            self._append_log(
+                user_id,
+                {
+                    "hash": digest,
+                    "parent": head,
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "message": message,
+                    "size": len(content),
+                },
+            )
+        return digest
+
+    def save(self, user_id, profile, message=""):
+        """
+        Write a profile as its newest revision and replace the live file
+        atomically. A live file with no history yet is recorded first, so the
+        state before this save can always be restored.
+        """
+        path = self.profiles_dir / f"{user_id}.yaml"
+        if path.exists() and self.head(user_id) is None:
+            self.record(user_id, path.read_bytes(), "import existing profile")
+
+        content = dump_yaml(profile).encode("utf-8")
+        head = self.head(user_id)
+        digest = self.put_object(content, base=head)
+        write_yaml(path, profile)
+        if digest != head:
+            self.record(user_id, content, message)
+        return digest
+
+    def resolve(self, user_id, rev=None):
+        """Map a hash prefix or a number of revisions back to a full hash."""
+        entries = self.history(user_id)
+        if not entries:
+            raise KeyError(f"No history for {user_id}")
+        if rev is None:
+            return entries[0]["hash"]
+        rev = str(rev)
+        if rev.isdigit() and len(rev) < 4:
+            index = int(rev)
+            if index >= len(entries):
+                raise KeyError(f"{user_id} has only {len(entries)} revisions")
+            return entries[index]["hash"]
+        matches = {e["hash"] for e in entries if e["hash"].startswith(rev)}
+        if len(matches) != 1:
+            raise KeyError(f"Revision {rev!r} of {user_id} is unknown or ambiguous")
+        return matches.pop()
+
+    def show(self, user_id, rev=None):
+        return self.get_object(self.resolve(user_id, rev)).decode("utf-8")
+
+    def diff(self, user_id, rev_a=None, rev_b=None):
+        """Unified diff from revision a (default latest) to b (default live file)."""
+        a = self.resolve(user_id, rev_a)
+        old = self.get_object(a).decode("utf-8").splitlines(True)
+        if rev_b is None:
+            path = self.profiles_dir / f"{user_id}.yaml"
+            new = path.read_text(encoding="utf-8").splitlines(True)
+            label_b = str(path)
+        else:
+            b = self.resolve(user_id, rev_b)
+            new = self.get_object(b).decode("utf-8").splitlines(True)
+            label_b = b[:12]
+        return "".join(difflib.unified_diff(old, new, a[:12], label_b))
+
+    def rollback(self, user_id, rev):
+        """Restore an earlier revision as the newest one (history is kept)."""
+        digest = self.resolve(user_id, rev)
+        content = self.get_object(digest)
+        path = self.profiles_dir / f"{user_id}.yaml"
+        atomic_write(path, content)
+        return self.record(user_id, content, f"rollback to {digest[:12]}")
+
+    def import_all(self):
+        """Record the current state of every profile. Returns how many changed."""
+        changed = 0
+        for path in sorted(self.profiles_dir.glob("*.yaml")):
+            if "_extracted" in path.name:
+                continue
+            head = self.head(path.stem)
+            if self.record(path.stem, path.read_bytes(), "import") != head:
+                changed += 1
+        return changed
+
+    def disk_usage(self):
+        return sum(p.stat().st_size for p in self.root.rglob("*") if p.is_file())
+
+
+def save_profile_version(user_id, profile, message=""):
+    """Write a profile through the default version store."""
+    return VersionStore().save(user_id, profile, message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile version history")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    history = subparsers.add_parser("history", help="List revisions of a profile")
+    history.add_argument("user_id")
+    show = subparsers.add_parser("show", help="Print a revision")
+    show.add_argument("user_id")
+    show.add_argument("rev", nargs="?")
+    diff = subparsers.add_parser("diff", help="Diff two revisions")
+    diff.add_argument("user_id")
+    diff.add_argument("rev_a", nargs="?")
+    diff.add_argument("rev_b", nargs="?")
+    rollback = subparsers.add_parser("rollback", help="Restore a revision")
+    rollback.add_argument("user_id")
+    rollback.add_argument("rev")
+    subparsers.add_parser("import", help="Record the current state of all profiles")
+    args = parser.parse_args()
+
+    store = VersionStore()
+    try:
+        if args.command == "history":
+            for i, entry in enumerate(store.history(args.user_id)):
+                print(
+                    f"{i:>3}  {entry['hash'][:12]}  {entry['time']}  "
+                    f"{entry['size']:>7} B  {entry['message']}"
+                )
+        elif args.command == "show":
+            print(store.show(args.user_id, args.rev), end="")
+        elif args.command == "diff":
+            print(store.diff(args.user_id, args.rev_a, args.rev_b), end="")
+        elif args.command == "rollback":
+            digest = store.rollback(args.user_id, args.rev)
+            print(f"✅ Restored {args.user_id} as revision {digest[:12]}")
+        elif args.command == "import":
+            changed = store.import_all()
+            print(
+                f"Recorded {changed} changed profiles "
+                f"({store.disk_usage() / 1024:.1f} KB of history)"
+            )
+    except KeyError as e:
+        print(f"❌ Error: {e.args[0]}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Profile completeness scoring.
+
+A profile's completeness is the weighted share of schema fields that are
+filled in, where required fields count twice as much as optional ones. Scores
+are kept per supervisor in data/cache/completeness.json so they can be updated
+one profile at a time.
+"""
+
+import json
+from pathlib import Path
+
+from src.processor.merge_engine import is_empty
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+SCHEMA_PATH = (
+    Path(__file__).parent.parent.parent / "docs" / "schema" / "profile_schema.json"
+)
+COMPLETENESS_PATH = DATA_DIR / "cache" / "completeness.json"
+
+REQUIRED_WEIGHT = 2
+OPTIONAL_WEIGHT = 1
+
+
+def load_schema(schema_path=SCHEMA_PATH):
+    with open(schema_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def completeness(profile, schema):
+    """Return (score between 0 and 1, list of missing schema fields)."""
+    required = set(schema.get("required", []))
+    total = 0
+    filled = 0
+    missing = []
+    for field in schema["properties"]:
+        weight = REQUIRED_WEIGHT if field in required else OPTIONAL_WEIGHT
+        total += weight
+        if is_empty((profile or {}).get(field)):
+            missing.append(field)
+        else:
+            filled += weight
+    return (filled / total if total else 0.0), missing
+
+
+def load_scores(path=COMPLETENESS_PATH):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_scores(scores, path=COMPLETENESS_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(scores, f, indent=2, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def update_score(user_id, profile, schema, path=COMPLETENESS_PATH):
+    """Recompute one supervisor's score (or drop it if profile is None)."""
+    scores = load_scores(path)
+    if profile is None:
+        scores.pop(user_id, None)
+        save_scores(scores, path)
+        return None
+
+    score, missing = completeness(profile, schema)
+    scores[user_id] = {"score": round(score, 3), "missing": missing}
+    save_scores(scores, path)
+    return score
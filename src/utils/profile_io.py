@@ -0,0 +1,243 @@
+"""
+Shared YAML I/O for profiles and extracted data.
+
+Every stage of the pipeline reads the same profiles, so all YAML goes through
+this module:
+
+- The libyaml-backed CSafeLoader/CSafeDumper are used when PyYAML was built
+  with them, with the pure-Python SafeLoader/SafeDumper as a fallback.
+- Parsed files are kept in a pickle cache (data/cache/profiles.pickle). An
+  entry is reused while the file's mtime and size are unchanged. If those
+  change but the content hash does not (e.g. a touch or an identical
+  rewrite), the entry is kept without parsing again.
+- Writes are atomic (temporary file plus rename), so readers and the profile
+  watcher never see a half-written profile.
+
+Loaded data is returned as a fresh copy, so callers may modify it freely.
+"""
+
+import atexit
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import threading
+from pathlib import Path
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper, SafeLoader
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+PROFILES_DIR = DATA_DIR / "profiles"
+EXTRACTED_DIR = DATA_DIR / "extracted"
+DEFAULT_CACHE_PATH = Path(
+    os.getenv("PROFILE_CACHE_PATH", DATA_DIR / "cache" / "profiles.pickle")
+)
+
+LIBYAML = SafeLoader.__name__.startswith("C")
+
+
+def load_yaml(text):
+    """Parse YAML text (or a stream) with the fastest available safe loader."""
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def dump_yaml(data, stream=None, sort_keys=False):
+    """Dump data as block-style, unicode YAML, keeping key order by default."""
+    return yaml.dump(
+        data,
+        stream,
+        Dumper=SafeDumper,
+        default_flow_style=False,
+        allow_unicode=True,
+        sort_keys=sort_keys,
+    )
+
+
+class ProfileCache:
+    """Parsed YAML files keyed by path, persisted as a pickle."""
+
+    VERSION = 1
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = Path(path) if path else None
+        self.entries = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, "rb") as f:
+                version, entries = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+            return
+        if version == self.VERSION:
+            self.entries = entries
+
+    def read(self, file_path):
+        """Return the parsed contents of a YAML file, parsing only on change."""
+        key = str(Path(file_path).resolve())
+        stat = os.stat(key)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns:
+                if entry["size"] == stat.st_size:
+                    self.hits += 1
+                    return pickle.loads(entry["data"])
+
+        with open(key, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and entry["sha1"] == digest:
+                self.hits += 1
+                blob = entry["data"]
+            else:
+                self.misses += 1
+                blob = pickle.dumps(
+                    load_yaml(raw.decode("utf-8")), pickle.HIGHEST_PROTOCOL
+                )
+            self.entries[key] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha1": digest,
+                "data": blob,
+            }
+            self.dirty = True
+        return pickle.loads(blob)
+
+    def store(self, file_path, raw, data):
+        """Record data just written to file_path so it is not parsed again."""
+        key = str(Path(file_path).resolve())
+        stat = os.stat(key)
+        with self._lock:
+            self.entries[key] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha1": hashlib.sha1(raw).hexdigest(),
+                "data": pickle.dumps(data, pickle.HIGHEST_PROTOCOL),
+            }
+            self.dirty = True
+
+    def forget(self, file_path):
+        with self._lock:
+            if self.entries.pop(str(Path(file_path).resolve()), None) is not None:
+                self.dirty = True
+
+    def save(self):
+        """Persist the cache if anything changed, dropping files that are gone."""
+        if not self.path or not self.dirty:
+            return
+        with self._lock:
+            entries = {k: v for k, v in self.entries.items() if os.path.exists(k)}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(
+                self.path,
+                pickle.dumps((self.VERSION, entries), pickle.HIGHEST_PROTOCOL),
+            )
+            self.entries = entries
+            self.dirty = False
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache():
+    """The process-wide profile cache, created on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ProfileCache()
+            atexit.register(_default_cache.save)
+        return _default_cache
+
+
+def _read_umask():
+    # os.umask can only be read by setting it, so do it once at import
+    # rather than racing other threads on every write
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _read_umask()
+
+
+def atomic_write(path, data):
+    """Write bytes to path via a synced temporary file and a rename."""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; keep the permissions the file had,
+        # or give a new one the mode a plain open() would
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_yaml(file_path, cache=None):
+    """Load a YAML file through the profile cache."""
+    cache = cache or default_cache()
+    return cache.read(file_path)
+
+
+def write_yaml(file_path, data, sort_keys=False, cache=None):
+    """Atomically write data as YAML and refresh its cache entry."""
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    raw = dump_yaml(data, sort_keys=sort_keys).encode("utf-8")
+    atomic_write(file_path, raw)
+    (cache or default_cache()).store(file_path, raw, data)
+
+
+def load_profile(user_id, profiles_dir=PROFILES_DIR, cache=None):
+    """Load a supervisor's profile, or None if it does not exist."""
+    path = Path(profiles_dir) / f"{user_id}.yaml"
+    if not path.exists():
+        return None
+    return read_yaml(path, cache)
+
+
+def load_extracted(user_id, extracted_dir=EXTRACTED_DIR, cache=None):
+    """Load a supervisor's extracted data, or None if there is none."""
+    path = Path(extracted_dir) / f"{user_id}_extracted.yaml"
+    if not path.exists():
+        return None
+    return read_yaml(path, cache)
+
+
+def load_profiles(profiles_dir=PROFILES_DIR, cache=None):
+    """Load every profile in a directory as {user_id: profile}."""
+    cache = cache or default_cache()
+    profiles = {}
+    for path in sorted(Path(profiles_dir).glob("*.yaml")):
+        if "_extracted" in path.name:
+            continue
+        profiles[path.stem] = cache.read(path)
+    cache.save()
+    return profiles
@@ -0,0 +1,49 @@
+"""
+Local stand-in for an OpenAI-compatible /v1/embeddings endpoint, used by the
+tests.
+
+Serves deterministic vectors on a random localhost port: each text maps to a
+fixed pseudo-random vector seeded by its MD5, so equal texts always embed
+equally. Every request's batch of inputs is recorded.
+"""
+
+import hashlib
+
+import numpy as np
+
+from tests.stub_server import StubServer
+
+
+def stub_vector(text, dim):
+    seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+    return np.random.default_rng(seed).standard_normal(dim).tolist()
+
+
+class EmbeddingStub(StubServer):
+    """Run a stub embeddings server in a background thread."""
+
+    api_path = "/v1"
+
+    def __init__(self, dim=16):
+        super().__init__()
+        self.dim = dim
+        self.batches = []
+
+    def post(self, path, body, request):
+        inputs = body["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        self.batches.append(inputs)
+        return 200, {
+            "object": "list",
+            "model": body.get("model"),
+            # Reversed, as servers may return items in any order
+            "data": [
+                {"index": i, "embedding": stub_vector(text, self.dim)}
+                for i, text in reversed(list(enumerate(inputs)))
+            ],
+        }
+
+    @property
+    def texts_embedded(self):
+        return [text for batch in self.batches for text in batch]
@@ -0,0 +1,61 @@
+"""
+Local stand-in for the Gemini REST API, used by the tests.
+
+Serves generateContent, batchGenerateContent and batch status polling on a
+random localhost port. Responses are produced by a callable that receives the
+prompt text and returns the response text; if it raises, generateContent
+answers 429.
+"""
+
+import re
+
+from tests.stub_server import NOT_FOUND, StubServer
+
+
+class GeminiStub(StubServer):
+    """Run a stub Gemini server in a background thread."""
+
+    api_path = "/v1beta"
+
+    def __init__(self, respond):
+        super().__init__()
+        self.respond = respond
+        self.requests = []
+        self.batches = {}
+
+    def post(self, path, body, request):
+        self.requests.append((path, body))
+        if path.endswith(":generateContent"):
+            try:
+                return 200, self.generate(body)
+            except Exception as e:
+                # Stands in for quota and server errors
+                return 429, {"error": {"message": str(e)}}
+        if path.endswith(":batchGenerateContent"):
+            name = f"batches/{len(self.batches) + 1}"
+            requests = body["batch"]["input_config"]["requests"]["requests"]
+            self.batches[name] = [
+                {
+                    "metadata": item["metadata"],
+                    "response": self.generate(item["request"]),
+                }
+                for item in requests
+            ]
+            return 200, {"name": name, "done": False}
+        return NOT_FOUND
+
+    def get(self, path, request):
+        match = re.match(r"^.*/(batches/\d+)$", path)
+        if not match or match.group(1) not in self.batches:
+            return NOT_FOUND
+        name = match.group(1)
+        return 200, {
+            "name": name,
+            "done": True,
+            "response": {"inlinedResponses": {"inlinedResponses": self.batches[name]}},
+        }
+
+    def generate(self, body):
+        prompt = "".join(p.get("text", "") for p in body["contents"][0]["parts"])
+        text = self.respond(prompt)
+        return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
@@ -0,0 +1,77 @@
+"""
+Base class for the local HTTP stand-ins used by the tests.
+
+A stub serves on a random localhost port from a background thread while it is
+used as a context manager. Subclasses answer requests by overriding get()
+and post(), which receive the path (without query string), the decoded JSON
+body for POST, and the request handler. They return (status, payload) or
+(status, payload, content type); a payload that is not a str is sent as JSON.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NOT_FOUND = (404, {"error": "not found"})
+
+
+class StubServer:
+    """Run a stub HTTP server in a background thread."""
+
+    # Path the API lives under, appended to url
+    api_path = ""
+    # Serve HTTP/1.1, so clients can keep connections open
+    keep_alive = False
+
+    def __init__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" if stub.keep_alive else "HTTP/1.0"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, response):
+                status, payload, *content_type = response
+                if isinstance(payload, str):
+                    content_type = content_type or ["text/plain"]
+                else:
+                    payload = json.dumps(payload)
+                    content_type = content_type or ["application/json"]
+                data = payload.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type[0])
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._send(stub.get(self.path.split("?")[0], self))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                self._send(stub.post(self.path.split("?")[0], body, self))
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def get(self, path, request):
+        return NOT_FOUND
+
+    def post(self, path, body, request):
+        return NOT_FOUND
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}{self.api_path}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,80 @@
+"""
+Tests for the HNSW approximate nearest-neighbor index.
+"""
+
+import numpy as np
+
+from src.matching.ann_index import HNSWIndex, ItemIndex
+from src.matching.embedder import HashingEmbedder, normalize_rows
+
+PROFILES = {
+    "alice": {
+        "name": "Dr. Alice Tan",
+        "research_interests": ["Natural Language Processing", "Text Mining"],
+        "publications": [{"title": "Automatic speech recognition for Malay"}],
+    },
+    "bob": {
+        "name": "Dr. Bob Lee",
+        "research_interests": ["Cloud Computing", "Speech Recognition"],
+    },
+    "carol": {
+        "name": "Dr. Carol Lim",
+        "expertise": ["Software Testing", "Software Quality"],
+    },
+}
+
+
+def random_vectors(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    return normalize_rows(rng.standard_normal((n, dim)).astype(np.float32))
+
+
+def test_hnsw_recall_against_exact_search():
+    vectors = random_vectors(1000, 16)
+    queries = random_vectors(50, 16, seed=1)
+    index = HNSWIndex(16, M=12, ef_construction=64)
+    assert index.add(vectors[:500]) == list(range(500))
+    index.add(vectors[500:])
+    assert len(index) == 1000
+
+    recalls = []
+    for query in queries:
+        exact = set(np.argsort(-(vectors @ query))[:10].tolist())
+        ids, similarities = index.search(query, 10, ef=100)
+        assert np.all(np.diff(similarities) <= 1e-6)
+        recalls.append(len(exact & set(ids.tolist())) / 10)
+    assert np.mean(recalls) > 0.9
+
+
+def test_hnsw_finds_exact_duplicates_and_handles_empty_index():
+    index = HNSWIndex(8)
+    ids, _ = index.search(np.ones(8, dtype=np.float32), 5)
+    assert len(ids) == 0
+
+    vectors = random_vectors(300, 8)
+    index.add(vectors)
+    ids, similarities = index.search(vectors[42], 1)
+    assert ids.tolist() == [42] and np.isclose(similarities[0], 1.0)
+
+
+def test_item_index_maps_items_back_to_supervisors():
+    index = ItemIndex(HashingEmbedder(dim=512)).build(PROFILES)
+    assert len(index.texts) == 7
+
+    matches = index.search("speech recognition", k=3)
+    assert [m.user_id for m in matches] == ["bob", "alice"]
+    assert matches[0].evidence == "Speech Recognition"
+    assert matches[1].evidence == "Automatic speech recognition for Malay"
+
+
+def test_item_index_widens_search_until_k_supervisors():
+    profiles = {
+        "alice": {"research_interests": ["Speech Recognition"] * 8},
+        "bob": {"research_interests": ["Speech Synthesis"]},
+        "carol": PROFILES["carol"],
+    }
+    index = ItemIndex(HashingEmbedder(dim=512)).build(profiles)
+    matches = index.search("speech recognition", k=2, items_per_match=1)
+    assert [m.user_id for m in matches] == ["alice", "bob"]
+    # Carol has no matching item, so only two supervisors are found
+    assert len(index.search("speech recognition", k=3, items_per_match=1)) == 2
@@ -0,0 +1,72 @@
+"""
+Tests for batch matching of student query files.
+"""
+
+import csv
+import json
+
+import pytest
+
+from src.matching.batch import match_batch, read_queries, write_results
+from src.matching.embedder import HashingEmbedder
+from src.matching.engine import MatchingEngine
+
+PROFILES = {
+    "alice": {"name": "Dr. Alice Tan", "research_interests": ["Text Mining"]},
+    "bob": {"name": "Dr. Bob Lee", "research_interests": ["Cloud Computing"]},
+    "carol": {"name": "Dr. Carol Lim", "expertise": ["Software Testing"]},
+}
+
+
+@pytest.fixture
+def engine():
+    return MatchingEngine(HashingEmbedder(dim=512)).build(PROFILES)
+
+
+def test_read_csv_and_jsonl(tmp_path):
+    path = tmp_path / "applicants.csv"
+    path.write_text(
+        "student_id,research_statement\ns1,text mining of reviews\n,cloud computing\n"
+    )
+    assert read_queries(path) == [
+        ("s1", "text mining of reviews"),
+        ("2", "cloud computing"),
+    ]
+
+    path = tmp_path / "applicants.jsonl"
+    path.write_text(
+        json.dumps({"id": "s1", "interests": ["testing", "quality"]}) + "\n\n"
+    )
+    assert read_queries(path) == [("s1", "testing, quality")]
+
+    path.write_text(json.dumps({"id": "s1"}) + "\n")
+    with pytest.raises(ValueError, match="record 1"):
+        read_queries(path)
+
+
+def test_chunks_match_single_queries(engine):
+    queries = [
+        (f"s{i}", q) for i, q in enumerate(["text mining", "cloud", "testing"] * 3)
+    ]
+    results = list(match_batch(engine, queries, k=2, chunk_size=4))
+    assert [student_id for student_id, _ in results] == [s for s, _ in queries]
+    for (_, query), (_, matches) in zip(queries, results):
+        assert matches == engine.match(query, 2)
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl"])
+def test_write_results(engine, tmp_path, suffix):
+    path = tmp_path / f"out/matches{suffix}"
+    results = match_batch(engine, [("s1", "cloud computing"), ("s2", "testing")], k=1)
+    assert write_results(path, results) == 2
+
+    if suffix == ".csv":
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert [(r["student_id"], r["rank"], r["user_id"]) for r in rows] == [
+            ("s1", "1", "bob"),
+            ("s2", "1", "carol"),
+        ]
+    else:
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r["matches"][0]["user_id"] for r in records] == ["bob", "carol"]
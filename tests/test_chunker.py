@@ -0,0 +1,75 @@
+"""
+Tests for chunked map-reduce extraction of large markdown sources.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+from src.processor.chunker import chunk_markdown, split_sections, strip_inline_data
+from src.processor.gemini_integration import estimate_tokens
+from src.processor.processor import extract_markdown, reduce_extracted
+
+
+def _cv(publications=200):
+    pubs = "\n\n".join(
+        f"{i}. Tan, A.; Lee, B. ({2000 + i % 20}). Paper number {i} on fuzzy "
+        f"decision support, JOURNAL OF TESTING. doi:10.1000/{i}"
+        for i in range(1, publications + 1)
+    )
+    return (
+        "#### DR. ALICE TAN\n"
+        "![](data:image/jpeg;base64," + "A" * 50000 + ")\n\n"
+        "CONTACT\n\nTelephone: 03-7967 6372\nalice@um.edu.my\n\n"
+        "ACADEMIC QUALIFICATION\n\n"
+        "- PhD in Computer Science from University of Malaya (2014).\n\n"
+        "PUBLICATIONS\n\n" + pubs + "\n"
+    )
+
+
+def test_inline_images_are_stripped():
+    assert strip_inline_data("![](data:image/png;base64,AAAA) text") == "![]() text"
+
+
+def test_sections_split_on_headings():
+    headings = [h for h, _ in split_sections(_cv(3))]
+    assert headings == [
+        "#### DR. ALICE TAN",
+        "CONTACT",
+        "ACADEMIC QUALIFICATION",
+        "PUBLICATIONS",
+    ]
+
+
+def test_chunks_respect_budget_and_repeat_heading():
+    chunks = chunk_markdown(_cv(), budget=500)
+    assert len(chunks) > 5
+    assert all(estimate_tokens(c) <= 500 for c in chunks)
+    # Continuation chunks of the long publication list keep its heading
+    assert sum(c.startswith("PUBLICATIONS") for c in chunks) > 1
+    assert not any("base64" in c and "AAAA" in c for c in chunks)
+
+
+def test_reduce_deduplicates_across_chunks():
+    pub = {"section": "PUBLICATIONS", "content": "Tan, A. (2020). A paper."}
+    reduced = reduce_extracted(
+        [
+            {"publications": [pub], "contact": {"phone": ["03-7967 6372"]}},
+            {
+                "publications": [{**pub, "content": "tan, a. (2020).  A paper."}],
+                "contact": {"phone": ["0379676372"], "office": "Room 1"},
+            },
+            {"contact": {"office": "Room 2"}},
+        ]
+    )
+    assert len(reduced["publications"]) == 1
+    assert reduced["contact"] == {"phone": ["03-7967 6372"], "office": "Room 1"}
+
+
+def test_parallel_extraction_matches_sequential():
+    cv = _cv()
+    sequential = extract_markdown(cv, budget=500)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parallel = extract_markdown(cv, executor, budget=500)
+
+    assert parallel == sequential
+    assert "alice@um.edu.my" in sequential["contact"]["email"]
+    assert any("Paper number 200" in p["content"] for p in sequential["publications"])
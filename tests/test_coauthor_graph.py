@@ -0,0 +1,196 @@
+"""
+Tests for the co-authorship graph: publication matching, CSR neighbor lists,
+k-hop queries, re-ranking and incremental updates.
+"""
+
+import numpy as np
+import pytest
+
+from src.matching.coauthor_graph import CoauthorGraph, name_variants, publication_key
+from src.matching.embedder import HashingEmbedder
+from src.matching.engine import Match, MatchingEngine
+from src.matching.live_index import LiveIndexes
+
+SHARED = {
+    "title": "Regression test selection for web applications",
+    "year": 2021,
+    "authors": "Tan, Alice; Lee, Bob; Lim, Carol",
+}
+
+PROFILES = {
+    "alice": {
+        "name": "Dr. Alice Tan",
+        "department": "Software Engineering",
+        "publications": [
+            SHARED,
+            {
+                "title": "Mining app reviews",
+                "authors": "Alice Tan, Bob Lee",
+                "doi": "10.1000/reviews",
+            },
+        ],
+    },
+    "bob": {
+        "name": "Dr. Bob Lee",
+        "department": "Software Engineering",
+        # The same paper, listed with a DOI link and different author spelling
+        "publications": [
+            {
+                "title": "Mining App Reviews.",
+                "authors": "Lee, B., & Tan, A.",
+                "doi": "https://doi.org/10.1000/REVIEWS",
+            }
+        ],
+    },
+    "carol": {
+        "name": "Prof. Carol Lim",
+        "department": "Software Engineering",
+        "conference_publications": [
+            {
+                "title": "Test oracles from specifications",
+                "authors": ["Lim, Carol", "Ng, Dave"],
+            }
+        ],
+    },
+    "dave": {"name": "Dr. Dave Ng", "department": "Artificial Intelligence"},
+    "erin": {"name": "Dr. Erin Wong", "department": "Information Systems"},
+}
+
+
+def edge_map(graph):
+    user_ids, indptr, indices, weights, counts = graph.csr
+    return {
+        (user_ids[row], user_ids[i]): (pytest.approx(w), c)
+        for row in range(len(user_ids))
+        for i, w, c in zip(
+            indices[indptr[row] : indptr[row + 1]],
+            weights[indptr[row] : indptr[row + 1]],
+            counts[indptr[row] : indptr[row + 1]],
+        )
+    }
+
+
+def test_publication_keys_and_name_variants():
+    assert publication_key({"doi": "https://doi.org/10.1/X"}) == "doi:10.1/x"
+    assert publication_key({"title": "Mining App Reviews."}) == (
+        "title:mining app reviews"
+    )
+    assert publication_key({"title": "Editorial"}) is None
+    variants = name_variants("Dr. Ong Sim Ying")
+    assert {"ong", "sim", "ying"} in variants and {"ong", "simying"} in variants
+    assert name_variants("AP Dr. Siti Hafizah Binti Ab Hamid")[0] >= {"siti"}
+    assert name_variants("Dr. X") == []
+
+
+def test_csr_holds_weighted_neighbor_lists():
+    graph = CoauthorGraph().build(PROFILES)
+    user_ids, indptr = graph.csr[:2]
+    assert user_ids == ["alice", "bob", "carol", "dave", "erin"]
+    assert indptr.tolist() == [0, 2, 4, 7, 8, 8]
+    # Three authors: 1/2 to each pair; two authors: 1
+    assert edge_map(graph)[("alice", "bob")] == (pytest.approx(1.5), 2)
+    assert edge_map(graph)[("alice", "carol")] == (pytest.approx(0.5), 1)
+    assert edge_map(graph)[("carol", "dave")] == (pytest.approx(1.0), 1)
+    assert all(edge_map(graph)[(b, a)] == v for (a, b), v in edge_map(graph).items())
+    assert graph.neighbors("carol") == [
+        ("dave", 1.0, 1),
+        ("alice", 0.5, 1),
+        ("bob", 0.5, 1),
+    ]
+    assert graph.neighbors("carol", k=1) == [("dave", 1.0, 1)]
+    assert graph.neighbors("erin") == []
+    with pytest.raises(KeyError):
+        graph.neighbors("nobody")
+
+
+def test_related_walks_k_hops():
+    graph = CoauthorGraph().build(PROFILES)
+    one_hop = graph.related("alice", hops=1)
+    assert [m.user_id for m in one_hop] == ["bob", "carol"]
+    assert one_hop[0].evidence == "2 shared publications"
+    assert sum(m.score for m in one_hop) == pytest.approx(1.0)
+
+    two_hops = graph.related("alice", hops=2)
+    assert [m.user_id for m in two_hops][-1] == "dave"
+    assert two_hops[-1].evidence == "2 hops"
+    assert graph.related("erin") == []
+
+
+def test_rerank_boosts_co_authors_of_strong_matches():
+    graph = CoauthorGraph().build(PROFILES)
+    matches = [
+        Match("erin", "Erin", "", 0.50),
+        Match("dave", "Dave", "", 0.45),
+        Match("carol", "Carol", "", 0.40),
+    ]
+    reranked = graph.rerank(matches, boost=0.5)
+    # Dave's only co-author is Carol: 0.45 + 0.5 * 0.40; Dave has half of
+    # Carol's co-authorship weight: 0.40 + 0.5 * 0.45 / 2
+    assert [m.user_id for m in reranked] == ["dave", "carol", "erin"]
+    assert reranked[0].score == pytest.approx(0.65)
+    assert reranked[1].score == pytest.approx(0.5125)
+    assert reranked[0].fields == {"match": 0.45, "coauthors": pytest.approx(0.2)}
+    assert reranked[2].fields is None
+    assert graph.rerank(matches, k=1, boost=0) == matches[:1]
+
+    engine = MatchingEngine(HashingEmbedder(dim=64)).build(PROFILES)
+    assert {m.user_id for m in graph.rerank(engine.match("mining", 5))} <= set(PROFILES)
+
+
+def test_upserts_and_deletes_match_a_rebuild():
+    edited = dict(PROFILES)
+    # Bob no longer lists the review paper, but is still named on Alice's copy
+    edited["bob"] = {"name": "Dr. Bob Lee", "department": "Software Engineering"}
+    # Erin turns out to be an author of Carol's paper
+    edited["erin"] = {"name": "Dr. Erin Wong", "department": "Information Systems"}
+    edited["carol"] = {
+        **PROFILES["carol"],
+        "conference_publications": [
+            {
+                "title": "Test oracles from specifications",
+                "authors": ["Lim, Carol", "Ng, Dave", "Wong, Erin"],
+            }
+        ],
+    }
+    del edited["alice"]
+    edited["frank"] = {
+        "name": "Dr. Frank Goh",
+        "publications": [{**SHARED, "authors": SHARED["authors"] + "; Goh, Frank"}],
+    }
+
+    # Edits to existing supervisors patch the changed CSR rows in place
+    graph = CoauthorGraph().build(PROFILES)
+    graph.neighbors("carol")
+    graph.upsert("carol", edited["carol"])
+    graph.upsert("bob", edited["bob"])
+    expected = CoauthorGraph().build(
+        {**PROFILES, "bob": edited["bob"], "carol": edited["carol"]}
+    )
+    assert [a.tolist() for a in graph.csr[1:]] == [a.tolist() for a in expected.csr[1:]]
+
+    graph = CoauthorGraph().build(PROFILES)
+    for user_id in ("bob", "carol", "frank"):
+        graph.upsert(user_id, edited[user_id])
+    graph.delete("alice")
+    expected = CoauthorGraph().build(edited)
+    assert graph.csr[0] == expected.csr[0]
+    assert edge_map(graph) == edge_map(expected)
+    assert edge_map(graph)[("dave", "erin")] == (pytest.approx(0.5), 1)
+    # Frank's copy of the shared paper still links Bob and Carol
+    assert edge_map(graph)[("bob", "frank")] == (pytest.approx(0.5), 1)
+
+    for user_id in list(edited):
+        graph.delete(user_id)
+    assert graph.csr[0] == [] and not graph.edges
+    assert graph.memory_bytes() == np.zeros(1, dtype=np.int64).nbytes
+
+
+def test_live_indexes_keep_the_graph_in_step():
+    graph = CoauthorGraph()
+    live = LiveIndexes(graph=graph)
+    live.sync(PROFILES)
+    assert graph.neighbors("bob")[0][0] == "alice"
+    profiles = {**PROFILES, "bob": {"name": "Dr. Robert Lee"}}
+    assert live.sync(profiles) == {"bob"}
+    assert [user_id for user_id, _, _ in graph.neighbors("alice")] == ["carol"]
+    assert live.stats()["graph_tombstones"] == 0
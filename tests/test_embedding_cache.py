@@ -0,0 +1,129 @@
+"""
+Tests for the batched, cached embedding pipeline against a local stub server.
+"""
+
+import hashlib
+
+import numpy as np
+import pytest
+
+from src.matching.embedder import OpenAIEmbedder, get_embedder
+from src.matching.embedding_cache import (
+    CachedEmbedder,
+    VectorCache,
+    profile_texts,
+    text_hash,
+)
+from src.matching.engine import MatchingEngine
+from tests.embedding_stub import EmbeddingStub
+
+PROFILES = {
+    "alice": {
+        "research_interests": ["Natural Language Processing", "Text Mining"],
+        "expertise": ["Text Mining"],
+        "publications": [{"title": "Sentiment analysis"}],
+    },
+    "bob": {
+        "research_interests": ["Cloud Computing", "Natural Language Processing"],
+    },
+}
+
+
+@pytest.fixture
+def stub():
+    with EmbeddingStub(dim=16) as stub:
+        yield stub
+
+
+@pytest.fixture
+def embedder_for():
+    embedders = []
+
+    def make(stub, cache, **kwargs):
+        embedder = OpenAIEmbedder("stub-model", stub.url, batch_size=2, **kwargs)
+        embedders.append(CachedEmbedder(embedder, cache))
+        return embedders[-1]
+
+    yield make
+    for embedder in embedders:
+        embedder.close()
+
+
+def test_text_hash_matches_node_cache_key():
+    # md5 of the trimmed text, as in scripts/vector-search.js
+    assert text_hash("  nlp ") == hashlib.md5(b"nlp").hexdigest()
+
+
+def test_embeds_each_distinct_text_once_in_batches(stub, embedder_for, tmp_path):
+    embedder = embedder_for(stub, VectorCache(tmp_path / "cache.sqlite"))
+    texts = ["a", "b", "a", "c", "", "b"]
+    vectors = embedder.embed(texts)
+
+    assert [len(batch) for batch in stub.batches] == [2, 1]
+    assert sorted(stub.texts_embedded) == ["a", "b", "c"]
+    assert vectors.shape == (6, 16)
+    assert np.allclose(np.linalg.norm(vectors[:4], axis=1), 1.0)
+    assert np.array_equal(vectors[0], vectors[2])
+    assert not vectors[4].any()
+    assert (embedder.misses, embedder.hits) == (4, 0)
+
+
+def test_cache_persists_and_only_new_strings_are_embedded(stub, embedder_for, tmp_path):
+    path = tmp_path / "cache.sqlite"
+    engine = MatchingEngine(embedder_for(stub, VectorCache(path))).build(PROFILES)
+    first = len(stub.texts_embedded)
+    assert first == len(profile_texts(PROFILES)) == 4
+
+    # A new process with a fresh cache object embeds only the edited string
+    edited = {**PROFILES, "bob": {"research_interests": ["Cloud Computing", "IoT"]}}
+    engine = MatchingEngine(embedder_for(stub, VectorCache(path))).build(edited)
+    assert stub.texts_embedded[first:] == ["IoT"]
+    assert engine.match("Cloud Computing")[0].user_id == "bob"
+
+
+def test_model_versions_are_kept_apart(stub, embedder_for, tmp_path):
+    cache = VectorCache(tmp_path / "cache.sqlite")
+    embedder_for(stub, cache).embed(["a"])
+    embedder_for(stub, cache, version="2").embed(["a"])
+    assert len(stub.batches) == 2
+    assert set(cache.stats()) == {"stub-model@1", "stub-model@2"}
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = VectorCache(tmp_path / "cache.sqlite", max_entries=2)
+    vector = np.ones(4, dtype=np.float32)
+    cache.put_many("m", {"a": vector})
+    cache.put_many("m", {"b": vector})
+    assert cache.get_many("m", ["a"])  # a is now more recent than b
+    cache.put_many("m", {"c": vector})
+    assert len(cache) == 2
+    assert set(cache.get_many("m", ["a", "b", "c"])) == {"a", "c"}
+    cache.close()
+
+
+def test_hits_do_not_write_until_the_next_sweep(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = VectorCache(path)
+    cache.put_many("m", {"a": np.ones(4, dtype=np.float32)})
+    writes = cache.conn.total_changes
+    for _ in range(3):
+        assert cache.get_many("m", ["a"])
+    assert cache.conn.total_changes == writes
+    # Closing writes the pending stamps
+    (used,) = cache.conn.execute("SELECT last_used FROM embeddings").fetchone()
+    cache.close()
+    cache = VectorCache(path)
+    assert cache.conn.execute("SELECT last_used FROM embeddings").fetchone()[0] > used
+    cache.close()
+
+
+def test_get_embedder_caches_model_embedders_only(stub, monkeypatch, tmp_path):
+    monkeypatch.setenv("LM_STUDIO_API_URL", stub.url)
+    monkeypatch.setattr(
+        "src.matching.embedding_cache.DEFAULT_CACHE_PATH", tmp_path / "c.sqlite"
+    )
+    embedder = get_embedder("local")
+    assert isinstance(embedder, CachedEmbedder)
+    embedder.close()
+    assert not isinstance(get_embedder("hashing"), CachedEmbedder)
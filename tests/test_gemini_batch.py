@@ -0,0 +1,105 @@
+"""
+Tests for batched Gemini merge requests against a local stub server.
+"""
+
+import json
+import re
+
+from src.processor import gemini_batch
+from src.processor.gemini_batch import (
+    GeminiBatchClient,
+    build_batch_prompt,
+    pack_batches,
+    run_batches,
+)
+from src.processor.llm_cache import LLMResponseCache
+from src.processor.merge_engine import merge_profile
+from tests.gemini_stub import GeminiStub
+
+
+def _entries():
+    entries = []
+    for user_id in ("alice", "bob", "carol"):
+        profile = {
+            "name": f"Dr. {user_id.title()}",
+            "contact": {"email": "a@um.edu.my"},
+        }
+        extracted = {"contact": {"email": [f"{user_id}@um.edu.my"]}}
+        entries.append((user_id, merge_profile(profile, extracted)))
+    return entries
+
+
+def _respond(prompt):
+    user_ids = re.findall(r"### user_id: (\S+)", prompt)
+    results = [
+        {"user_id": u, "patch": {"contact": {"email": f"{u}@um.edu.my"}}}
+        for u in user_ids
+    ]
+    return json.dumps({"results": results})
+
+
+def test_batch_prompt_shares_one_header():
+    prompt = build_batch_prompt(_entries())
+
+    assert prompt.count("TASK:") == 1
+    assert re.findall(r"### user_id: (\S+)", prompt) == ["alice", "bob", "carol"]
+    assert [len(b) for b in pack_batches(_entries(), batch_size=2)] == [2, 1]
+
+
+def test_sync_and_offline_batches_apply_patches(monkeypatch):
+    saved = {}
+    monkeypatch.setattr(
+        gemini_batch, "save_merged_profile", lambda u, p: saved.__setitem__(u, p)
+    )
+
+    with GeminiStub(_respond) as stub:
+        client = GeminiBatchClient("test-key", model_name="stub", api_base=stub.url)
+        batches = pack_batches(_entries(), batch_size=2)
+
+        assert run_batches(client, batches) == ["alice", "bob", "carol"]
+        assert len(stub.requests) == 2
+        assert saved["bob"]["contact"]["email"] == "bob@um.edu.my"
+
+        saved.clear()
+        updated = run_batches(client, batches, offline=True, poll_interval=0)
+        assert updated == ["alice", "bob", "carol"]
+        assert stub.requests[-1][0].endswith(":batchGenerateContent")
+        client.close()
+
+
+def test_failed_request_only_loses_its_own_batch(monkeypatch, tmp_path):
+    saved = {}
+    monkeypatch.setattr(
+        gemini_batch, "save_merged_profile", lambda u, p: saved.__setitem__(u, p)
+    )
+
+    def respond(prompt):
+        if "### user_id: bob" in prompt:
+            raise RuntimeError("Quota exceeded")
+        return _respond(prompt)
+
+    cache = LLMResponseCache(tmp_path / "cache.sqlite")
+    with GeminiStub(respond) as stub:
+        client = GeminiBatchClient("test-key", model_name="stub", api_base=stub.url)
+        batches = pack_batches(_entries(), batch_size=1)
+
+        assert run_batches(client, batches, cache) == ["alice", "carol"]
+        assert sorted(saved) == ["alice", "carol"]
+        # The batches that succeeded were cached and are not requested again
+        requests = len(stub.requests)
+        run_batches(client, batches, cache)
+        assert len(stub.requests) == requests + 1
+        # Keyed on provider and model, as the update scripts' responses are
+        prompt = build_batch_prompt(batches[0])
+        assert cache.get("gemini:stub", prompt, client.generation_config)
+
+        # A failed offline job still applies the batches already cached
+        def fail(name, poll_interval):
+            raise RuntimeError(f"Batch {name} failed: expired")
+
+        monkeypatch.setattr(client, "wait_for_batch", fail)
+        saved.clear()
+        assert run_batches(client, batches, cache, offline=True) == ["alice", "carol"]
+        assert sorted(saved) == ["alice", "carol"]
+        client.close()
+    cache.close()
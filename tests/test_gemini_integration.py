@@ -0,0 +1,76 @@
+"""
+Tests for token budgeting and splitting of the residual Gemini prompts.
+"""
+
+from src.processor.gemini_integration import (
+    build_gemini_prompts,
+    estimate_tokens,
+    prompt_user_id,
+    split_residual,
+    write_gemini_prompts,
+)
+from src.processor.merge_engine import MergeResult
+
+FRAGMENTS = [
+    f"Paper {i}: a study of software architecture for mental health applications"
+    for i in range(40)
+]
+
+RESULT = MergeResult(
+    profile={"name": "Dr. Test Supervisor", "department": "Software Engineering"},
+    conflicts=[
+        {
+            "field": "contact.email",
+            "existing": "a@um.edu.my",
+            "extracted": "b@um.edu.my",
+        }
+    ],
+    unstructured={"publications": FRAGMENTS, "biography": {"text": "Joined UM"}},
+)
+
+
+def test_estimate_tokens_counts_dense_text_by_word_pieces():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    # Punctuation-heavy text: 10 word pieces outweigh 13 characters / 4
+    assert estimate_tokens("10.1/x, a; b.") == 7
+
+
+def test_prompt_user_id_covers_split_parts():
+    assert prompt_user_id("hema_prompt.txt") == "hema"
+    assert prompt_user_id("data/prompts/hema_part3_prompt.txt") == "hema"
+    assert prompt_user_id("hema.yaml") is None
+
+
+def test_split_residual_keeps_every_item_in_order_within_budget():
+    chunks = split_residual(RESULT.residual(), budget=150)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(str(c)) <= 150 for c in chunks)
+    assert chunks[0]["conflicts"] == RESULT.conflicts
+    assert [f for c in chunks for f in c["unstructured"].get("publications", [])] == (
+        FRAGMENTS
+    )
+    assert chunks[-1]["unstructured"]["biography"] == {"text": "Joined UM"}
+
+    assert split_residual(RESULT.residual(), budget=100_000) == [RESULT.residual()]
+    # An item over the budget on its own still gets a chunk
+    assert len(split_residual({"conflicts": RESULT.conflicts}, budget=1)) == 1
+
+
+def test_prompts_stay_within_budget_and_replace_stale_parts(tmp_path):
+    prompts = build_gemini_prompts("tester", RESULT, budget=600)
+    assert len(prompts) > 1
+    assert all(estimate_tokens(p) <= 600 for p in prompts)
+    assert all("Dr. Test Supervisor" in p for p in prompts)
+
+    (tmp_path / "tester_part9_prompt.txt").write_text("stale")
+    (tmp_path / "other_prompt.txt").write_text("kept")
+    written = write_gemini_prompts("tester", RESULT, tmp_path)
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names[0] == "other_prompt.txt"
+    assert "tester_part9_prompt.txt" not in names
+    assert len(names) == len(written) + 1
+
+    resolved = MergeResult(profile=RESULT.profile)
+    assert write_gemini_prompts("tester", resolved, tmp_path) == []
+    assert [p.name for p in tmp_path.iterdir()] == ["other_prompt.txt"]
@@ -0,0 +1,70 @@
+"""
+Tests for hybrid keyword + vector ranking with reciprocal rank fusion.
+"""
+
+import numpy as np
+import pytest
+
+from src.matching.embedder import HashingEmbedder
+from src.matching.hybrid import HybridRanker
+
+PROFILES = {
+    "alice": {
+        "name": "Dr. Alice Tan",
+        "research_interests": ["Natural Language Processing", "Text Mining"],
+        "publications": [{"title": "Sentiment analysis of Malay tweets"}],
+    },
+    "bob": {
+        "name": "Dr. Bob Lee",
+        "research_interests": ["Cloud Computing"],
+        "projects": [{"title": "Text mining of cloud logs", "year": "2021"}],
+    },
+    "carol": {
+        "name": "Dr. Carol Lim",
+        "expertise": ["Software Testing", "Aspect-Oriented Programming"],
+        "supervised_students": {"phd": [{"title": "Mutation testing"}]},
+    },
+}
+
+
+@pytest.fixture
+def ranker():
+    return HybridRanker(HashingEmbedder(dim=512)).build(PROFILES)
+
+
+def test_primary_fields_outrank_secondary(ranker):
+    matches = ranker.match("text mining")
+    assert [m.user_id for m in matches] == ["alice", "bob"]
+    assert set(matches[0].fields) == {"research_interests"}
+    assert set(matches[1].fields) == {"projects"}
+
+
+def test_breakdown_sums_to_score(ranker):
+    for match in ranker.match("testing"):
+        assert np.isclose(sum(match.fields.values()), match.score)
+    assert ranker.match("testing")[0].user_id == "carol"
+    assert "supervised_students" in ranker.match("mutation testing")[0].fields
+
+
+def test_fusion_matches_reference_loop(ranker):
+    lists = [
+        (0, "keyword", np.array([2, 0, 1])),
+        (0, "vector", np.array([0, 2])),
+        (3, "vector", np.array([1])),
+    ]
+    candidates, totals, breakdown = ranker.fuse(lists)
+
+    expected = {}
+    for column, retriever, docs in lists:
+        weight = ranker.field_weights[ranker.fields[column]]
+        for rank, doc in enumerate(docs.tolist(), 1):
+            expected.setdefault(doc, np.zeros(len(ranker.fields)))
+            expected[doc][column] += weight / (ranker.rrf_k + rank)
+    assert candidates.tolist() == sorted(expected)
+    assert np.allclose(breakdown, [expected[d] for d in candidates.tolist()])
+    assert np.allclose(totals, breakdown.sum(axis=1))
+
+
+def test_no_candidates(ranker):
+    assert ranker.match("quantum chromodynamics") == []
+    assert ranker.fuse([])[0].size == 0
@@ -0,0 +1,84 @@
+"""
+Tests for the BM25 keyword index.
+"""
+
+import numpy as np
+
+from src.matching.keyword_index import KeywordIndex, index_terms, profile_strings
+
+PROFILES = {
+    "alice": {
+        "name": "Dr. Alice Tan",
+        "research_interests": ["Natural Language Processing", "Text Mining"],
+        "publications": [{"title": "Aspect-oriented requirements", "year": 2020}],
+    },
+    "bob": {
+        "name": "Dr. Bob Lee",
+        "research_interests": ["Cloud Computing"],
+        "projects": [
+            {
+                "title": "Elastic scheduling",
+                "funding": "Fundamental Research Grant Scheme FP123-2020",
+                "year": "2021",
+            }
+        ],
+    },
+    "carol": {
+        "name": "Dr. Carol Lim",
+        "research_interests": ["Software Testing"],
+        "expertise": ["Software Quality", "Aspect Oriented Programming"],
+        "supervised_students": {"phd": [{"name": "3 students", "title": "Testing"}]},
+    },
+}
+
+
+def test_profile_strings_and_terms():
+    assert profile_strings(PROFILES["bob"]["projects"]) == [
+        "Elastic scheduling",
+        "Fundamental Research Grant Scheme FP123-2020",
+    ]
+    assert profile_strings(PROFILES["carol"]["supervised_students"]) == ["Testing"]
+    assert index_terms("Aspect-oriented NLP") == [
+        "aspect-oriented",
+        "nlp",
+        "aspect",
+        "oriented",
+    ]
+    assert "nlp" in index_terms("Natural Language Processing")
+
+
+def test_exact_terms_and_abbreviations():
+    index = KeywordIndex().build(PROFILES)
+    assert [m.user_id for m in index.search("aspect-oriented")] == ["alice"]
+    assert [m.user_id for m in index.search("aspect oriented")] == ["carol", "alice"]
+    assert [m.user_id for m in index.search("NLP")] == ["alice"]
+    assert [m.user_id for m in index.search("fp123-2020")] == ["bob"]
+    assert index.search("quantum") == []
+
+
+def test_field_boosts_rank_interests_above_publications():
+    profiles = {
+        "interest": {"research_interests": ["Requirements Engineering"]},
+        "paper": {"publications": [{"title": "Requirements Engineering"}]},
+    }
+    index = KeywordIndex().build(profiles)
+    assert [m.user_id for m in index.search("requirements")] == ["interest", "paper"]
+
+
+def test_sparse_and_dense_scoring_agree():
+    index = KeywordIndex().build(PROFILES)
+    for query in ["software testing quality", "cloud nlp", "dr"]:
+        docs, scores = index.matched(query)
+        dense = index.scores(query)
+        assert np.allclose(dense[docs], scores)
+        assert set(docs.tolist()) == set(np.flatnonzero(dense).tolist())
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = KeywordIndex(k1=1.5).build(PROFILES)
+    index.save(tmp_path / "index.npz")
+    loaded = KeywordIndex.load(tmp_path / "index.npz")
+    assert loaded.k1 == 1.5
+    assert loaded.field_boosts == index.field_boosts
+    assert loaded.search("software testing") == index.search("software testing")
+    assert loaded.doc_ids.dtype == np.uint32 and loaded.tfs.dtype == np.float16
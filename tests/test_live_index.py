@@ -0,0 +1,157 @@
+"""
+Tests for incremental upserts, deletes and compaction of the matching indexes.
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from src.matching.ann_index import ItemIndex
+from src.matching.embedder import HashingEmbedder
+from src.matching.engine import MatchingEngine
+from src.matching.keyword_index import KeywordIndex
+from src.matching.live_index import LiveIndexes
+
+PROFILES = {
+    "alice": {
+        "name": "Dr. Alice Tan",
+        "research_interests": ["Natural Language Processing", "Text Mining"],
+        "publications": [{"title": "Aspect-oriented text mining"}],
+    },
+    "bob": {
+        "name": "Dr. Bob Lee",
+        "research_interests": ["Cloud Computing", "Text Mining"],
+    },
+    "carol": {
+        "name": "Dr. Carol Lim",
+        "expertise": ["Software Testing", "Software Quality"],
+    },
+}
+
+EDITED = {
+    "alice": PROFILES["alice"],
+    "bob": {"name": "Dr. Bob Lee", "research_interests": ["Software Testing"]},
+    "dave": {"name": "Dr. Dave Ng", "research_interests": ["Cloud Computing"]},
+}
+
+QUERIES = ["text mining", "software testing", "cloud computing", "aspect-oriented"]
+
+
+def keyword_scores(index):
+    return [
+        {m.user_id: pytest.approx(m.score, rel=1e-3) for m in index.search(q, 10)}
+        for q in QUERIES
+    ]
+
+
+def test_keyword_upserts_score_like_a_rebuild(tmp_path):
+    index = KeywordIndex().build(PROFILES)
+    index.upsert("bob", EDITED["bob"])
+    index.upsert("dave", EDITED["dave"])
+    index.delete("carol")
+    assert index.tombstones == 2
+
+    expected = keyword_scores(KeywordIndex().build(EDITED))
+    assert keyword_scores(index) == expected
+    index.compact()
+    assert index.tombstones == 0 and len(index.user_ids) == 3
+    assert keyword_scores(index) == expected
+
+    index.upsert("carol", PROFILES["carol"])
+    index.save(tmp_path / "index.npz")
+    loaded = KeywordIndex.load(tmp_path / "index.npz")
+    assert keyword_scores(loaded) == keyword_scores(
+        KeywordIndex().build({**EDITED, "carol": PROFILES["carol"]})
+    )
+
+
+def test_engine_upsert_delete_and_compact():
+    engine = MatchingEngine(HashingEmbedder(dim=512)).build(PROFILES)
+    engine.upsert("bob", EDITED["bob"])
+    engine.upsert("dave", EDITED["dave"])
+    engine.delete("carol")
+
+    def top(query):
+        return [m.user_id for m in engine.match(query, 2)]
+
+    assert top("software testing") == ["bob"]
+    assert top("cloud computing") == ["dave"]
+    vectors = engine.matrix[[engine.rows[u] for u in ("alice", "bob", "dave")]]
+    engine.compact()
+    assert engine.user_ids == ["alice", "bob", "dave"] and engine.tombstones == 0
+    assert np.array_equal(engine.matrix, vectors)
+    assert top("software testing") == ["bob"]
+
+
+def test_item_index_upsert_replaces_items():
+    index = ItemIndex(HashingEmbedder(dim=512), M=4).build(PROFILES)
+    index.upsert("bob", EDITED["bob"])
+    index.delete("carol")
+    assert index.tombstones == 4
+
+    def owners(query):
+        return [(m.user_id, m.evidence) for m in index.search(query, 3)]
+
+    assert owners("software testing") == [("bob", "Software Testing")]
+    before = owners("text mining")
+    index.compact()
+    assert index.tombstones == 0 and len(index.texts) == 4
+    assert owners("text mining") == before
+
+
+def test_sync_touches_only_changed_profiles():
+    engine = MatchingEngine(HashingEmbedder(dim=512))
+    keyword = KeywordIndex()
+    live = LiveIndexes(engine, keyword, compact_ratio=0.5)
+    assert live.sync(PROFILES) == {"alice", "bob", "carol"}
+    assert live.sync(PROFILES) == set()
+
+    upserted = []
+    original = keyword.upsert
+    keyword.upsert = lambda user_id, profile: (
+        upserted.append(user_id),
+        original(user_id, profile),
+    )
+    assert live.sync(EDITED) == {"bob", "carol", "dave"}
+    assert sorted(upserted) == ["bob", "dave"]
+    # 2 of 5 rows and documents are dead: under the compaction threshold
+    assert live.stats() == {
+        "profiles": 3,
+        "vector_tombstones": 2,
+        "keyword_tombstones": 2,
+    }
+
+    assert live.apply("alice", None)
+    assert live.stats()["keyword_tombstones"] == 0  # 3 of 5 dead: compacted
+    assert not live.apply("bob", EDITED["bob"])
+    assert [m.user_id for m in engine.match("text mining")] == []
+
+
+def test_engine_can_be_queried_while_it_is_updated():
+    engine = MatchingEngine(HashingEmbedder(dim=256)).build(PROFILES)
+    done = threading.Event()
+    errors = []
+
+    def query():
+        while not done.is_set():
+            try:
+                for match in engine.match("text mining software testing", 3):
+                    assert match.user_id in engine.snapshot.user_ids
+            except Exception as e:
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=query)
+    reader.start()
+    try:
+        for i in range(300):
+            engine.upsert(f"new{i % 7}", EDITED["dave"])
+            engine.upsert("bob", EDITED["bob"] if i % 2 else PROFILES["bob"])
+            engine.delete(f"new{(i + 3) % 7}")
+            if i % 10 == 0:
+                engine.compact()
+    finally:
+        done.set()
+        reader.join()
+    assert errors == []
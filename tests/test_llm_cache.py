@@ -0,0 +1,35 @@
+"""
+Tests for the persistent LLM response cache.
+"""
+
+from src.processor.llm_cache import LLMResponseCache, make_cache_key
+
+
+def test_cache_roundtrip_and_stats(tmp_path):
+    cache = LLMResponseCache(tmp_path / "cache.sqlite")
+
+    assert cache.get("gemini", "prompt") is None
+    cache.put("gemini", "prompt", "name: Dr. Test")
+    assert cache.get("gemini", "prompt  \r\n") == "name: Dr. Test"
+    assert cache.get("other-model", "prompt") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["entries"] == 1
+
+
+def test_key_depends_on_generation_config():
+    assert make_cache_key("m", "p", {"temperature": 0}) != make_cache_key(
+        "m", "p", {"temperature": 1}
+    )
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = LLMResponseCache(tmp_path / "cache.sqlite", max_bytes=10)
+
+    cache.put("m", "first", "aaaaaa")
+    cache.put("m", "second", "bbbbbb")
+
+    assert cache.get("m", "first") is None
+    assert cache.get("m", "second") == "bbbbbb"
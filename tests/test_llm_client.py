@@ -0,0 +1,122 @@
+"""
+Tests for the shared LLM client layer against a local OpenAI-compatible stub.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.processor import llm_client
+from src.processor.llm_client import OpenAICompatibleClient, get_client
+from tests.stub_server import StubServer
+
+RESPONSE = "name: Dr. Alice\nposition: Professor\n"
+LOADED_MODEL = "qwen2.5-7b-instruct"
+
+
+class OpenAIStub(StubServer):
+    """Serve /v1/chat/completions, streamed or not, on a random port."""
+
+    api_path = "/v1"
+    keep_alive = True
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+        self.connections = set()
+        self.model_lookups = 0
+
+    def get(self, path, request):
+        self.model_lookups += 1
+        return 200, {"data": [{"id": LOADED_MODEL}]}
+
+    def post(self, path, body, request):
+        self.requests.append(body)
+        self.connections.add(request.client_address)
+        if not body.get("stream"):
+            return 200, {"choices": [{"message": {"content": RESPONSE}}]}
+        events = [
+            {"choices": [{"delta": {"content": line + "\n"}}]}
+            for line in RESPONSE.strip().split("\n")
+        ]
+        payload = "".join(f"data: {json.dumps(e)}\n\n" for e in events)
+        return 200, payload + "data: [DONE]\n\n", "text/event-stream"
+
+
+def test_generate_and_stream_reuse_one_connection():
+    with OpenAIStub() as stub:
+        client = OpenAICompatibleClient(model_name="qwen", base_url=stub.url)
+        try:
+            assert client.generate("prompt") == RESPONSE
+            assert "".join(client.stream("prompt")) == RESPONSE
+            assert client.generate("prompt") == RESPONSE
+        finally:
+            client.close()
+
+    assert [r["stream"] for r in stub.requests] == [False, True, False]
+    assert stub.requests[0]["model"] == "qwen"
+    assert stub.requests[0]["messages"] == [{"role": "user", "content": "prompt"}]
+    # Keep-alive: every request came over the same pooled connection
+    assert len(stub.connections) == 1
+
+
+def test_async_generate_and_stream():
+    async def run(client):
+        text = await client.agenerate("prompt")
+        chunks = [chunk async for chunk in client.astream("prompt")]
+        return text, "".join(chunks)
+
+    with OpenAIStub() as stub:
+        client = OpenAICompatibleClient(model_name="qwen", base_url=stub.url)
+        loop = asyncio.new_event_loop()
+        try:
+            assert loop.run_until_complete(run(client)) == (RESPONSE, RESPONSE)
+            async_client = client._async_client
+            # close() releases the async connection pool as well
+            client.close()
+            assert async_client.is_closed and client.client.is_closed
+        finally:
+            loop.close()
+
+        # From async code, aclose() closes both pools on the running loop
+        client = OpenAICompatibleClient(model_name="qwen", base_url=stub.url)
+
+        async def run_and_close():
+            await run(client)
+            async_client = client.async_client
+            await client.aclose()
+            return async_client.is_closed
+
+        assert asyncio.run(run_and_close())
+
+
+def test_cache_model_names_the_served_model(monkeypatch):
+    monkeypatch.delenv("LOCAL_LLM_MODEL", raising=False)
+    with OpenAIStub() as stub:
+        placeholder = OpenAICompatibleClient(base_url=stub.url)
+        named = OpenAICompatibleClient(model_name="qwen", base_url=stub.url)
+        try:
+            assert placeholder.cache_model == f"local:{LOADED_MODEL}"
+            assert named.cache_model == "local:qwen"
+            # The loaded model is asked for once, not on every cache access
+            assert placeholder.cache_model == f"local:{LOADED_MODEL}"
+            assert stub.model_lookups == 1
+        finally:
+            placeholder.close()
+            named.close()
+
+
+def test_get_client_returns_shared_instance(monkeypatch):
+    monkeypatch.setattr(llm_client, "_clients", {})
+    first = get_client("local", "qwen")
+    try:
+        assert get_client("local", "qwen") is first
+        assert get_client("local", "other") is not first
+    finally:
+        llm_client.close_clients()
+
+
+def test_get_client_rejects_unknown_provider():
+    with pytest.raises(ValueError):
+        get_client("nonexistent")
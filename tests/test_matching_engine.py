@@ -0,0 +1,75 @@
+"""
+Tests for the in-process matching engine and the hashing embedder.
+"""
+
+import numpy as np
+
+from src.matching.embedder import HashingEmbedder, tokenize
+from src.matching.engine import MatchingEngine
+
+PROFILES = {
+    "alice": {
+        "name": "Dr. Alice Tan",
+        "department": "Software Engineering",
+        "research_interests": ["Natural Language Processing", "Text Mining"],
+        "publications": [{"title": "Sentiment analysis of Malay tweets"}],
+    },
+    "bob": {
+        "name": "Dr. Bob Lee",
+        "department": "Computer System and Technology",
+        "research_interests": ["Cloud Computing", "Distributed Systems"],
+        "expertise": ["Fault Tolerance"],
+    },
+    "carol": {
+        "name": "Dr. Carol Lim",
+        "department": "Software Engineering",
+        "research_interests": ["Software Testing"],
+        "expertise": ["Test Automation", "Software Quality"],
+    },
+}
+
+
+def test_tokenize_drops_stopwords_and_keeps_compounds():
+    assert tokenize("Aspect-Oriented design of C++ tools") == [
+        "aspect-oriented",
+        "design",
+        "c++",
+        "tools",
+    ]
+
+
+def test_embeddings_are_normalized_and_stable():
+    embedder = HashingEmbedder(dim=256).fit(["software testing", "cloud computing"])
+    vectors = embedder.embed(["software testing", "", "software testing"])
+    assert vectors.dtype == np.float32
+    assert np.isclose(np.linalg.norm(vectors[0]), 1.0)
+    assert not vectors[1].any()
+    assert np.array_equal(vectors[0], vectors[2])
+
+
+def test_bucket_memo_holds_only_the_fitted_vocabulary():
+    embedder = HashingEmbedder(dim=256).fit(["software testing"])
+    before = embedder.embed(["software testing quality"])
+    embedder.embed([f"query {i}" for i in range(100)])
+    assert set(embedder._buckets) == {"software", "testing", "software testing"}
+    assert np.array_equal(embedder.embed(["software testing quality"]), before)
+
+
+def test_match_ranks_relevant_supervisor_first():
+    engine = MatchingEngine(HashingEmbedder()).build(PROFILES)
+    assert engine.matrix.shape == (3, 4096)
+
+    matches = engine.match("test automation", k=2)
+    assert [m.user_id for m in matches] == ["carol"]
+    assert engine.match("natural language processing")[0].name == "Dr. Alice Tan"
+    assert engine.match("quantum chemistry") == []
+
+
+def test_match_many_agrees_with_single_queries():
+    engine = MatchingEngine(HashingEmbedder()).build(PROFILES)
+    queries = ["cloud fault tolerance", "text mining", "software quality"]
+    batched = engine.match_many(queries, k=3)
+    assert batched == [engine.match(q, k=3) for q in queries]
+    assert [m[0].user_id for m in batched] == ["bob", "alice", "carol"]
+    scores = [m.score for m in batched[0]]
+    assert scores == sorted(scores, reverse=True)
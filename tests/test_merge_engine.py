@@ -0,0 +1,86 @@
+"""
+Tests for the rule-based profile merge engine.
+"""
+
+from src.processor.merge_engine import apply_patch, merge_profile
+
+PROFILE = {
+    "name": "Dr. Test Supervisor",
+    "contact": {"email": "test@um.edu.my", "phone": "0379676415"},
+    "research_interests": ["Software Architecture", "Positive Computing"],
+    "academic_background": [
+        {"degree": "PhD", "field": "Software Engineering", "institution": "UPM", "year": "2016"}
+    ],
+    "publications": [
+        {
+            "title": "An adaptive data-driven architecture for mental health care applications",
+            "doi": "10.7717/peerj.17133",
+        }
+    ],
+    "profile_links": {
+        "google_scholar": "https://scholar.google.com.my/citations?user=ABC&hl=en"
+    },
+}
+
+
+def test_rule_merge_dedupes_and_fills_gaps():
+    extracted = {
+        "contact": {"phone": ["+60379676415"], "office": "Block A"},
+        "social_profiles": {
+            "google_scholar": ["https://scholar.google.com/citations?user=ABC)"],
+            "website": ["http://www.scopus.com/authid/detail.url?authorId=1)"],
+        },
+        "research_interests": ["software architecture", "Requirements Engineering"],
+        "academic_background": ["- PhD (Software Engineering) (2016)"],
+        "publications": [
+            {
+                "section": "DETECTED_PUBLICATIONS",
+                "content": "Sundaram, A. (2024). An adaptive data-driven architecture "
+                "for mental health care applications, PEERJ. doi:10.7717/peerj.17133",
+            }
+        ],
+        "additional_info": {},
+    }
+
+    result = merge_profile(PROFILE, extracted)
+
+    assert not result.needs_llm
+    assert result.profile["contact"]["office"] == "Block A"
+    assert result.profile["research_interests"] == [
+        "Software Architecture",
+        "Positive Computing",
+        "Requirements Engineering",
+    ]
+    assert "scopus" in result.profile["profile_links"]
+    assert PROFILE["contact"] == {"email": "test@um.edu.my", "phone": "0379676415"}
+
+
+def test_conflicts_and_new_fragments_go_to_residual():
+    extracted = {
+        "contact": {"email": ["other@um.edu.my"]},
+        "publications": [
+            {"section": "PUBLICATIONS", "content": "A brand new paper about graph neural networks (2025)"}
+        ],
+    }
+
+    result = merge_profile(PROFILE, extracted)
+
+    assert result.conflicts == [
+        {"field": "contact.email", "existing": "test@um.edu.my", "extracted": "other@um.edu.my"}
+    ]
+    assert result.unstructured["publications"] == [
+        "A brand new paper about graph neural networks (2025)"
+    ]
+
+
+def test_patch_resolves_conflicts_without_dropping_entries():
+    patch = {
+        "contact": {"email": "other@um.edu.my"},
+        "research_interests": ["Graph Learning"],
+    }
+
+    profile = apply_patch(PROFILE, patch).profile
+
+    assert profile["contact"]["email"] == "other@um.edu.my"
+    assert profile["research_interests"][-1] == "Graph Learning"
+    assert len(profile["research_interests"]) == 3
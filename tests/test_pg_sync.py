@@ -0,0 +1,254 @@
+"""
+Tests for the PostgreSQL/pgvector profile sync.
+
+The database tests need a PostgreSQL server with the pgvector extension,
+given by TEST_DATABASE_URL (e.g. postgresql://postgres@localhost/postgres);
+they are skipped without it. Each test works in a scratch schema that is
+dropped afterwards.
+"""
+
+import os
+import struct
+import uuid
+
+import numpy as np
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+from src.matching.embedder import HashingEmbedder
+from src.store.pg_sync import (
+    PgSync,
+    content_hash,
+    field_text,
+    fit_drift,
+    ivfflat_lists,
+    libpq_dsn,
+    vector_bytes,
+)
+
+PROFILES = {
+    "alice": {
+        "name": "Dr. Alice Tan",
+        "position": "Senior Lecturer",
+        "department": "Software Engineering",
+        "contact": {"email": "alice@um.edu.my"},
+        "research_interests": ["Natural Language Processing", "Text Mining"],
+        "expertise": ["Requirements Engineering"],
+        "publications": [{"title": "Test cases from requirements", "year": 2024}],
+    },
+    "bob": {
+        "name": "Dr. Bob Lee",
+        "department": "Artificial Intelligence",
+        "research_interests": ["Speech Recognition"],
+    },
+    "carol": {
+        "name": "Dr. Carol Lim",
+        "research_interests": ["Cloud Computing"],
+        "expertise": ["Distributed Systems"],
+    },
+    "dave": {"name": "Dr. Dave Ong", "research_interests": ["Computer Vision"]},
+}
+
+
+def test_content_hash_covers_profile_and_embedder():
+    alice = PROFILES["alice"]
+    reordered = dict(reversed(list(alice.items())))
+    assert content_hash(alice, "m@1") == content_hash(reordered, "m@1")
+    assert content_hash(alice, "m@1") != content_hash(alice, "m@2")
+    assert content_hash(alice, "m@1") != content_hash(PROFILES["bob"], "m@1")
+
+
+def test_field_texts_and_helpers():
+    alice = PROFILES["alice"]
+    assert field_text(alice, "research_interests") == (
+        "Natural Language Processing Text Mining"
+    )
+    assert field_text(alice, "publications") == "Test cases from requirements"
+    assert field_text(PROFILES["bob"], "expertise") == ""
+
+    (row,) = vector_bytes(np.array([[1.0, -2.5]], dtype=np.float32))
+    assert row == struct.pack(">HHff", 2, 0, 1.0, -2.5)
+
+    assert fit_drift(np.array([4.0, 0, 1]), np.array([3.0, 1, 1])) == 0.4
+    assert ivfflat_lists(10) == 1 and ivfflat_lists(50_000) == 50
+    assert ivfflat_lists(4_000_000) == 2000
+    assert libpq_dsn("postgresql://u@h:5432/db?schema=public&sslmode=require") == (
+        "postgresql://u@h:5432/db?sslmode=require"
+    )
+
+
+@pytest.fixture
+def conn():
+    dsn = os.getenv("TEST_DATABASE_URL")
+    if not dsn:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    schema = f"test_sync_{uuid.uuid4().hex[:8]}"
+    admin = psycopg.connect(libpq_dsn(dsn), autocommit=True)
+    admin.execute(f"CREATE SCHEMA {schema}")
+    conn = psycopg.connect(
+        libpq_dsn(dsn), autocommit=True, options=f"-c search_path={schema},public"
+    )
+    yield conn
+    conn.close()
+    admin.execute(f"DROP SCHEMA {schema} CASCADE")
+    admin.close()
+
+
+class PretrainedEmbedder(HashingEmbedder):
+    """Fixed term weights, standing in for a model that is not fitted."""
+
+    cache_key = "pretrained@1"
+
+    def fit(self, texts):
+        return self
+
+
+def make_sync(conn, embedder=None, **kwargs):
+    sync = PgSync(conn, embedder or PretrainedEmbedder(dim=768), **kwargs)
+    sync.apply_schema()
+    return sync
+
+
+def rows(conn, query, *params):
+    return conn.execute(query, params).fetchall()
+
+
+def test_sync_writes_only_changed_profiles(conn):
+    sync = make_sync(conn)
+    profiles = {u: dict(p) for u, p in PROFILES.items()}
+    counts = sync.sync(profiles)
+    assert (counts["added"], counts["unchanged"]) == (4, 0)
+    assert rows(conn, "SELECT email FROM supervisors WHERE id = 'alice'") == [
+        ("alice@um.edu.my",)
+    ]
+    assert rows(conn, "SELECT count(*) FROM research_interests") == [(5,)]
+    assert rows(
+        conn,
+        "SELECT embedding_type FROM supervisor_embeddings "
+        "WHERE supervisor_id = 'alice' ORDER BY 1",
+    ) == [("expertise",), ("publications",), ("research_interests",)]
+
+    assert sync.sync(profiles)["unchanged"] == 4
+
+    untouched = rows(conn, "SELECT id, last_updated FROM supervisors ORDER BY id")
+    profiles["alice"] = {**profiles["alice"], "research_interests": ["Robotics"]}
+    del profiles["alice"]["expertise"]
+    del profiles["bob"]
+    counts = sync.sync(profiles)
+    assert (counts["updated"], counts["removed"], counts["unchanged"]) == (1, 1, 2)
+    assert rows(
+        conn, "SELECT interest FROM research_interests WHERE supervisor_id = 'alice'"
+    ) == [("Robotics",)]
+    assert rows(
+        conn,
+        "SELECT embedding_type FROM supervisor_embeddings "
+        "WHERE supervisor_id = 'alice' ORDER BY 1",
+    ) == [("publications",), ("research_interests",)]
+    # Removing bob cascades to his rows; carol and dave were not rewritten
+    assert rows(
+        conn, "SELECT count(*) FROM research_interests WHERE supervisor_id = 'bob'"
+    ) == [(0,)]
+    after = dict(rows(conn, "SELECT id, last_updated FROM supervisors"))
+    assert all(after[u] == t for u, t in untouched if u in ("carol", "dave"))
+
+
+TOPICS = [
+    "Natural Language Processing",
+    "Computer Vision",
+    "Cloud Computing",
+    "Software Testing",
+    "Information Retrieval",
+    "Speech Recognition",
+    "Data Mining",
+    "Computer Security",
+    "Human Computer Interaction",
+    "Distributed Systems",
+]
+
+
+def corpus(n=40):
+    return {
+        f"s{i}": {
+            "name": f"Supervisor {i}",
+            "research_interests": [TOPICS[i % 10], TOPICS[(3 * i + 1) % 10]],
+            "expertise": [f"Method {i % 4}"],
+        }
+        for i in range(n)
+    }
+
+
+def fit_row(conn):
+    return rows(conn, "SELECT embedder, documents, fitted_at FROM embedder_fits")
+
+
+def test_default_embedder_pins_its_fit_across_edits(conn):
+    sync = PgSync(conn)
+    sync.apply_schema()
+    assert sync.embedder.name == "hashing"
+    profiles = corpus()
+    assert sync.sync(profiles)["added"] == 40
+    fitted = fit_row(conn)
+    assert [(name, documents) for name, documents, _ in fitted] == [
+        ("hashing:768", 120)
+    ]
+
+    # A fresh sync (as the next CLI run) reuses the stored term weights, so
+    # one edited profile writes one supervisor
+    sync = PgSync(conn)
+    stored = dict(rows(conn, "SELECT id, content_hash FROM supervisors"))
+    profiles["s0"] = {**profiles["s0"], "research_interests": ["Robotics"]}
+    counts = sync.sync(profiles)
+    assert (counts["updated"], counts["unchanged"]) == (1, 39)
+    after = dict(rows(conn, "SELECT id, content_hash FROM supervisors"))
+    assert [u for u in profiles if after[u] != stored[u]] == ["s0"]
+    assert fit_row(conn) == fitted
+
+    # --full refits on the current corpus, which re-embeds everyone
+    counts = sync.sync(profiles, full=True)
+    assert counts["updated"] == 40 and fit_row(conn) != fitted
+
+
+def test_drifted_corpus_is_refitted(conn):
+    sync = make_sync(conn, HashingEmbedder(dim=768))
+    profiles = corpus()
+    sync.sync(profiles)
+    fitted = fit_row(conn)
+    for i in range(0, 40, 2):
+        profiles[f"s{i}"] = {"name": f"S{i}", "research_interests": [f"Area {i}"]}
+    counts = sync.sync(profiles)
+    # The term weights moved, so no supervisor keeps its old vectors
+    assert (counts["updated"], counts["unchanged"]) == (40, 0)
+    assert fit_row(conn) != fitted
+    assert sync.sync(profiles)["unchanged"] == 40
+
+
+def test_ivfflat_indexes_are_rebuilt_past_the_threshold(conn):
+    sync = make_sync(conn, reindex_ratio=0.6)
+    profiles = {u: {"name": u, "research_interests": [f"topic {u}"]} for u in "abcd"}
+    assert sorted(sync.sync(profiles)["reindexed"]) == [
+        "research_interests_embedding_idx",
+        "supervisor_embeddings_idx",
+    ]
+    ((definition,),) = rows(
+        conn,
+        "SELECT indexdef FROM pg_indexes "
+        "WHERE indexname = 'research_interests_embedding_idx' "
+        "AND schemaname = current_schema()",
+    )
+    assert "ivfflat" in definition and "lists='1'" in definition
+
+    # One of four supervisors: 2 of 4 interest rows change (0.5)
+    profiles["a"] = {"name": "a", "research_interests": ["new topic"]}
+    assert sync.sync(profiles)["reindexed"] == []
+    # Two of four: every row changes
+    profiles["b"] = profiles["c"] = {"name": "x", "research_interests": ["other"]}
+    assert len(sync.sync(profiles)["reindexed"]) == 2
+
+
+def test_embedding_dimension_must_match_the_schema(conn):
+    sync = make_sync(conn)
+    sync.embedder = HashingEmbedder(dim=64)
+    with pytest.raises(ValueError, match="vector\\(768\\)"):
+        sync.sync({"alice": PROFILES["alice"]})
+    assert rows(conn, "SELECT count(*) FROM supervisors") == [(0,)]
@@ -0,0 +1,81 @@
+"""
+Tests for the shared profile I/O layer and its parsed-profile cache.
+"""
+
+import os
+
+from src.utils.profile_io import (
+    ProfileCache,
+    dump_yaml,
+    load_profiles,
+    load_yaml,
+    read_yaml,
+    write_yaml,
+)
+
+PROFILE = {"name": "Dr. Alice Tan", "research_interests": ["Fuzzy systems", "Ünicode"]}
+
+
+def test_dump_keeps_key_order_and_unicode():
+    text = dump_yaml({"b": 1, "a": "Ü"})
+    assert text == "b: 1\na: Ü\n"
+    assert load_yaml(text) == {"b": 1, "a": "Ü"}
+
+
+def test_unchanged_file_is_served_from_cache(tmp_path):
+    path = tmp_path / "alice.yaml"
+    cache = ProfileCache(tmp_path / "cache.pickle")
+    write_yaml(path, PROFILE, cache=cache)
+
+    first = read_yaml(path, cache)
+    first["name"] = "modified by caller"
+    assert read_yaml(path, cache) == PROFILE
+    assert cache.misses == 0 and cache.hits == 2
+
+
+def test_cache_persists_and_detects_changes(tmp_path):
+    path = tmp_path / "alice.yaml"
+    path.write_text(dump_yaml(PROFILE), encoding="utf-8")
+    cache_path = tmp_path / "cache.pickle"
+
+    cache = ProfileCache(cache_path)
+    assert load_profiles(tmp_path, cache) == {"alice": PROFILE}
+    assert cache.misses == 1
+
+    # A new process reuses the parsed data from disk
+    reloaded = ProfileCache(cache_path)
+    assert read_yaml(path, reloaded) == PROFILE
+    assert reloaded.misses == 0
+
+    # Touching the file changes mtime but not content: no reparse
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert read_yaml(path, reloaded) == PROFILE
+    assert reloaded.misses == 0
+
+    # Editing the file is picked up
+    path.write_text("name: Dr. Bob Lee\n", encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    assert read_yaml(path, reloaded) == {"name": "Dr. Bob Lee"}
+    assert reloaded.misses == 1
+
+
+def test_write_is_atomic_and_leaves_no_temp_files(tmp_path):
+    path = tmp_path / "alice.yaml"
+    cache = ProfileCache(None)
+    write_yaml(path, PROFILE, cache=cache)
+    write_yaml(path, {**PROFILE, "name": "Dr. A. Tan"}, cache=cache)
+    assert [p.name for p in tmp_path.iterdir()] == ["alice.yaml"]
+    assert load_yaml(path.read_text(encoding="utf-8"))["name"] == "Dr. A. Tan"
+
+
+def test_write_keeps_file_permissions(tmp_path):
+    path = tmp_path / "alice.yaml"
+    cache = ProfileCache(None)
+    write_yaml(path, PROFILE, cache=cache)
+    umask = os.umask(0)
+    os.umask(umask)
+    assert path.stat().st_mode & 0o777 == 0o666 & ~umask
+    path.chmod(0o640)
+    write_yaml(path, {**PROFILE, "name": "Dr. A. Tan"}, cache=cache)
+    assert path.stat().st_mode & 0o777 == 0o640
@@ -0,0 +1,96 @@
+"""
+Tests for the SQLite profile store and its incremental sync from YAML.
+"""
+
+import os
+
+import pytest
+
+from src.store.profile_store import ProfileStore, fts_query
+from src.utils.profile_io import write_yaml
+
+ALICE = {
+    "name": "Dr. Alice Tan",
+    "department": "Software Engineering",
+    "faculty": "Faculty of Computer Science and Information Technology",
+    "contact": {"email": "alice@um.edu.my"},
+    "research_interests": ["Natural Language Processing", "Requirements Engineering"],
+    "expertise": ["Text Mining"],
+    "publications": [
+        {
+            "title": "Extracting test cases from requirements with NLP",
+            "authors": ["Alice Tan", "Bob Lee"],
+            "journal": "Journal of Systems and Software",
+            "year": "2024",
+        }
+    ],
+    "projects": [{"title": "Slang-based mood detection", "year": "2021-present"}],
+}
+BOB = {
+    "name": "Dr. Bob Lee",
+    "department": "Artificial Intelligence",
+    "research_interests": ["Natural Language Processing", "Speech Recognition"],
+    "publications": [{"title": "Speech models", "year": 2019}],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    profiles = tmp_path / "profiles"
+    write_yaml(profiles / "alice.yaml", ALICE)
+    write_yaml(profiles / "bob.yaml", BOB)
+    store = ProfileStore(tmp_path / "store.sqlite", profiles)
+    yield store
+    store.close()
+
+
+def test_fts_query_quotes_words_and_expands_abbreviations():
+    assert fts_query("NLP, tools") == (
+        '("nlp" OR "natural language processing") AND "tools"'
+    )
+    assert fts_query("  ") == ""
+
+
+def test_sync_is_incremental(store):
+    assert store.sync() == {"added": 2, "updated": 0, "removed": 0, "unchanged": 0}
+    assert store.sync()["unchanged"] == 2
+
+    # A touch without a content change does not re-import
+    path = store.profiles_dir / "alice.yaml"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert store.sync_file(path) == "unchanged"
+
+    write_yaml(path, {**ALICE, "expertise": ["Software Testing"]})
+    (store.profiles_dir / "bob.yaml").unlink()
+    assert store.sync() == {"added": 0, "updated": 1, "removed": 1, "unchanged": 0}
+    assert store.user_ids() == ["alice"]
+    assert store.get("alice")["expertise"] == ["Software Testing"]
+
+
+def test_find_by_department_and_interest(store):
+    store.sync()
+    found = store.find(department="software engineering", interest="nlp")
+    assert [row["user_id"] for row in found] == ["alice"]
+    found = store.find(interest="natural language processing")
+    assert [row["user_id"] for row in found] == ["alice", "bob"]
+    assert store.find(expertise="speech") == []
+
+
+def test_queries_without_words_match_nothing(store):
+    store.sync()
+    assert store.find(interest="!!") == []
+    assert store.find(department="software", expertise="--") == []
+    assert store.search("?") == []
+    assert store.search_publications("&&") == []
+
+
+def test_search_and_publications(store):
+    store.sync()
+    assert store.search("mood detection")[0]["user_id"] == "alice"
+    assert store.interests("alice") == ALICE["research_interests"]
+
+    pubs = store.search_publications("requirements")
+    assert pubs[0]["authors"] == "Alice Tan, Bob Lee"
+    assert pubs[0]["year"] == 2024
+    assert store.search_publications("speech", since=2020) == []
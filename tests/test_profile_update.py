@@ -0,0 +1,59 @@
+"""
+Tests for the shared steps of the LLM profile update scripts.
+"""
+
+from src.processor import profile_update
+from src.processor.llm_cache import LLMResponseCache
+from src.processor.yaml_repair import RepairStats
+
+
+class FakeClient:
+    """Streams canned responses in order, recording the prompts."""
+
+    provider = "local"
+    model_name = "local-model"
+    cache_model = "local:qwen"
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def stream(self, prompt, config=None):
+        self.prompts.append(prompt)
+        yield self.responses.pop(0)
+
+
+def test_update_reprompts_once_and_reuses_cached_responses(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(profile_update, "repair_stats", RepairStats())
+    # Take each response whole, so the bad one reaches the parser
+    monkeypatch.setattr(
+        profile_update, "generate_validated", lambda start, _: "".join(start())
+    )
+    saved = {}
+    monkeypatch.setattr(
+        profile_update,
+        "save_profile_version",
+        lambda user_id, profile, message: saved.setdefault(user_id, profile) and "r",
+    )
+    prompt_file = tmp_path / "alice_prompt.txt"
+    prompt_file.write_text("Resolve these items")
+    extracted = tmp_path / "data" / "extracted" / "alice_extracted.yaml"
+    extracted.parent.mkdir(parents=True)
+    extracted.write_text("name: Alice\n")
+
+    cache = LLMResponseCache(tmp_path / "cache.sqlite")
+    client = FakeClient("name: [unclosed\n", "position: Professor\n")
+    assert profile_update.update_profile("alice", cache, str(prompt_file), client)
+    assert saved["alice"] == {"position": "Professor"}
+    assert "parse error" in client.prompts[1].lower()
+    assert profile_update.repair_stats.reprompted == 1
+    assert profile_update.repair_stats.failed == 0
+    assert not extracted.exists()
+
+    # Both responses are cached under the served model
+    saved.clear()
+    assert profile_update.update_profile("alice", cache, str(prompt_file), client)
+    assert len(client.prompts) == 2 and saved["alice"] == {"position": "Professor"}
+    assert cache.get("local:qwen", "Resolve these items") == "name: [unclosed\n"
+    cache.close()
@@ -0,0 +1,137 @@
+"""
+Tests for the quantized vector stores.
+"""
+
+import numpy as np
+import pytest
+
+from src.matching.ann_index import HNSWIndex
+from src.matching.embedder import HashingEmbedder, normalize_rows
+from src.matching.engine import MatchingEngine
+from src.matching.quantization import STORAGES, make_storage
+
+PROFILES = {
+    "alice": {"research_interests": ["Natural Language Processing", "Text Mining"]},
+    "bob": {"research_interests": ["Cloud Computing", "Distributed Systems"]},
+    "carol": {"expertise": ["Software Testing", "Software Quality"]},
+}
+
+
+def clustered_vectors(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, dim)).astype(np.float32)
+    vectors = centers[rng.integers(20, size=n)]
+    vectors += 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+    return normalize_rows(vectors)
+
+
+def recall_at_10(storage, vectors, queries):
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :10]
+    found = np.argsort(-storage.scores(queries), axis=1)[:, :10]
+    return np.mean([len(set(e) & set(f)) / 10 for e, f in zip(exact, found)])
+
+
+@pytest.mark.parametrize(
+    "kind, params, max_bytes, min_recall",
+    [
+        ("float32", {}, 128, 1.0),
+        ("float16", {}, 64, 0.99),
+        ("int8", {}, 36, 0.9),
+        ("pq", {"m": 16}, 16, 0.7),
+    ],
+)
+def test_memory_and_recall(kind, params, max_bytes, min_recall):
+    vectors = clustered_vectors(2000, 32)
+    queries = clustered_vectors(20, 32, seed=1)
+    # PQ would otherwise train its codebooks on the first batch only
+    storage = make_storage(kind, 32, **params).train(vectors)
+    assert storage.add(vectors[:500]) == list(range(500))
+    storage.add(vectors[500:])
+    assert len(storage) == 2000
+
+    codebooks = storage.codebooks.nbytes if kind == "pq" else 0
+    assert (storage.memory_bytes() - codebooks) / 2000 <= max_bytes
+    assert recall_at_10(storage, vectors, queries) >= min_recall
+
+
+def test_pq_retrains_while_growing_in_small_batches():
+    vectors = clustered_vectors(2000, 32)
+    queries = clustered_vectors(20, 32, seed=1)
+    built = make_storage("pq", 32, m=16, centroids=16)
+    built.add(vectors)
+    grown = make_storage("pq", 32, m=16, centroids=16)
+    for start in range(0, 2000, 10):
+        grown.add(vectors[start : start + 10])
+        if start == 300:
+            assert grown._exact is not None
+    # Exact copies are dropped once the codebooks have seen enough rows
+    assert grown.trained_rows >= grown.full_training and grown._exact is None
+    assert (
+        recall_at_10(grown, vectors, queries)
+        >= recall_at_10(built, vectors, queries) - 0.1
+    )
+
+
+def test_pq_retraining_leaves_prepared_queries_consistent():
+    vectors = clustered_vectors(200, 32)
+    storage = make_storage("pq", 32, m=16, centroids=16)
+    storage.add(vectors[:100])
+    ids = list(range(100))
+    prepared = storage.prepare(vectors[0])
+    before = storage.dot(ids, prepared)
+    codebooks = storage.codebooks
+    # Doubling the rows retrains the codebooks and re-encodes every row
+    storage.add(vectors[100:])
+    assert storage.codebooks is not codebooks
+    # A query prepared before still scores the codes of its own codebooks
+    assert np.array_equal(storage.dot(ids, prepared), before)
+    assert np.allclose(
+        storage.scores(vectors[0])[0, :100],
+        storage.vectors(ids) @ vectors[0],
+        atol=1e-5,
+    )
+
+
+@pytest.mark.parametrize("kind", STORAGES)
+def test_dot_matches_blocked_scores(kind, monkeypatch):
+    monkeypatch.setattr("src.matching.quantization.BLOCK_ROWS", 64)
+    vectors = clustered_vectors(300, 16)
+    storage = make_storage(kind, 16)
+    storage.add(vectors)
+    query = vectors[7]
+    scores = storage.scores(query)[0]
+    assert scores.shape == (300,)
+    ids = [3, 7, 250]
+    assert np.allclose(storage.dot(ids, storage.prepare(query)), scores[ids], atol=1e-5)
+    assert np.allclose(storage.vectors(ids) @ query, scores[ids], atol=1e-5)
+
+
+def test_int8_keeps_per_vector_scale():
+    storage = make_storage("int8", 4)
+    storage.add([[0.5, -0.25, 0, 0], [0, 0, 0, 0]])
+    assert np.allclose(storage.vectors([0]), [[0.5, -0.25, 0, 0]], atol=0.5 / 127)
+    assert not storage.vectors([1]).any()
+
+
+def test_unknown_storage():
+    with pytest.raises(ValueError):
+        make_storage("int4", 8)
+
+
+def test_hnsw_over_quantized_vectors():
+    vectors = clustered_vectors(500, 16)
+    index = HNSWIndex(16, M=8, ef_construction=32, storage="int8")
+    index.add(vectors)
+    ids, similarities = index.search(vectors[42], 1, ef=64)
+    assert ids.tolist() == [42] and np.isclose(similarities[0], 1.0, atol=0.02)
+
+
+@pytest.mark.parametrize("kind", ["float16", "int8"])
+def test_engine_ranks_the_same_with_compressed_rows(kind):
+    exact = MatchingEngine(HashingEmbedder(dim=512)).build(PROFILES)
+    compressed = MatchingEngine(HashingEmbedder(dim=512), storage=kind).build(PROFILES)
+    assert compressed.vectors.memory_bytes() < exact.vectors.memory_bytes()
+    for query in ("text mining", "cloud", "software quality"):
+        assert [m.user_id for m in compressed.match(query)] == [
+            m.user_id for m in exact.match(query)
+        ]
@@ -0,0 +1,119 @@
+"""
+Tests for the query result cache and its profile-change invalidation.
+"""
+
+import pytest
+
+from src.matching.embedder import HashingEmbedder
+from src.matching.engine import MatchingEngine
+from src.matching.result_cache import (
+    CachedMatcher,
+    ResultCache,
+    cache_key,
+    normalize_query,
+)
+
+PROFILES = {
+    "alice": {
+        "research_interests": ["Machine Learning", "Text Mining"],
+        "department": "Artificial Intelligence",
+    },
+    "bob": {
+        "research_interests": ["Cloud Computing"],
+        "department": "Computer System and Technology",
+    },
+    "carol": {
+        "expertise": ["Software Testing"],
+        "department": "Software Engineering",
+    },
+}
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def matcher():
+    matcher = CachedMatcher(MatchingEngine(HashingEmbedder(dim=512)), ResultCache())
+    matcher.refresh(PROFILES)
+    return matcher
+
+
+def test_keys_ignore_case_and_spacing():
+    assert normalize_query("  Machine   LEARNING ") == "machine learning"
+    assert cache_key("NLP", 5, department=None) == cache_key("nlp ", 5)
+    assert cache_key("nlp", 5, department="SE") != cache_key("nlp", 5)
+
+
+def test_ttl_and_lru_eviction():
+    clock = Clock()
+    cache = ResultCache(max_entries=2, ttl=10, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # b is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None and len(cache) == 2
+
+    clock.now = 10
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert (stats["evictions"], stats["expirations"]) == (1, 1)
+
+
+def test_repeat_queries_are_served_from_cache(matcher):
+    first = matcher.match("Machine Learning", 2)
+    assert matcher.match("machine learning", 2) == first
+    assert first[0].user_id == "alice"
+    assert matcher.stats()["hits"] == 1
+
+    matcher.match("machine learning", 2, department="Software Engineering")
+    assert matcher.stats()["misses"] == 2
+
+
+def test_only_results_involving_changed_profiles_are_invalidated(matcher):
+    matcher.match("machine learning", 1)
+    matcher.match("cloud computing", 1)
+    assert [m.user_id for m in matcher.match("software testing", 2)] == ["carol"]
+
+    edited = {**PROFILES, "bob": {"research_interests": ["Edge Computing"]}}
+    assert matcher.refresh(edited) == {"bob"}
+    assert matcher.refresh(edited) == set()
+    assert len(matcher.cache) == 2
+
+    # A supervisor who now qualifies for a cached result invalidates it too
+    edited["dave"] = {"research_interests": ["Software Testing"]}
+    assert matcher.refresh(edited) == {"dave"}
+    assert len(matcher.cache) == 1
+    assert {m.user_id for m in matcher.match("software testing", 2)} == {
+        "carol",
+        "dave",
+    }
+    assert matcher.match("machine learning", 1)[0].user_id == "alice"
+    assert matcher.stats()["hits"] == 1
+
+
+def test_matchers_sharing_a_cache_keep_their_entries_apart(tmp_path):
+    cache = ResultCache()
+    small = CachedMatcher(MatchingEngine(HashingEmbedder(dim=64)), cache)
+    large = CachedMatcher(MatchingEngine(HashingEmbedder(dim=512)), cache)
+    other = CachedMatcher(
+        MatchingEngine(HashingEmbedder(dim=512)), cache, profiles_dir=tmp_path
+    )
+    small.refresh(PROFILES)
+    large.refresh(PROFILES)
+    other.refresh({"dave": {"research_interests": ["Machine Learning"]}})
+    assert small.match("machine learning", 1)[0].user_id == "alice"
+    assert large.match("machine learning", 1)[0].user_id == "alice"
+    assert other.match("machine learning", 1)[0].user_id == "dave"
+    assert cache.stats()["hits"] == 0
+
+    # A newcomer is only checked against the matching engine's own entries
+    large.refresh({**PROFILES, "erin": {"research_interests": ["Machine Learning"]}})
+    assert len(cache) == 2
+    assert small.match("machine learning", 1)[0].user_id == "alice"
+    assert cache.stats()["hits"] == 1
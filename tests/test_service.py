@@ -0,0 +1,209 @@
+"""
+Tests for the ASGI search service, called in-process through httpx.
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.matching.embedder import HashingEmbedder
+from src.matching.result_cache import ResultCache
+from src.service.app import ReadWriteLock, create_app
+
+PROFILES = {
+    "alice": {
+        "name": "Alice",
+        "research_interests": ["Machine Learning", "Text Mining"],
+        "department": "Artificial Intelligence",
+    },
+    "bob": {
+        "name": "Bob",
+        "research_interests": ["Cloud Computing", "Machine Learning Systems"],
+        "department": "Computer System and Technology",
+    },
+    "carol": {
+        "name": "Carol",
+        "expertise": ["Software Testing"],
+        "department": "Software Engineering",
+    },
+}
+
+
+@pytest.fixture
+def profiles(monkeypatch):
+    profiles = {user_id: dict(p) for user_id, p in PROFILES.items()}
+    monkeypatch.setattr(
+        "src.service.app.load_profiles",
+        lambda _: {u: dict(p) for u, p in profiles.items()},
+    )
+    return profiles
+
+
+@pytest.fixture
+def call(profiles):
+    """Run requests against a started service: call(lambda client: ...)."""
+    app = create_app(
+        embedder=HashingEmbedder(dim=512), cache=ResultCache(), refresh_interval=0
+    )
+
+    def run(requests):
+        async def session():
+            await app.startup()
+            try:
+                transport = httpx.ASGITransport(app)
+                async with httpx.AsyncClient(
+                    transport=transport, base_url="http://test"
+                ) as client:
+                    return await requests(client)
+            finally:
+                await app.shutdown()
+
+        return asyncio.run(session())
+
+    run.app = app
+    return run
+
+
+def test_search_modes_and_filters(call):
+    async def requests(client):
+        return [
+            await client.get("/search", params={"q": "machine learning", "k": 2}),
+            await client.get(
+                "/search", params={"q": "machine learning", "mode": "keyword"}
+            ),
+            await client.get(
+                "/search",
+                params={"q": "machine learning", "department": "Software Engineering"},
+            ),
+        ]
+
+    vector, keyword, filtered = call(requests)
+    assert vector.status_code == 200
+    body = vector.json()
+    assert body["count"] == 2 and body["supervisors"][0]["user_id"] == "alice"
+    assert {m["user_id"] for m in keyword.json()["supervisors"]} == {"alice", "bob"}
+    assert filtered.json()["supervisors"] == []
+
+
+def test_errors(call):
+    async def requests(client):
+        return [
+            (await client.get("/search")).status_code,
+            (await client.get("/search", params={"q": "x", "k": "many"})).status_code,
+            (
+                await client.get("/search", params={"q": "x", "mode": "fuzzy"})
+            ).status_code,
+            (await client.post("/search")).status_code,
+            (await client.get("/nowhere")).status_code,
+            (await client.get("/supervisors/nobody")).status_code,
+            (await client.post("/batch-match", content=b"{")).status_code,
+            (await client.post("/batch-match", json={"queries": [""]})).status_code,
+        ]
+
+    assert call(requests) == [400, 400, 400, 405, 404, 404, 400, 400]
+
+
+def test_supervisor_and_batch_match(call):
+    async def requests(client):
+        supervisor = await client.get("/supervisors/carol")
+        batch = await client.post(
+            "/batch-match",
+            json={
+                "queries": [{"id": "s1", "query": "software testing"}, "cloud"],
+                "k": 1,
+            },
+        )
+        return supervisor.json(), batch.json()
+
+    supervisor, batch = call(requests)
+    assert supervisor["id"] == "carol"
+    assert supervisor["expertise"] == ["Software Testing"]
+    assert batch["count"] == 2
+    assert [r["id"] for r in batch["results"]] == ["s1", "2"]
+    assert [r["supervisors"][0]["user_id"] for r in batch["results"]] == [
+        "carol",
+        "bob",
+    ]
+
+
+def test_supervisor_ids_are_decoded_once(call, profiles):
+    profiles["dr%41"] = {"name": "Percent"}
+
+    async def requests(client):
+        return (await client.get("/supervisors/dr%2541")).json()
+
+    assert call(requests)["id"] == "dr%41"
+
+
+def test_refresh_updates_indexes_and_cache(call, profiles):
+    app = call.app
+
+    async def requests(client):
+        params = {"q": "quantum computing", "k": 3}
+        before = (await client.get("/search", params=params)).json()
+        profiles["dave"] = {
+            "name": "Dave",
+            "research_interests": ["Quantum Computing"],
+        }
+        del profiles["bob"]
+        changed = await app.run(app.refresh)
+        after = (await client.get("/search", params=params)).json()
+        keyword = await client.get("/search", params={"q": "cloud", "mode": "keyword"})
+        health = (await client.get("/health")).json()
+        return before, changed, after, keyword.json(), health
+
+    before, changed, after, keyword, health = call(requests)
+    assert "dave" not in [m["user_id"] for m in before["supervisors"]]
+    assert changed == {"dave", "bob"}
+    assert after["supervisors"][0]["user_id"] == "dave"
+    assert keyword["count"] == 0
+    assert health["indexes"]["profiles"] == 3
+    assert health["cache"]["invalidations"] >= 1
+
+
+def test_lifespan_starts_and_stops_the_service(profiles):
+    app = create_app(
+        embedder=HashingEmbedder(dim=64), cache=ResultCache(), refresh_interval=60
+    )
+    messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+    sent = []
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(app({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert app.matcher is not None and app.executor is None
+
+
+def test_queries_share_the_index_lock_and_refreshes_exclude_them():
+    lock = ReadWriteLock()
+    both_reading = threading.Barrier(2, timeout=5)
+    events = []
+
+    def read():
+        with lock.reading():
+            # Both readers are inside at once, or the barrier times out
+            both_reading.wait()
+            time.sleep(0.05)
+            events.append("read")
+
+    def write():
+        with lock.writing():
+            events.append("write")
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for thread in readers:
+        thread.start()
+    time.sleep(0.01)
+    writer = threading.Thread(target=write)
+    writer.start()
+    for thread in [*readers, writer]:
+        thread.join(timeout=5)
+    assert events == ["read", "read", "write"]
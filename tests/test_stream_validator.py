@@ -0,0 +1,69 @@
+"""
+Tests for incremental validation of streamed responses.
+"""
+
+import pytest
+
+from src.processor.stream_validator import (
+    StreamAborted,
+    StreamValidator,
+    generate_validated,
+)
+from src.processor.yaml_repair import parse_with_repair
+
+
+def _chunks(text, size=7):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def test_valid_patch_passes():
+    text = "```yaml\nresearch_interests:\n- NLP\ncontact:\n  phone: '+603-1234'\n```\n"
+    validator = StreamValidator()
+    for chunk in _chunks(text):
+        validator.feed(chunk)
+    validator.finish()
+    assert validator.text == text
+
+
+def test_trailing_prose_ends_the_document():
+    text = "research_interests:\n  - NLP\n\nI hope this helps!\nbogus: 1\n"
+    validator = StreamValidator()
+    for chunk in _chunks(text):
+        validator.feed(chunk)
+    validator.finish()
+    # Left for local repair rather than regenerated
+    patch, fixes = parse_with_repair(text)
+    assert patch == {"research_interests": ["NLP"]} and fixes
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "unstructured:\n  publications: []\n",
+        "research_interests: NLP\nexpertise:\n",
+        "publications:\n- A title only\nexpertise:\n",
+        "expertise:\n- NLP\nexpertise:\n",
+        "publications:\n  # ... existing entries unchanged\n",
+    ],
+)
+def test_schema_breaks_abort_early(text):
+    validator = StreamValidator()
+    with pytest.raises(StreamAborted):
+        for chunk in _chunks(text):
+            validator.feed(chunk)
+        validator.finish()
+
+
+def test_generate_validated_retries_after_abort():
+    attempts = iter(["bogus_field:\n  x: 1\n", "expertise:\n- NLP\n"])
+    consumed = []
+
+    def start_stream():
+        text = next(attempts)
+        for chunk in _chunks(text):
+            consumed.append(chunk)
+            yield chunk
+
+    assert generate_validated(start_stream) == "expertise:\n- NLP\n"
+    # The first stream was abandoned as soon as the unknown field was complete
+    assert "".join(consumed).startswith("bogus_field:")
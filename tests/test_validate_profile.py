@@ -0,0 +1,67 @@
+"""
+Tests for the compiled schema validator and parallel validate-all.
+"""
+
+import yaml
+
+from scripts.validate_profile import ProfileValidator, check_file, compiled_validator
+
+VALID_PROFILE = {
+    "name": "Dr. Alice Tan",
+    "position": "Senior Lecturer",
+    "department": "Software Engineering",
+    "university": "Universiti Malaya",
+    "contact": {"email": "alice@um.edu.my"},
+    "academic_background": [
+        {
+            "degree": "PhD",
+            "field": "Computer Science",
+            "institution": "Universiti Malaya",
+            "year": 2014,
+        }
+    ],
+    "research_interests": ["Fuzzy systems"],
+}
+
+
+def _write_profiles(directory):
+    invalid = dict(VALID_PROFILE, name="Al", academic_background=[{"year": "x"}])
+    invalid.pop("university")
+    for name, profile in [("alice", VALID_PROFILE), ("bob", invalid)]:
+        with open(directory / f"{name}.yaml", "w", encoding="utf-8") as f:
+            yaml.dump(profile, f)
+    (directory / "carol.yaml").write_text("name: [unclosed\n", encoding="utf-8")
+    (directory / "alice_extracted.yaml").write_text("{}\n", encoding="utf-8")
+
+
+def test_validator_is_compiled_once():
+    assert compiled_validator() is compiled_validator()
+
+
+def test_check_file_reports_every_error(tmp_path):
+    _write_profiles(tmp_path)
+    result = check_file(tmp_path / "bob.yaml")
+
+    assert not result["valid"]
+    paths = {error["path"] for error in result["errors"]}
+    assert {"", "name", "academic_background/0/year"} <= paths
+    assert len(result["errors"]) >= 4
+
+
+def test_yaml_errors_are_reported(tmp_path):
+    _write_profiles(tmp_path)
+    result = check_file(tmp_path / "carol.yaml")
+    assert not result["valid"]
+    assert result["errors"][0]["validator"] == "yaml"
+
+
+def test_parallel_results_match_serial(tmp_path):
+    _write_profiles(tmp_path)
+    validator = ProfileValidator(profiles_dir=tmp_path)
+
+    serial = validator.check_all(workers=1)
+    parallel = validator.check_all(workers=2)
+
+    assert parallel == serial
+    assert [r["valid"] for r in serial] == [True, False, False]
+    assert validator.validate_all(workers=2) == (1, 2)
@@ -0,0 +1,75 @@
+"""
+Tests for the content-addressed profile version history.
+"""
+
+import pytest
+
+from src.store.version_store import VersionStore, apply_delta, make_delta
+from src.utils.profile_io import load_yaml, write_yaml
+
+PROFILE = {
+    "name": "Dr. Alice Tan",
+    "research_interests": ["Fuzzy systems"],
+    "publications": [
+        {"title": f"Paper {i}", "journal": "Journal of Examples", "year": 2000 + i}
+        for i in range(200)
+    ],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    profiles = tmp_path / "profiles"
+    write_yaml(profiles / "alice.yaml", PROFILE)
+    return VersionStore(tmp_path / "history", profiles, snapshot_every=4)
+
+
+def revision(i):
+    return {**PROFILE, "research_interests": ["Fuzzy systems", f"Topic {i}"]}
+
+
+def test_delta_round_trip():
+    base = ["a\n", "b\n", "c\n"]
+    lines = ["a\n", "x\n", "c\n", "d\n"]
+    assert apply_delta(base, make_delta(base, lines)) == lines
+
+
+def test_save_imports_original_and_keeps_every_revision(store):
+    for i in range(10):
+        store.save("alice", revision(i), f"edit {i}")
+
+    history = store.history("alice")
+    assert len(history) == 11
+    assert history[-1]["message"] == "import existing profile"
+    assert load_yaml(store.show("alice", 10)) == PROFILE
+    assert load_yaml(store.show("alice")) == revision(9)
+
+    # A fresh store rebuilds revisions across delta chains and snapshots
+    reopened = VersionStore(store.root, store.profiles_dir, snapshot_every=4)
+    for i in range(10):
+        assert load_yaml(reopened.show("alice", 9 - i)) == revision(i)
+
+    # Saving identical content does not add a revision
+    store.save("alice", revision(9))
+    assert len(store.history("alice")) == 11
+
+
+def test_history_is_much_smaller_than_full_copies(store):
+    for i in range(10):
+        store.save("alice", revision(i))
+    full_copies = 11 * (store.profiles_dir / "alice.yaml").stat().st_size
+    assert store.disk_usage() < full_copies / 10
+
+
+def test_diff_and_rollback(store):
+    store.save("alice", revision(1))
+    diff = store.diff("alice", 1, 0)
+    assert "+- Topic 1" in diff
+
+    store.rollback("alice", 1)
+    assert load_yaml((store.profiles_dir / "alice.yaml").read_text()) == PROFILE
+    assert store.history("alice")[0]["message"].startswith("rollback to")
+    assert store.diff("alice") == ""
+
+    with pytest.raises(KeyError):
+        store.resolve("alice", "ffff")
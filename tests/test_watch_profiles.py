@@ -0,0 +1,71 @@
+"""
+Tests for the profile watcher's per-file reprocessing and completeness scores.
+"""
+
+import yaml
+
+from scripts.watch_profiles import ProfileWatcher, validate
+from src.utils.completeness import completeness, load_schema, update_score
+from tests.test_validate_profile import VALID_PROFILE
+
+
+def _recorder(calls):
+    def handler(user_id, path, profile):
+        calls.append((user_id, profile))
+        return "ok"
+
+    return handler
+
+
+def test_burst_of_changes_processes_each_profile_once(tmp_path):
+    path = tmp_path / "alice.yaml"
+    path.write_text(yaml.dump(VALID_PROFILE), encoding="utf-8")
+    calls = []
+    watcher = ProfileWatcher(tmp_path, handlers=[_recorder(calls)])
+
+    processed = watcher.handle_changes(
+        [
+            (2, str(path)),
+            (2, str(path)),
+            (1, str(tmp_path / "alice_extracted.yaml")),
+            (1, str(tmp_path / ".alice.yaml.swp")),
+        ]
+    )
+
+    assert processed == [path]
+    assert calls == [("alice", VALID_PROFILE)]
+
+
+def test_deleted_profile_is_passed_as_none(tmp_path):
+    calls = []
+    watcher = ProfileWatcher(tmp_path, handlers=[_recorder(calls)])
+    watcher.handle_changes([(3, str(tmp_path / "bob.yaml"))])
+    assert calls == [("bob", None)]
+
+
+def test_unparseable_profile_skips_handlers(tmp_path):
+    path = tmp_path / "carol.yaml"
+    path.write_text("name: [unclosed\n", encoding="utf-8")
+    calls = []
+    watcher = ProfileWatcher(tmp_path, handlers=[_recorder(calls)])
+    assert watcher.process(path) == []
+    assert calls == []
+
+
+def test_validate_handler_reports_errors(tmp_path):
+    path = tmp_path / "alice.yaml"
+    assert validate("alice", path, VALID_PROFILE) == "valid"
+    assert validate("alice", path, {"name": "Dr. Alice Tan"}).endswith("schema errors")
+
+
+def test_completeness_weights_required_fields(tmp_path):
+    schema = load_schema()
+    full_score, missing = completeness(VALID_PROFILE, schema)
+    assert 0 < full_score < 1
+    assert "publications" in missing and "name" not in missing
+    assert completeness({}, schema)[0] == 0.0
+
+    scores_path = tmp_path / "completeness.json"
+    assert update_score("alice", VALID_PROFILE, schema, scores_path) == full_score
+    assert update_score("alice", None, schema, scores_path) is None
+    assert scores_path.read_text(encoding="utf-8").strip() == "{}"
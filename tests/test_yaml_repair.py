@@ -0,0 +1,85 @@
+"""
+Tests for the local YAML repair pass.
+"""
+
+import pytest
+import yaml
+
+from src.processor.yaml_repair import RepairStats, parse_with_repair
+
+
+@pytest.mark.parametrize(
+    "text, expected, fix",
+    [
+        (
+            "```yaml\nresearch_interests:\n  - NLP\n```",
+            {"research_interests": ["NLP"]},
+            "stripped code fences",
+        ),
+        (
+            "Here is the patch:\nexpertise:\n  - NLP\nHope this helps!",
+            {"expertise": ["NLP"]},
+            "stripped surrounding prose",
+        ),
+        (
+            "expertise:\n  - NLP\n - Vision\n",
+            {"expertise": ["NLP", "Vision"]},
+            "fixed list indentation",
+        ),
+        (
+            "expertise:\n  - NLP\n   - IR\n",
+            {"expertise": ["NLP", "IR"]},
+            "fixed list indentation",
+        ),
+        (
+            "contact:\n  office: Block B: Room 3\n",
+            {"contact": {"office": "Block B: Room 3"}},
+            "quoted values containing colons",
+        ),
+    ],
+)
+def test_mechanical_errors_are_repaired(text, expected, fix):
+    data, fixes = parse_with_repair(text)
+    assert data == expected
+    assert fix in fixes
+
+
+def test_nested_lists_are_not_realigned():
+    text = "awards:\n- title: Best paper\n  judges:\n  - A\n  - B\n- title: Medal\n"
+    data, fixes = parse_with_repair(text)
+    assert fixes == []
+    assert data["awards"][0]["judges"] == ["A", "B"] and len(data["awards"]) == 2
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "research_interests: NLP\n",
+        "contact:\n  - a@um.edu.my\n",
+        "publications:\n  - title: A title only\n",
+    ],
+)
+def test_patches_of_the_wrong_shape_are_not_accepted(text):
+    with pytest.raises(yaml.YAMLError, match="profile schema"):
+        parse_with_repair(text)
+
+
+def test_unrepairable_yaml_raises_and_is_counted():
+    stats = RepairStats()
+    parse_with_repair("name: Dr. Test\n", stats)
+    with pytest.raises(yaml.YAMLError):
+        parse_with_repair("name: [unclosed\n", stats)
+
+    assert (stats.clean, stats.repaired, stats.failed) == (1, 0, 1)
+
+
+def test_each_document_is_recorded_once():
+    stats = RepairStats()
+    stats.record([], reprompted=True)
+    stats.record(["strip code fences"])
+    stats.record(None, ok=False)
+
+    assert (stats.clean, stats.repaired, stats.reprompted) == (0, 1, 1)
+    assert stats.failed == 1
+    assert "1 fixed by re-prompting" in stats.summary()
+    assert "(33% local repair success rate)" in stats.summary()